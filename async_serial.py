@@ -0,0 +1,320 @@
+# -*- coding: utf-8 -*-
+"""
+asyncio串口通信模块（仅Linux/Mac）
+串口fd注册到事件循环的add_reader/add_writer，收发和解析都在事件循环线程中完成，不创建线程。
+命令编码与SerialComm相同（protocol.py），每帧有反馈的命令（含wait=False）都在对应主题登记，
+反馈与数值一致的最早一条登记配对（同command_handle），更早的登记视为反馈丢失：
+
+    comm = AsyncSerialComm('/dev/ttyUSB0')
+    await comm.connect()
+    value = await comm.send_freq(1000)          # -> "1000 Hz"
+    async for obj_attr, value in comm.feedback('f0.txt'):
+        ...
+"""
+
+import asyncio
+import os
+from collections import deque
+from typing import AsyncIterator, Callable, Dict, Optional, Tuple
+
+import serial
+
+from dispatcher import FeedbackDispatcher
+from frame_parser import FrameParser
+from latency import LatencyTracer
+from logger import Hex, get_logger
+from protocol import (
+    FRAME_CLEAR_BUFF, FRAME_MODELING, FRAME_START, RESPONSE_TOPICS, TOPIC_RESULT,
+    encode_freq, encode_voltage, expected_feedback, find_feedback
+)
+
+log = get_logger('async_serial')
+
+
+class AsyncSerialComm:
+    """asyncio串口通信类"""
+
+    def __init__(self, port: str, baudrate: int = 115200, timeout: float = 1.0,
+                 read_size: int = 4096, feedback_queue_size: int = 1024):
+        """
+        Args:
+            timeout: 等待反馈的默认超时（秒）
+            feedback_queue_size: feedback()迭代器的缓冲帧数，消费过慢时丢弃最旧的帧
+        """
+        self.port = port
+        self.baudrate = baudrate
+        self.timeout = timeout
+        self.read_size = read_size
+        self.feedback_queue_size = feedback_queue_size
+        self.parser = FrameParser()
+        self.dispatcher = FeedbackDispatcher()
+        self.latency = LatencyTracer(timeout)
+        self.serial: Optional[serial.Serial] = None
+        self.is_connected = False
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._fd: Optional[int] = None
+        self._write_buffer = bytearray()
+        self._drain_waiters = []
+        # 主题 -> 待确认登记 (过期时间loop.time(), 反馈应显示的数值或None, Future或None)，按发送顺序
+        self._waiters: Dict[str, deque] = {}
+        # 统计
+        self.dropped_feedback = 0   # feedback()迭代器缓冲满被丢弃的帧数
+
+    async def connect(self) -> bool:
+        """连接串口并把fd注册到当前事件循环"""
+        self._loop = asyncio.get_running_loop()
+        try:
+            self.serial = serial.Serial(
+                port=self.port,
+                baudrate=self.baudrate,
+                timeout=0,
+                bytesize=serial.EIGHTBITS,
+                parity=serial.PARITY_NONE,
+                stopbits=serial.STOPBITS_ONE
+            )
+            self._fd = self.serial.fileno()
+            os.set_blocking(self._fd, False)
+            self._loop.add_reader(self._fd, self._on_readable)
+        except Exception as e:
+            log.error("✗ 串口连接失败: %s", e)
+            if self.serial:
+                self.serial.close()
+            self.serial = None
+            return False
+        self.parser.reset()
+        self.latency.reset()
+        self.is_connected = True
+        log.info("✓ 串口连接成功: %s @ %sbps (asyncio)", self.port, self.baudrate)
+        return True
+
+    async def disconnect(self):
+        """断开串口，未完成的等待抛出ConnectionError"""
+        if self.is_connected and self._write_buffer:
+            try:
+                await asyncio.wait_for(self.drain(), self.timeout)
+            except asyncio.TimeoutError:
+                pass
+        self._close(ConnectionError("串口已断开"))
+        log.info("✓ 串口已断开")
+
+    def _close(self, error: Exception):
+        if self._fd is not None:
+            self._loop.remove_reader(self._fd)
+            self._loop.remove_writer(self._fd)
+            self._fd = None
+        if self.serial:
+            self.serial.close()
+            self.serial = None
+        self.is_connected = False
+        self._write_buffer.clear()
+        for waiters in self._waiters.values():
+            for _, _, future in waiters:
+                if future is not None and not future.done():
+                    future.set_exception(error)
+        self._waiters = {}
+        self._wake_drain()
+
+    # ==================== 接收 ====================
+
+    def _on_readable(self):
+        """事件循环回调：读出可用数据，解析并分发"""
+        try:
+            data = os.read(self._fd, self.read_size)
+        except BlockingIOError:
+            return
+        except OSError as e:
+            log.error("✗ 串口读取失败: %s", e)
+            data = b''
+        if not data:
+            log.error("✗ 串口已断开: %s", self.port)
+            self._close(ConnectionError("串口已断开"))
+            return
+        dispatch = self.dispatcher.dispatch
+        observe = self.latency.observe
+        waiters = self._waiters
+        for obj_attr, value in self.parser.feed(data):
+            observe(obj_attr, value)
+            pending = waiters.get(obj_attr)
+            if pending:
+                self._match(pending, value)
+            dispatch(obj_attr, value)
+
+    def _match(self, pending: deque, value: str):
+        """反馈与数值一致的最早一条登记配对；已超时/取消的等待同样消耗自己的反馈"""
+        now = self._loop.time()
+        while pending and pending[0][0] < now:
+            pending.popleft()
+        index = find_feedback((slot[1] for slot in pending), value)
+        if index < 0:
+            return      # 主动上报或其他来源的反馈
+        for _ in range(index):
+            # 后发命令的反馈已到，先发命令的反馈不会再来
+            future = pending.popleft()[2]
+            if future is not None and not future.done():
+                future.set_exception(asyncio.TimeoutError("未收到反馈（反馈丢失）"))
+        future = pending.popleft()[2]
+        if future is not None and not future.done():
+            future.set_result(value)
+
+    def subscribe(self, topic: str, callback: Callable) -> Callable:
+        """订阅反馈主题，callback(obj_attr, value)在事件循环中同步调用"""
+        return self.dispatcher.subscribe(topic, callback)
+
+    def unsubscribe(self, topic: str, callback: Callable) -> bool:
+        return self.dispatcher.unsubscribe(topic, callback)
+
+    async def feedback(self, topic: str = '*') -> AsyncIterator[Tuple[str, str]]:
+        """
+        异步迭代收到的反馈帧 (obj_attr, value)
+        topic规则同subscribe；退出循环时自动取消订阅
+        """
+        queue = deque()
+        ready = asyncio.Event()
+        limit = self.feedback_queue_size
+
+        def on_frame(obj_attr, value):
+            if len(queue) >= limit:
+                queue.popleft()
+                self.dropped_feedback += 1
+            queue.append((obj_attr, value))
+            ready.set()
+
+        self.dispatcher.subscribe(topic, on_frame)
+        try:
+            while True:
+                while not queue:
+                    if not self.is_connected:
+                        return
+                    ready.clear()
+                    await ready.wait()
+                yield queue.popleft()
+        finally:
+            self.dispatcher.unsubscribe(topic, on_frame)
+
+    # ==================== 发送 ====================
+
+    def write(self, data: bytes):
+        """写出原始数据（不等待；写不完的部分由add_writer回调继续写出）"""
+        if not self.is_connected:
+            raise ConnectionError("串口未连接")
+        self.latency.stamp(data)
+        if self._write_buffer:
+            self._write_buffer += data
+            return
+        try:
+            written = os.write(self._fd, data)
+        except BlockingIOError:
+            written = 0
+        if written < len(data):
+            self._write_buffer += data[written:]
+            self._loop.add_writer(self._fd, self._on_writable)
+
+    def _on_writable(self):
+        try:
+            written = os.write(self._fd, self._write_buffer)
+        except BlockingIOError:
+            return
+        except OSError as e:
+            log.error("✗ 串口写入失败: %s", e)
+            self._close(ConnectionError(str(e)))
+            return
+        del self._write_buffer[:written]
+        if not self._write_buffer:
+            self._loop.remove_writer(self._fd)
+            self._wake_drain()
+
+    def _wake_drain(self):
+        waiters, self._drain_waiters = self._drain_waiters, []
+        for future in waiters:
+            if not future.done():
+                future.set_result(None)
+
+    async def drain(self):
+        """等待写缓冲全部写出"""
+        if self._write_buffer:
+            future = self._loop.create_future()
+            self._drain_waiters.append(future)
+            await future
+
+    async def send_frame(self, frame: bytes, wait: bool = True, timeout: Optional[float] = None):
+        """
+        发送一帧命令，并等待其反馈
+        Returns:
+            wait=False或该命令无反馈时返回None；
+            单一反馈的命令返回反馈值（如 "1000 Hz"）；Clear Buff返回 {主题: 值}
+        Raises:
+            asyncio.TimeoutError: timeout（默认self.timeout）内未收到反馈
+        """
+        topics = RESPONSE_TOPICS.get(frame[0], ())
+        timeout = self.timeout if timeout is None else timeout
+        # 不等待或等待超时后登记仍保留到默认超时，迟到的反馈不会被后面的命令拿走
+        deadline = self._loop.time() + max(timeout, self.timeout)
+        expected = expected_feedback(frame)
+        slots = []
+        futures = []
+        for topic in topics:
+            future = self._loop.create_future() if wait else None
+            slot = (deadline, expected, future)
+            waiters = self._waiters.get(topic)
+            if waiters is None:
+                waiters = self._waiters[topic] = deque()
+            waiters.append(slot)
+            slots.append((waiters, slot))
+            if future is not None:
+                futures.append(future)
+        try:
+            self.write(frame)
+        except Exception:
+            for waiters, slot in slots:
+                waiters.remove(slot)
+            for future in futures:
+                future.cancel()
+            raise
+        if not futures:
+            return None
+        try:
+            values = await asyncio.wait_for(asyncio.gather(*futures), timeout)
+        finally:
+            for future in futures:
+                future.cancel()
+        if len(topics) == 1:
+            return values[0]
+        return dict(zip(topics, values))
+
+    async def send_freq(self, freq: int, mode: int = 2, **kwargs) -> Optional[str]:
+        """设置频率，返回f0.txt反馈"""
+        cmd = encode_freq(freq, mode)
+        log.debug("→ 发送频率命令: %sHz (模式%s), HEX: %s", freq, mode, Hex(cmd))
+        return await self.send_frame(cmd, **kwargs)
+
+    async def send_voltage(self, voltage: float, cmd_type: str = 'amp', **kwargs) -> Optional[str]:
+        """设置幅值（'amp'）或峰值（'peak'），返回v0.txt/vp0.txt反馈"""
+        cmd = encode_voltage(voltage, cmd_type)
+        log.debug("→ 发送%s命令: %sV, HEX: %s", '幅值' if cmd_type == 'amp' else '峰值', voltage, Hex(cmd))
+        return await self.send_frame(cmd, **kwargs)
+
+    async def send_clear_buff(self, **kwargs) -> Optional[dict]:
+        """Clear Buff，返回 {f0.txt, v0.txt, vp0.txt: 默认值}"""
+        return await self.send_frame(FRAME_CLEAR_BUFF, **kwargs)
+
+    async def send_modeling(self, timeout: float = 30.0) -> str:
+        """建模命令，等待并返回result.txt（如 "Filter Type : LPF"）"""
+        future = self._loop.create_future()
+
+        def on_result(obj_attr, value):
+            if not future.done():
+                future.set_result(value)
+
+        self.dispatcher.subscribe(TOPIC_RESULT, on_result)
+        try:
+            self.write(FRAME_MODELING)
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            self.dispatcher.unsubscribe(TOPIC_RESULT, on_result)
+
+    async def send_start(self):
+        """启动命令（无反馈）"""
+        await self.send_frame(FRAME_START, wait=False)
+
+    def latency_stats(self) -> dict:
+        return self.latency.stats()
@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+"""
+波特率自动检测与链路吞吐测试
+- detect_baud(): 从高到低依次以各候选波特率发送Clear Buff（0x01），
+  收到完整的 f0/v0/vp0 反馈（\\xff\\xff\\xff结尾）即认为该波特率可用
+- link_test(): 在指定波特率下保持若干条频率命令在途，统计每秒确认的帧数
+
+注意：探测使用Clear Buff，会把下位机的频率/幅值/峰值恢复为默认值
+
+    python baud_detect.py /dev/ttyUSB0 --test
+"""
+
+import time
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Optional
+
+import serial
+
+from config import SERIAL_BAUD_RATES
+from frame_parser import FrameParser
+from logger import get_logger
+from protocol import CMD_CLEAR_BUFF, FRAME_CLEAR_BUFF, FRAME_SIZE, RESPONSE_TOPICS
+
+log = get_logger('baud')
+
+CLEAR_BUFF_TOPICS = RESPONSE_TOPICS[CMD_CLEAR_BUFF]
+
+
+def _count_replies(ser: serial.Serial, parser: FrameParser, data: bytes, expected: int,
+                   timeout: float) -> int:
+    """写出data，返回timeout内收到的完整Clear Buff反馈组数（收到expected组即返回）"""
+    ser.write(data)
+    ser.flush()
+    deadline = time.monotonic() + timeout
+    count = 0
+    index = 0   # 当前组已按顺序收到的主题数
+    while count < expected:
+        if time.monotonic() >= deadline:
+            break
+        chunk = ser.read(ser.in_waiting or 1)
+        for obj_attr, _ in parser.feed(chunk):
+            if obj_attr == CLEAR_BUFF_TOPICS[index]:
+                index += 1
+                if index == len(CLEAR_BUFF_TOPICS):
+                    count += 1
+                    index = 0
+            else:
+                index = 1 if obj_attr == CLEAR_BUFF_TOPICS[0] else 0
+    return count
+
+
+def probe(port: str, baudrate: int, timeout: float = 0.3) -> bool:
+    """
+    以baudrate打开串口探测下位机
+    连续发送两帧Clear Buff（12个0x01）：之前以错误波特率发出的字节可能残留在下位机的
+    6字节接收缓冲中，全0x01的数据不论从哪里对齐都至少构成一帧完整的Clear Buff。
+    只收到一组反馈说明缓冲未对齐，再逐字节补0x01直到收到反馈，恢复命令边界
+    """
+    parser = FrameParser()
+    try:
+        with serial.Serial(port, baudrate, timeout=0.01) as ser:
+            ser.reset_input_buffer()
+            count = _count_replies(ser, parser, FRAME_CLEAR_BUFF * 2, 2, timeout)
+            if count == 0:
+                return False
+            if count == 1:
+                for _ in range(FRAME_SIZE - 1):
+                    if _count_replies(ser, parser, FRAME_CLEAR_BUFF[:1], 1, timeout):
+                        break
+            return True
+    except (serial.SerialException, OSError, ValueError) as e:
+        # ValueError: 驱动不支持该波特率
+        log.debug("探测 %s @ %s 失败: %s", port, baudrate, e)
+        return False
+
+
+def detect_baud(port: str, rates: Optional[Iterable[int]] = None, timeout: float = 0.3,
+                progress: Optional[Callable[[int, bool], None]] = None) -> Optional[int]:
+    """
+    从高到低探测候选波特率，返回第一个可用的（即可用的最高波特率），都不可用返回None
+    USB虚拟串口（CDC）忽略波特率，所有候选都会成功，此时返回最高值
+    Args:
+        progress: 每探测完一个波特率调用progress(波特率, 是否可用)
+    """
+    for baudrate in sorted(rates or SERIAL_BAUD_RATES, reverse=True):
+        ok = probe(port, baudrate, timeout)
+        log.info("%s 探测 %s @ %sbps", '✓' if ok else '✗', port, baudrate)
+        if progress:
+            progress(baudrate, ok)
+        if ok:
+            return baudrate
+    return None
+
+
+def link_test(port: str, baudrate: int, duration: float = 1.0, window: int = 8,
+              timeout: float = 0.5) -> Optional[dict]:
+    """
+    链路吞吐测试：保持window条频率命令在途，持续duration秒
+    Returns:
+        {'baudrate', 'frames', 'frames_per_s', 'errors', 'p50_ms', 'p99_ms', 'line_limit'}，
+        errors为超时或反馈值不符的命令数，line_limit为该波特率下每秒可传输的（命令+反馈）帧数上限；
+        无法连接时返回None
+    """
+    from serial_comm import SerialComm
+    comm = SerialComm(port, baudrate, timeout, tx_queue_size=window * 2, tx_coalesce=False,
+                      latency_timeout=timeout)
+    if not comm.connect():
+        return None
+    inflight = deque()
+    confirmed = errors = 0
+    latencies: List[float] = []
+    freq = 1000
+    try:
+        start = time.perf_counter()
+        end = start + duration
+        while time.perf_counter() < end or inflight:
+            while len(inflight) < window and time.perf_counter() < end:
+                freq = freq + 1 if freq < 99999 else 1000
+                inflight.append((comm.send_freq_cmd(freq), f"{freq} Hz", time.perf_counter()))
+            handle, expected, sent = inflight.popleft()
+            if handle.wait(timeout) and handle.value == expected:
+                confirmed += 1
+                latencies.append((time.perf_counter() - sent) * 1000)
+            else:
+                errors += 1
+        elapsed = time.perf_counter() - start
+    finally:
+        comm.disconnect()
+    latencies.sort()
+    # 每条命令：6字节命令 + 约20字节反馈，8N1每字节10位
+    reply_size = len(b'f0.txt="1000 Hz"\xff\xff\xff')
+    return {
+        'baudrate': baudrate,
+        'frames': confirmed,
+        'frames_per_s': confirmed / elapsed,
+        'errors': errors,
+        'p50_ms': latencies[len(latencies) // 2] if latencies else None,
+        'p99_ms': latencies[int(len(latencies) * 0.99)] if latencies else None,
+        'line_limit': baudrate / 10 / (FRAME_SIZE + reply_size),
+    }
+
+
+def scan(port: str, rates: Optional[Iterable[int]] = None, duration: float = 1.0,
+         timeout: float = 0.3) -> Dict[int, Optional[dict]]:
+    """探测全部候选波特率，对可用的做吞吐测试，返回 {波特率: link_test结果或None(不可用)}"""
+    results = {}
+    for baudrate in sorted(rates or SERIAL_BAUD_RATES, reverse=True):
+        results[baudrate] = link_test(port, baudrate, duration) if probe(port, baudrate, timeout) else None
+    return results
+
+
+def print_scan(results: Dict[int, Optional[dict]]):
+    print(f"{'波特率':>9}{'可用':>6}{'帧/秒':>10}{'线路上限':>10}{'错误':>6}{'p50 ms':>9}{'p99 ms':>9}")
+    for baudrate, r in results.items():
+        if r is None:
+            print(f"{baudrate:>9}{'✗':>6}")
+            continue
+        p50 = f"{r['p50_ms']:.2f}" if r['p50_ms'] is not None else '--'
+        p99 = f"{r['p99_ms']:.2f}" if r['p99_ms'] is not None else '--'
+        print(f"{baudrate:>9}{'✓':>6}{r['frames_per_s']:>10.0f}{r['line_limit']:>10.0f}{r['errors']:>6}{p50:>9}{p99:>9}")
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="波特率自动检测与链路吞吐测试")
+    parser.add_argument('port', help="串口号")
+    parser.add_argument('--rates', type=int, nargs='+', help="候选波特率（默认config.SERIAL_BAUD_RATES）")
+    parser.add_argument('--test', action='store_true', help="对所有可用波特率做吞吐测试")
+    parser.add_argument('--duration', type=float, default=1.0, help="每个波特率的吞吐测试时长（秒）")
+    args = parser.parse_args()
+    if args.test:
+        print_scan(scan(args.port, args.rates, args.duration))
+        return
+    baudrate = detect_baud(args.port, args.rates)
+    print(f"✓ 检测到波特率: {baudrate}" if baudrate else "✗ 未检测到可用波特率")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""
+AsyncSerialComm并发测试：在一个事件循环中同时发起N个“发送频率并等待反馈”的操作，
+测量吞吐、单次操作耗时和线程数（仅Linux/Mac，使用虚拟下位机）
+
+运行: python benchmarks/bench_async.py
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from async_serial import AsyncSerialComm
+from simulator import LowerMachineSimulator
+
+
+async def run(port: str, concurrency: int) -> dict:
+    comm = AsyncSerialComm(port, timeout=30.0)
+    if not await comm.connect():
+        raise SystemExit(1)
+    durations = []
+
+    async def operation(i: int):
+        t0 = time.perf_counter()
+        await comm.send_freq(100 + i)
+        durations.append(time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(operation(i) for i in range(concurrency)))
+    wall = time.perf_counter() - t0
+    threads = threading.active_count()
+    await comm.disconnect()
+    durations.sort()
+    return {
+        'ops_per_s': concurrency / wall,
+        'p50_ms': durations[len(durations) // 2] * 1e3,
+        'max_ms': durations[-1] * 1e3,
+        'threads': threads,
+    }
+
+
+def main():
+    if os.name != 'posix':
+        print("需要pty（仅Linux/Mac）")
+        return
+    sim = LowerMachineSimulator()
+    port = sim.start()
+    try:
+        print(f"{'并发数':>8}{'操作/秒':>10}{'p50 ms':>10}{'max ms':>10}{'线程':>6}")
+        for concurrency in (1, 10, 100, 1000, 5000):
+            r = asyncio.run(run(port, concurrency))
+            print(f"{concurrency:>8}{r['ops_per_s']:>10.0f}{r['p50_ms']:>10.2f}{r['max_ms']:>10.2f}{r['threads']:>6}")
+    finally:
+        sim.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""
+帧编码吞吐量测试
+对比逐帧编码（SerialComm.send_*所用的protocol.encode_*）与NumPy批量编码
+
+运行: python benchmarks/bench_encoder.py
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from frame_encoder import encode_freq_array, encode_voltage_array
+from protocol import encode_freq, encode_voltage
+
+
+def timed(func, *args):
+    t0 = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - t0
+
+
+def main():
+    n = 200_000
+    freqs = np.random.default_rng(0).integers(1, 5_000_000, n)
+    volts = np.round(np.random.default_rng(1).uniform(0, 10, n), 2)
+    freq_list = freqs.tolist()
+    volt_list = volts.tolist()
+
+    cases = [
+        ('0x21 频率', lambda: b''.join(encode_freq(f) for f in freq_list),
+         lambda: encode_freq_array(freqs)),
+        ('0xF2 频率', lambda: b''.join(encode_freq(f, 1) for f in freq_list),
+         lambda: encode_freq_array(freqs, 1)),
+        ('0x22 幅值', lambda: b''.join(encode_voltage(v) for v in volt_list),
+         lambda: encode_voltage_array(volts)),
+        ('0x23 峰值', lambda: b''.join(encode_voltage(v, 'peak') for v in volt_list),
+         lambda: encode_voltage_array(volts, 'peak')),
+    ]
+    print(f"帧数: {n}")
+    print(f"{'命令':<10}{'逐帧(帧/秒)':>16}{'批量(帧/秒)':>16}{'加速比':>8}  一致")
+    for name, single, bulk in cases:
+        ref, t_single = timed(single)
+        out, t_bulk = timed(bulk)
+        print(f"{name:<10}{n / t_single:>16,.0f}{n / t_bulk:>16,.0f}"
+              f"{t_single / t_bulk:>8.0f}x  {'✓' if ref == out else '✗'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""
+上位机滤波器分析耗时测试
+在下位机固件扫频点（约3500点）上生成各类二阶滤波器的响应（按0.01V显示精度量化），
+测量filter_analysis.analyze()的耗时，并与虚拟下位机的判定（模拟Check_Filter_Type）核对
+
+运行: python benchmarks/bench_filter_analysis.py
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from filter_analysis import analyze, cross_check
+from simulator import FilterModel, LowerMachineSimulator
+from sweep import firmware_plan
+
+
+def main(repeat: int = 50):
+    freqs = firmware_plan()
+    print(f"扫频点数: {freqs.size}")
+    print(f"{'被测':<18}{'识别':>8}{'转折频率(Hz)':>22}{'Q':>7}{'耗时(ms)':>10}  下位机")
+    for kind in FilterModel.KINDS:
+        for fc, q in ((10000, 0.707), (2000, 5.0)):
+            model = FilterModel(kind, fc, q)
+            gains = np.round([model.response(f) for f in freqs], 2)
+            best = float('inf')
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                result = analyze(freqs, gains)
+                best = min(best, time.perf_counter() - t0)
+            board = LowerMachineSimulator(filter_model=model).classify()
+            corners = " / ".join(f"{f:.0f}" for f in result.corners) or '--'
+            q_text = f"{result.q:.2f}" if result.q is not None else '--'
+            mark = '✓' if cross_check(result, board) else '✗'
+            label = f"{kind} {fc}Hz Q{q}"
+            print(f"{label:<20}{result.kind:>8}{corners:>22}{q_text:>7}"
+                  f"{best * 1000:>10.2f}  {mark} {board}")
+
+
+if __name__ == "__main__":
+    main()
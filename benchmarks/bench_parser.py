@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""
+反馈帧解析吞吐量测试
+对比旧的bytes拼接解析与FrameParser增量解析（多MB输入）
+
+运行: python benchmarks/bench_parser.py
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from frame_parser import FrameParser
+
+
+FRAMES = [
+    b'f0.txt="1000 Hz"\xff\xff\xff',
+    b'v0.txt="3.50 V"\xff\xff\xff',
+    b'vp0.txt="5.00 V"\xff\xff\xff',
+    b'result.txt="Filter Type : LPF"\xff\xff\xff',
+]
+
+
+def make_stream(size: int) -> bytes:
+    """生成约size字节的反馈流"""
+    block = b''.join(FRAMES)
+    return block * (size // len(block) + 1)
+
+
+def chunks(stream: bytes, chunk_size: int):
+    """按chunk_size切分，模拟串口分批到达"""
+    return [stream[i:i + chunk_size] for i in range(0, len(stream), chunk_size)]
+
+
+def legacy_parse(pieces) -> int:
+    """旧实现：bytes拼接 + 每帧两次find + 重新切片"""
+    count = 0
+    buffer = b''
+    for data in pieces:
+        buffer += data
+        while b'\xff\xff\xff' in buffer:
+            end_idx = buffer.find(b'\xff\xff\xff')
+            message = buffer[:end_idx].decode('utf-8', errors='ignore')
+            buffer = buffer[end_idx + 3:]
+            if '=' in message:
+                parts = message.split('=', 1)
+                if len(parts) == 2:
+                    obj_attr = parts[0].strip()
+                    value = parts[1].strip().strip('"')
+                    count += 1
+    return count
+
+
+def parser_parse(pieces) -> int:
+    """新实现：FrameParser"""
+    count = 0
+    parser = FrameParser()
+    for data in pieces:
+        for obj_attr, value in parser.feed(data):
+            count += 1
+    return count
+
+
+def run(func, pieces, total_bytes: int):
+    t0 = time.perf_counter()
+    count = func(pieces)
+    elapsed = time.perf_counter() - t0
+    return count, count / elapsed, total_bytes / elapsed / 1e6
+
+
+def main():
+    size = 4 * 1024 * 1024
+    stream = make_stream(size)
+    print(f"输入: {len(stream) / 1e6:.1f} MB")
+    print(f"{'分块':>10}  {'实现':<12}{'帧数':>10}{'帧/秒':>14}{'MB/s':>10}")
+    for chunk_size in (64, 4096, 65536):
+        pieces = chunks(stream, chunk_size)
+        for name, func in (('legacy', legacy_parse), ('FrameParser', parser_parse)):
+            count, fps, mbps = run(func, pieces, len(stream))
+            print(f"{chunk_size:>10}  {name:<12}{count:>10}{fps:>14,.0f}{mbps:>10.2f}")
+
+    # 一次性到达的大块数据：旧实现每帧重切片，复杂度O(n²)
+    big = make_stream(256 * 1024)
+    for name, func in (('legacy', legacy_parse), ('FrameParser', parser_parse)):
+        count, fps, mbps = run(func, [big], len(big))
+        print(f"{'256KB×1':>10}  {name:<12}{count:>10}{fps:>14,.0f}{mbps:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""
+多串口接收CPU占用对比（每串口一个接收线程 vs PortManager单selector线程）
+用N个pty模拟N块下位机，子进程以固定速率向每个串口发送反馈，
+测量上位机进程的CPU时间和线程数（仅Linux/Mac）
+
+运行: python benchmarks/bench_ports.py
+"""
+
+import os
+import sys
+import threading
+import time
+import tty
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from port_manager import PortManager
+from serial_comm import SerialComm
+
+
+FRAME = b'f0.txt="1000 Hz"\xff\xff\xff'
+
+
+def open_ptys(count: int):
+    pairs = []
+    for _ in range(count):
+        master, slave = os.openpty()
+        tty.setraw(master)
+        tty.setraw(slave)
+        pairs.append((master, slave))
+    return pairs
+
+
+def start_feeder(masters, rate: float, seconds: float) -> int:
+    """子进程：以每串口rate帧/秒的速率写入反馈，返回子进程pid"""
+    pid = os.fork()
+    if pid:
+        return pid
+    try:
+        interval = 1.0 / rate if rate > 0 else None
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            if interval:
+                for master in masters:
+                    os.write(master, FRAME)
+                time.sleep(interval)
+            else:
+                time.sleep(0.05)
+    finally:
+        os._exit(0)
+
+
+def measure(mode: str, boards: int, rate: float, seconds: float = 2.0) -> dict:
+    pairs = open_ptys(boards)
+    received = [0]
+
+    def on_frame(obj_attr, value):
+        received[0] += 1
+
+    manager = None
+    comms = []
+    if mode == 'manager':
+        manager = PortManager()
+        for i, (_, slave) in enumerate(pairs):
+            manager.add(f'b{i}', os.ttyname(slave)).subscribe('*', on_frame)
+        manager.connect_all()
+    else:
+        for _, slave in pairs:
+            comm = SerialComm(os.ttyname(slave), 115200, 1.0, rx_mode=mode)
+            comm.subscribe('*', on_frame)
+            comm.connect()
+            comms.append(comm)
+    time.sleep(0.2)
+    threads = threading.active_count()
+    pid = start_feeder([m for m, _ in pairs], rate, seconds)
+    cpu0, wall0 = time.process_time(), time.perf_counter()
+    os.waitpid(pid, 0)
+    time.sleep(0.05)
+    cpu = time.process_time() - cpu0
+    wall = time.perf_counter() - wall0
+
+    if manager:
+        manager.close()
+    for comm in comms:
+        comm.disconnect()
+    for master, slave in pairs:
+        os.close(master)
+        os.close(slave)
+    return {
+        'cpu_percent': cpu / wall * 100,
+        'threads': threads,
+        'frames': received[0],
+    }
+
+
+def main():
+    if os.name != 'posix':
+        print("需要pty（仅Linux/Mac）")
+        return
+    print(f"{'模式':<10}{'串口数':>6}{'帧/秒/口':>10}{'CPU%':>8}{'线程':>6}{'收到帧':>8}")
+    for rate in (0, 200):
+        for boards in (1, 4, 16):
+            for mode in ('poll', 'event', 'manager'):
+                r = measure(mode, boards, rate)
+                print(f"{mode:<10}{boards:>6}{rate:>10}{r['cpu_percent']:>8.2f}{r['threads']:>6}{r['frames']:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""
+接收模式对比测试（event vs poll）
+通过pty伪终端模拟下位机，测量反馈延迟和空闲CPU占用（仅Linux/Mac）
+
+运行: python benchmarks/bench_rx_mode.py
+"""
+
+import os
+import sys
+import threading
+import time
+import tty
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from serial_comm import SerialComm
+
+
+FRAME = b'f0.txt="1000 Hz"\xff\xff\xff'
+
+
+def measure(rx_mode: str, samples: int = 200, idle_seconds: float = 2.0) -> dict:
+    """测量指定接收模式的反馈延迟和空闲CPU时间"""
+    master, slave = os.openpty()
+    tty.setraw(master)
+    tty.setraw(slave)
+    comm = SerialComm(os.ttyname(slave), 115200, 1.0, rx_mode=rx_mode)
+    received = threading.Event()
+    comm.set_receive_callback(lambda obj_attr, value: received.set())
+    if not comm.connect():
+        raise RuntimeError("连接pty失败")
+    try:
+        time.sleep(0.1)
+        latencies = []
+        for _ in range(samples):
+            received.clear()
+            t0 = time.perf_counter()
+            os.write(master, FRAME)
+            received.wait(1.0)
+            latencies.append((time.perf_counter() - t0) * 1000)
+            time.sleep(0.002)
+        latencies.sort()
+
+        # 空闲CPU：只统计进程CPU时间，主线程仅sleep
+        cpu0 = time.process_time()
+        time.sleep(idle_seconds)
+        idle_cpu = (time.process_time() - cpu0) / idle_seconds * 100
+    finally:
+        comm.disconnect()
+        os.close(master)
+        os.close(slave)
+    return {
+        'p50_ms': latencies[len(latencies) // 2],
+        'p99_ms': latencies[int(len(latencies) * 0.99) - 1],
+        'max_ms': latencies[-1],
+        'idle_cpu_pct': idle_cpu,
+    }
+
+
+def main():
+    print(f"{'模式':<8}{'p50(ms)':>10}{'p99(ms)':>10}{'max(ms)':>10}{'空闲CPU(%)':>14}")
+    for mode in ('event', 'poll'):     # 'external'由PortManager读取，不单独测试
+        r = measure(mode)
+        print(f"{mode:<8}{r['p50_ms']:>10.3f}{r['p99_ms']:>10.3f}{r['max_ms']:>10.3f}{r['idle_cpu_pct']:>14.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+发送路径测试（同步写出 vs 发送队列）
+测量调用线程在send_freq_cmd上的阻塞时间（仅Linux/Mac，使用pty）
+
+运行: python benchmarks/bench_tx.py
+"""
+
+import contextlib
+import io
+import os
+import sys
+import threading
+import time
+import tty
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from serial_comm import SerialComm
+
+
+def drain(fd: int, stop: threading.Event):
+    """持续读取pty主端，模拟下位机接收"""
+    while not stop.is_set():
+        try:
+            os.read(fd, 65536)
+        except OSError:
+            break
+
+
+def measure(tx_queue_size: int, count: int = 2000) -> dict:
+    master, slave = os.openpty()
+    tty.setraw(master)
+    tty.setraw(slave)
+    stop = threading.Event()
+    threading.Thread(target=drain, args=(master, stop), daemon=True).start()
+    comm = SerialComm(os.ttyname(slave), 115200, 1.0, tx_queue_size=tx_queue_size)
+    comm.connect()
+    try:
+        t0 = time.perf_counter()
+        # 屏蔽send_*的控制台输出，只测量发送路径本身
+        with contextlib.redirect_stdout(io.StringIO()):
+            for i in range(count):
+                while not comm.send_freq_cmd(1000 + i):
+                    time.sleep(0.0005)   # 队列满时稍后重试
+        call_time = time.perf_counter() - t0
+        if comm.tx_writer:
+            while comm.tx_writer.depth:
+                time.sleep(0.001)
+        stats = comm.tx_stats()
+    finally:
+        comm.disconnect()
+        stop.set()
+        os.close(master)
+        os.close(slave)
+    return {
+        'per_call_us': call_time / count * 1e6,
+        'stats': stats,
+    }
+
+
+def main():
+    for size in (0, 256):
+        r = measure(size)
+        label = '同步写出' if size == 0 else f'队列({size})'
+        print(f"{label:<10} 调用线程耗时: {r['per_call_us']:.1f} us/帧")
+        if r['stats']:
+            s = r['stats']
+            print(f"           write()次数: {s['batches']}, 已发送: {s['sent']}, "
+                  f"最大深度: {s['max_depth']}, 平均延迟: {s['avg_latency_ms']:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+"""
+性能基准测试套件
+测量协议编码、反馈解析、分发开销和端到端往返延迟，结果写入JSON以便版本间对比
+
+运行: python benchmarks/run_all.py [-o bench_results.json] [--baseline 旧结果.json]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from bench_parser import chunks, make_stream
+from dispatcher import FeedbackDispatcher
+from frame_encoder import encode_freq_array, encode_voltage_array
+from frame_parser import FrameParser
+from protocol import encode_freq, encode_voltage
+
+
+def rate(func, count: int, repeat: int = 3) -> float:
+    """func执行count次操作，取repeat次中最快的一次，返回次/秒"""
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - t0)
+    return count / best
+
+
+def percentile(sorted_values, p: float) -> float:
+    index = min(len(sorted_values) - 1, max(0, int(round(p / 100 * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+
+# ==================== 各项测试 ====================
+
+def bench_encode(n: int = 100_000) -> dict:
+    """
+    带参数的send_*命令的帧编码速率（帧/秒）
+    send_clear_buff/send_modeling_cmd/send_start_cmd发送的是固定帧常量，没有编码步骤，不列入
+    """
+    freqs = list(range(1000, 1000 + n))
+    volts = [i % 1000 / 100 for i in range(n)]
+    results = {
+        'send_freq_cmd(mode=2)': rate(lambda: [encode_freq(f) for f in freqs], n),
+        'send_freq_cmd(mode=1)': rate(lambda: [encode_freq(f, 1) for f in freqs], n),
+        'send_voltage_cmd(amp)': rate(lambda: [encode_voltage(v) for v in volts], n),
+        'send_voltage_cmd(peak)': rate(lambda: [encode_voltage(v, 'peak') for v in volts], n),
+        'bulk encode_freq_array': rate(lambda: encode_freq_array(freqs), n),
+        'bulk encode_voltage_array': rate(lambda: encode_voltage_array(volts), n),
+    }
+    return {k: round(v) for k, v in results.items()}
+
+
+def bench_parse(size: int = 4 * 1024 * 1024, chunk_size: int = 4096) -> dict:
+    """反馈解析吞吐量"""
+    stream = make_stream(size)
+    pieces = chunks(stream, chunk_size)
+    frames = 0
+
+    def run():
+        nonlocal frames
+        parser = FrameParser()
+        frames = 0
+        for data in pieces:
+            for _ in parser.feed(data):
+                frames += 1
+
+    seconds = 1 / rate(run, 1)
+    return {
+        'input_mb': round(len(stream) / 1e6, 2),
+        'chunk_bytes': chunk_size,
+        'mb_per_s': round(len(stream) / seconds / 1e6, 2),
+        'frames_per_s': round(frames / seconds),
+    }
+
+
+def bench_dispatch(n: int = 200_000) -> dict:
+    """每帧分发开销（纳秒），分别测试精确订阅和含通配订阅"""
+    def subscriber(obj_attr, value):
+        pass
+
+    topics = ('f0.txt', 'v0.txt', 'vp0.txt', 'result.txt')
+    frames = [(topics[i % 4], '1000 Hz') for i in range(n)]
+    results = {}
+    exact = FeedbackDispatcher()
+    for topic in topics:
+        exact.subscribe(topic, subscriber)
+    results['exact_ns_per_frame'] = round(1e9 / rate(lambda: [exact.dispatch(*f) for f in frames], n), 1)
+
+    wildcard = FeedbackDispatcher()
+    for topic in topics:
+        wildcard.subscribe(topic, subscriber)
+    wildcard.subscribe('f0.*', subscriber)
+    wildcard.subscribe('*', subscriber)
+    results['wildcard_ns_per_frame'] = round(1e9 / rate(lambda: [wildcard.dispatch(*f) for f in frames], n), 1)
+
+    empty = FeedbackDispatcher()
+    results['no_subscriber_ns_per_frame'] = round(1e9 / rate(lambda: [empty.dispatch(*f) for f in frames], n), 1)
+    return results
+
+
+def bench_roundtrip(samples: int = 500) -> dict:
+    """端到端延迟：send_freq_cmd → 虚拟下位机（pty）→ f0.txt反馈回调"""
+    if os.name != 'posix':
+        return {'skipped': '需要pty（仅Linux/Mac）'}
+    from config import SERIAL_RX_MODE, SERIAL_TX_QUEUE_SIZE
+    from serial_comm import SerialComm
+    from simulator import LowerMachineSimulator
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        sim = LowerMachineSimulator()
+        port = sim.start()
+        comm = SerialComm(port, 115200, 1.0, rx_mode=SERIAL_RX_MODE, tx_queue_size=SERIAL_TX_QUEUE_SIZE)
+        received = threading.Event()
+        comm.subscribe('f0.txt', lambda obj_attr, value: received.set())
+        comm.connect()
+        latencies = []
+        timeouts = 0
+        try:
+            for i in range(samples):
+                received.clear()
+                t0 = time.perf_counter_ns()
+                comm.send_freq_cmd(1000 + i)
+                if received.wait(1.0):
+                    latencies.append((time.perf_counter_ns() - t0) / 1e6)
+                else:
+                    timeouts += 1
+        finally:
+            comm.disconnect()
+            sim.stop()
+    latencies.sort()
+    if not latencies:
+        return {'samples': samples, 'timeouts': timeouts}
+    return {
+        'samples': samples,
+        'timeouts': timeouts,
+        'p50_ms': round(percentile(latencies, 50), 4),
+        'p95_ms': round(percentile(latencies, 95), 4),
+        'p99_ms': round(percentile(latencies, 99), 4),
+        'max_ms': round(latencies[-1], 4),
+    }
+
+
+BENCHMARKS = {
+    'encode_frames_per_s': bench_encode,
+    'parse': bench_parse,
+    'dispatch': bench_dispatch,
+    'roundtrip': bench_roundtrip,
+}
+
+
+# ==================== 输出与对比 ====================
+
+def git_revision() -> str:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return 'unknown'
+
+
+def flatten(results: dict, prefix: str = '') -> dict:
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, name + '.'))
+        elif isinstance(value, (int, float)):
+            flat[name] = value
+    return flat
+
+
+def compare(current: dict, baseline: dict):
+    """打印与基线结果的差异"""
+    now = flatten(current['results'])
+    old = flatten(baseline.get('results', {}))
+    print(f"\n与基线对比（{baseline.get('revision', '?')} → {current['revision']}）:")
+    for name, value in now.items():
+        if name in old and old[name]:
+            change = (value - old[name]) / old[name] * 100
+            print(f"  {name:<50}{old[name]:>14,.4g} → {value:<14,.4g}{change:+7.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HMI上位机性能基准测试")
+    parser.add_argument('-o', '--output', default='bench_results.json', help="结果JSON文件")
+    parser.add_argument('--baseline', help="用于对比的历史结果JSON")
+    parser.add_argument('--only', choices=list(BENCHMARKS), action='append', help="只运行指定测试")
+    args = parser.parse_args()
+
+    report = {
+        'revision': git_revision(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': {},
+    }
+    for name in args.only or BENCHMARKS:
+        print(f"运行 {name} ...", flush=True)
+        report['results'][name] = BENCHMARKS[name]()
+        print(json.dumps(report['results'][name], ensure_ascii=False, indent=2))
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"✓ 结果已写入 {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
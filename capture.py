@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+"""
+串口原始数据录制与回放
+录制: SerialComm.start_capture(path) 把每个接收数据块和每次写出的帧追加到二进制文件
+回放: 按1×、N×或不限速把接收数据重新送入解析器和分发器
+
+文件格式: 8字节魔数 + 若干记录
+    记录 = 时间戳(int64, perf_counter_ns) + 方向(uint8, 0=RX 1=TX 2=会话) + 长度(uint32) + 数据
+    每次打开录制先写一条会话记录（数据为开始录制时的墙钟时间 int64 time_ns）；
+    perf_counter_ns只在同一进程内可比，同一文件追加多次录制时回放在会话记录处重置时间基准
+
+命令行: python capture.py info 文件
+        python capture.py replay 文件 [--speed N | --speed 0] [--print]
+"""
+
+import struct
+import threading
+import time
+from typing import Callable, Iterator, Optional, Tuple
+
+from dispatcher import FeedbackDispatcher
+from frame_parser import FrameParser
+from logger import RX, TX
+
+MAGIC = b'HMICAP01'
+SESSION = 'SESSION'     # 会话记录的方向名
+_RECORD = struct.Struct('<qBI')
+_EPOCH = struct.Struct('<q')
+_DIRECTION_CODES = {RX: 0, TX: 1, SESSION: 2}
+_DIRECTION_NAMES = {0: RX, 1: TX, 2: SESSION}
+
+
+class CaptureWriter:
+    """只追加的录制文件（线程安全，接收线程和发送线程共用），每次打开开始一个新会话"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, 'ab')
+        if self._file.tell() == 0:
+            self._file.write(MAGIC)
+        self._file.write(_RECORD.pack(time.perf_counter_ns(), _DIRECTION_CODES[SESSION], _EPOCH.size)
+                         + _EPOCH.pack(time.time_ns()))
+        self.records = 0
+        self.bytes = 0
+
+    def write(self, direction: str, data: bytes, t_ns: Optional[int] = None):
+        """追加一条记录"""
+        if t_ns is None:
+            t_ns = time.perf_counter_ns()
+        header = _RECORD.pack(t_ns, _DIRECTION_CODES[direction], len(data))
+        with self._lock:
+            if self._file:
+                self._file.write(header + data)
+                self.records += 1
+                self.bytes += len(data)
+
+    def close(self):
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+
+def read_capture(path: str) -> Iterator[Tuple[int, str, bytes]]:
+    """
+    逐条读取录制文件
+    Yields:
+        (时间戳ns, 方向RX/TX/SESSION, 数据)；文件末尾不完整的记录被忽略
+        SESSION记录之后的时间戳与之前的不可比（另一次录制）
+    """
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"不是录制文件: {path}")
+        while True:
+            header = f.read(_RECORD.size)
+            if len(header) < _RECORD.size:
+                return
+            t_ns, code, length = _RECORD.unpack(header)
+            data = f.read(length)
+            if len(data) < length:
+                return
+            yield t_ns, _DIRECTION_NAMES.get(code, RX), data
+
+
+def replay(path: str, feed: Optional[Callable[[bytes], None]] = None, speed: float = 1.0,
+           dispatcher: Optional[FeedbackDispatcher] = None) -> dict:
+    """
+    回放录制文件中的接收数据
+    Args:
+        path: 录制文件
+        feed: 接收数据块的处理函数（如 SerialComm._handle_data）；
+              None=使用新的FrameParser，解析出的帧交给dispatcher
+        speed: 回放倍速，1=按录制时的间隔，N=N倍速，0=不限速
+        dispatcher: feed为None时使用的分发器（None=新建，无订阅者）
+    Returns:
+        统计: chunks, bytes, frames(仅feed为None时), elapsed, recorded(各会话录制时长之和), mb_per_s
+    """
+    parser = None
+    if feed is None:
+        parser = FrameParser()
+        dispatch = (dispatcher or FeedbackDispatcher()).dispatch
+
+        def feed(data):
+            for obj_attr, value in parser.feed(data):
+                dispatch(obj_attr, value)
+
+    chunks = total = recorded = 0
+    first_ns = last_ns = None
+    start = time.perf_counter_ns()
+    for t_ns, direction, data in read_capture(path):
+        if direction == SESSION:
+            # 新的录制会话：时间戳换了基准，从此处重新对齐
+            if first_ns is not None:
+                recorded += last_ns - first_ns
+            first_ns = last_ns = None
+            continue
+        if direction != RX:
+            continue
+        if first_ns is None:
+            first_ns = t_ns
+            base = time.perf_counter_ns()
+        last_ns = t_ns
+        if speed > 0:
+            due = base + (t_ns - first_ns) / speed
+            wait = (due - time.perf_counter_ns()) / 1e9
+            if wait > 0:
+                time.sleep(wait)
+        feed(data)
+        chunks += 1
+        total += len(data)
+    elapsed = (time.perf_counter_ns() - start) / 1e9
+    if first_ns is not None:
+        recorded += last_ns - first_ns
+    return {
+        'chunks': chunks,
+        'bytes': total,
+        'frames': parser.frames if parser else None,
+        'elapsed': elapsed,
+        'recorded': recorded / 1e9,
+        'mb_per_s': total / elapsed / 1e6 if elapsed > 0 else 0.0,
+    }
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="串口录制文件查看与回放")
+    sub = parser.add_subparsers(dest='command', required=True)
+    info = sub.add_parser('info', help="录制文件概要")
+    info.add_argument('path')
+    play = sub.add_parser('replay', help="把接收数据回放到解析器和分发器")
+    play.add_argument('path')
+    play.add_argument('--speed', type=float, default=1.0, help="回放倍速，0=不限速")
+    play.add_argument('--print', action='store_true', help="打印解析出的每一帧")
+    args = parser.parse_args()
+
+    if args.command == 'info':
+        counts = {RX: [0, 0], TX: [0, 0]}
+        sessions = []   # 各会话 [开始墙钟时间ns或None, 首条时间戳, 末条时间戳]
+        for t_ns, direction, data in read_capture(args.path):
+            if direction == SESSION:
+                sessions.append([_EPOCH.unpack(data)[0], None, None])
+                continue
+            if not sessions:
+                sessions.append([None, None, None])     # 无会话记录的旧文件
+            session = sessions[-1]
+            counts[direction][0] += 1
+            counts[direction][1] += len(data)
+            session[1] = t_ns if session[1] is None else min(session[1], t_ns)
+            session[2] = t_ns if session[2] is None else max(session[2], t_ns)
+        span = sum((last - first) / 1e9 for _, first, last in sessions if first is not None)
+        print(f"{args.path}: 时长 {span:.3f}s, {len(sessions)}次录制")
+        for epoch, first, last in sessions:
+            if epoch is not None and len(sessions) > 1:
+                began = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(epoch / 1e9))
+                length = (last - first) / 1e9 if first is not None else 0.0
+                print(f"  {began} 起 {length:.3f}s")
+        for direction, (records, size) in counts.items():
+            print(f"  {direction}: {records}条记录, {size}字节")
+        return
+
+    dispatcher = FeedbackDispatcher()
+    if args.print:
+        dispatcher.subscribe('*', lambda obj_attr, value: print(f'← {obj_attr}="{value}"'))
+    stats = replay(args.path, speed=args.speed, dispatcher=dispatcher)
+    print(f"✓ 回放完成: {stats['chunks']}块 {stats['bytes']}字节 {stats['frames']}帧, "
+          f"用时 {stats['elapsed']:.3f}s（录制 {stats['recorded']:.3f}s）, "
+          f"{stats['mb_per_s']:.2f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,351 @@
+# -*- coding: utf-8 -*-
+"""
+命令确认模块
+send_*返回CommandHandle：发送成功时为真（兼容原来的bool返回值），
+收到对应反馈后完成（0x21/0xF2→f0.txt, 0x22→v0.txt, 0x23→vp0.txt, 0xF0→result.txt,
+0x01→f0/v0/vp0三条默认值），闭环脚本可在下位机确认后立即继续：
+
+    if comm.send_freq_cmd(1000).wait(0.5, retries=2):
+        ...
+
+ResponseMatcher在写出前登记每帧，按主题与收到的反馈配对（同LatencyTracer）：
+反馈值与命令设置的频率/电压一致才配对，先于它登记的命令视为反馈丢失而失败
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+from protocol import (
+    CMD_MODELING, FRAME_SIZE, RESPONSE_TOPICS, TOPIC_RESULT, expected_feedback, find_feedback
+)
+
+
+# 命令码 -> 确认所需的反馈主题
+CONFIRM_TOPICS = dict(RESPONSE_TOPICS)
+CONFIRM_TOPICS[CMD_MODELING] = (TOPIC_RESULT,)
+
+# 单独设置确认超时的命令码（秒），其余使用ResponseMatcher.timeout
+CONFIRM_TIMEOUTS = {CMD_MODELING: 60.0}
+
+# 句柄状态
+PENDING = 'pending'
+CONFIRMED = 'confirmed'
+FAILED = 'failed'
+
+
+class CommandHandle:
+    """
+    一次发送的句柄
+    - bool(handle): 是否已发出/入队（兼容send_*原来的返回值）
+    - wait()/result(): 阻塞等待反馈，可超时重发
+    - add_done_callback(): 完成（确认或失败）时回调，在接收线程/写线程中调用
+    - superseded: 排队时被同类新命令合并，实际写出的是新值（确认的也是新值的反馈）
+    无反馈的命令（如0xF1启动）在写出时即完成
+    """
+
+    __slots__ = ('frame', 'opcode', 'topics', 'sent', 'state', 'error', 'values', 'attempts',
+                 'written_at', 'superseded', '_matcher', '_resend', '_outstanding', '_event', '_callbacks')
+
+    def __init__(self, frame: bytes, matcher: 'ResponseMatcher',
+                 resend: Optional[Callable[['CommandHandle'], None]] = None):
+        self.frame = frame
+        # 多帧拼接时以最后一帧为准
+        self.opcode = frame[-FRAME_SIZE] if len(frame) >= FRAME_SIZE else None
+        self.topics = CONFIRM_TOPICS.get(self.opcode, ())
+        self.sent = False
+        self.state = PENDING
+        self.error: Optional[str] = None
+        self.values: Dict[str, str] = {}
+        self.attempts = 0               # 发送次数（含重发）
+        self.written_at: Optional[float] = None     # 最近一次写出完成的时间（perf_counter）
+        self.superseded = False         # 本帧已被发送队列中更新的同类命令取代
+        self._matcher = matcher
+        self._resend = resend
+        self._outstanding = 0           # 已写出、尚未配对或过期的反馈条数
+        self._event: Optional[threading.Event] = None
+        self._callbacks: Optional[List[Callable]] = None
+
+    def __bool__(self) -> bool:
+        return self.sent
+
+    def __repr__(self) -> str:
+        return f"<CommandHandle 0x{self.opcode or 0:02X} {self.state} {self.values}>"
+
+    def done(self) -> bool:
+        return self.state != PENDING
+
+    def confirmed(self) -> bool:
+        return self.state == CONFIRMED
+
+    @property
+    def value(self):
+        """反馈值：单一反馈返回字符串，Clear Buff返回 {主题: 值}，未确认时为None"""
+        if self.state != CONFIRMED or not self.topics:
+            return None
+        if len(self.topics) == 1:
+            return self.values[self.topics[0]]
+        return dict(self.values)
+
+    @property
+    def default_timeout(self) -> float:
+        return CONFIRM_TIMEOUTS.get(self.opcode, self._matcher.timeout)
+
+    def add_done_callback(self, callback: Callable[['CommandHandle'], None]):
+        """完成时调用callback(handle)；已完成则立即调用"""
+        with self._matcher.lock:
+            if self.state == PENDING:
+                if self._callbacks is None:
+                    self._callbacks = []
+                self._callbacks.append(callback)
+                return
+        callback(self)
+
+    def wait(self, timeout: Optional[float] = None, retries: int = 0) -> bool:
+        """
+        等待反馈，返回是否已确认
+        Args:
+            timeout: 每次发送的等待时间（秒），默认取确认超时
+            retries: 超时后重发次数（重发的帧不参与发送队列合并）
+        """
+        if timeout is None:
+            timeout = self.default_timeout
+        while True:
+            if self._wait_once(timeout):
+                if self.state == CONFIRMED:
+                    return True
+            if retries <= 0 or self._resend is None:
+                self._settle(FAILED, f"{timeout}s内未收到反馈")
+                return False
+            retries -= 1
+            self._resend(self)
+
+    def result(self, timeout: Optional[float] = None, retries: int = 0):
+        """等待并返回反馈值（见value），超时或发送失败时抛出TimeoutError"""
+        if not self.wait(timeout, retries):
+            raise TimeoutError(self.error or "未收到反馈")
+        return self.value
+
+    def _wait_once(self, timeout: float) -> bool:
+        with self._matcher.lock:
+            if self.state != PENDING:
+                return True
+            if self._event is None:
+                self._event = threading.Event()
+            event = self._event
+        return event.wait(timeout)
+
+    def _restart(self):
+        """重发前撤销旧登记并恢复为等待状态"""
+        self._matcher.withdraw(self)
+        with self._matcher.lock:
+            self.state = PENDING
+            self.error = None
+            self.values = {}
+            self.superseded = False
+            if self._event is not None:
+                self._event.clear()
+        self.attempts += 1
+
+    def _settle(self, state: str, error: Optional[str] = None):
+        """完成句柄（加锁）"""
+        with self._matcher.lock:
+            finished = self._set_state(state, error)
+        if finished:
+            self._notify()
+
+    def _set_state(self, state: str, error: Optional[str] = None) -> bool:
+        """须持有锁；返回是否由本次调用完成"""
+        if self.state != PENDING:
+            return False
+        self.state = state
+        self.error = error
+        if self._event is not None:
+            self._event.set()
+        return True
+
+    def _notify(self):
+        callbacks, self._callbacks = self._callbacks, None
+        for callback in callbacks or ():
+            try:
+                callback(self)
+            except Exception:
+                pass
+
+
+def _discard(pending: deque, entry):
+    """从主题队列中删除指定登记（按身份比较，登记通常在队尾附近）"""
+    for i in range(len(pending) - 1, -1, -1):
+        if pending[i] is entry:
+            del pending[i]
+            return
+
+
+class ResponseMatcher:
+    """
+    反馈配对器（线程安全）
+    - expect() 在写线程中、每次写出之前调用，没有句柄的帧也要登记以保持配对顺序；
+      写出后调用written()，写出失败时调用cancel()撤销登记
+    - observe() 在接收线程中对每条反馈调用：与该主题中数值一致的最早一条登记配对，
+      更早的登记的反馈已丢失，对应句柄失败；没有一致的登记时忽略该反馈
+    - withdraw() 在重发前撤销该句柄的旧登记，重发帧重新登记在队尾
+    超过确认超时仍未配对的登记在下一次observe()/expire()时丢弃，对应句柄失败
+    """
+
+    def __init__(self, timeout: float = 1.0):
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        # 反馈主题 -> 待确认登记 (过期时间monotonic, 句柄列表或None, 反馈应显示的数值或None)
+        self._pending: Dict[str, deque] = {}
+
+    def expect(self, data: bytes, handles: Optional[list] = None):
+        """
+        登记即将写出的命令
+        Args:
+            data: 一帧或多帧拼接（同一次put/send）
+            handles: 等待该数据的句柄，挂在最后一帧上（发送队列合并时可有多个）
+        Returns:
+            登记记录，写出后交给written()，写出失败时交给cancel()
+        """
+        now = time.monotonic()
+        entries = []        # (主题队列, 登记)
+        immediate = []      # 无反馈的命令的句柄，写出即完成
+        last = len(data) - FRAME_SIZE
+        with self.lock:
+            for i in range(0, last + 1, FRAME_SIZE):
+                opcode = data[i]
+                frame_handles = handles if i == last else None
+                for handle in frame_handles or ():
+                    if handle.frame[-FRAME_SIZE:] != data[i:]:
+                        handle.superseded = True
+                topics = CONFIRM_TOPICS.get(opcode)
+                if not topics:
+                    immediate.extend(frame_handles or ())
+                    continue
+                entry = (now + CONFIRM_TIMEOUTS.get(opcode, self.timeout), frame_handles,
+                         expected_feedback(data[i:i + FRAME_SIZE]))
+                for topic in topics:
+                    pending = self._pending.get(topic)
+                    if pending is None:
+                        pending = self._pending[topic] = deque()
+                    pending.append(entry)
+                    entries.append((pending, entry))
+                for handle in frame_handles or ():
+                    handle._outstanding += len(topics)
+        return entries, handles, immediate
+
+    def written(self, registered):
+        """登记的命令已写出：记录写出时间，无反馈的命令完成"""
+        _, handles, immediate = registered
+        now = time.perf_counter()
+        for handle in handles or ():
+            handle.written_at = now
+        if not immediate:
+            return
+        finished = []
+        with self.lock:
+            for handle in immediate:
+                if handle._set_state(CONFIRMED):
+                    finished.append(handle)
+        for handle in finished:
+            handle._notify()
+
+    def cancel(self, registered, error: str):
+        """登记的命令未能写出：撤销登记（不再参与配对），句柄失败"""
+        entries, handles, immediate = registered
+        finished = []
+        with self.lock:
+            for pending, entry in entries:
+                _discard(pending, entry)
+            for handle in list(handles or ()) + immediate:
+                handle._outstanding = 0
+                if handle._set_state(FAILED, error):
+                    finished.append(handle)
+        for handle in finished:
+            handle._notify()
+
+    def withdraw(self, handle: CommandHandle):
+        """
+        撤销句柄尚未配对的旧登记（重发前调用），避免旧登记吃掉后面命令的反馈：
+        只等待该句柄的登记整条删除，与其他句柄共用的登记（发送队列合并）只去掉该句柄
+        """
+        with self.lock:
+            shared = {}
+            for pending in self._pending.values():
+                for i in range(len(pending) - 1, -1, -1):
+                    handles = pending[i][1]
+                    if not handles or not any(h is handle for h in handles):
+                        continue
+                    if len(handles) == 1:
+                        del pending[i]
+                    else:
+                        shared[id(handles)] = handles
+            for handles in shared.values():
+                handles[:] = [h for h in handles if h is not handle]
+            handle._outstanding = 0
+
+    def observe(self, topic: str, value: str):
+        """收到反馈：与该主题中数值一致的最早一条登记配对"""
+        pending = self._pending.get(topic)
+        if not pending:
+            return      # 无待确认命令（主动上报或其他来源的反馈）
+        finished = []
+        with self.lock:
+            self._expire_topic(pending, time.monotonic(), finished)
+            index = find_feedback((entry[2] for entry in pending), value) if pending else -1
+            if index >= 0:
+                for _ in range(index):
+                    # 后发命令的反馈已到，先发命令的反馈不会再来
+                    _, handles, _ = pending.popleft()
+                    for handle in handles or ():
+                        handle._outstanding -= 1
+                        if handle._set_state(FAILED, "未收到反馈（反馈丢失）"):
+                            finished.append(handle)
+                _, handles, _ = pending.popleft()
+                for handle in handles or ():
+                    handle._outstanding -= 1
+                    if handle.state != PENDING:
+                        continue
+                    handle.values[topic] = value
+                    if len(handle.values) == len(handle.topics) and handle._set_state(CONFIRMED):
+                        finished.append(handle)
+        for handle in finished:
+            handle._notify()
+
+    def _expire_topic(self, pending: deque, now: float, finished: list):
+        """丢弃过期登记（须持有锁）"""
+        while pending and pending[0][0] < now:
+            _, handles, _ = pending.popleft()
+            for handle in handles or ():
+                handle._outstanding -= 1
+                if handle._outstanding == 0 and handle._set_state(FAILED, "未收到反馈（超时）"):
+                    finished.append(handle)
+
+    def expire(self):
+        """丢弃全部过期登记（定时调用可让超时句柄及时回调）"""
+        finished = []
+        with self.lock:
+            now = time.monotonic()
+            for pending in self._pending.values():
+                self._expire_topic(pending, now, finished)
+        for handle in finished:
+            handle._notify()
+
+    def pending_count(self) -> int:
+        with self.lock:
+            return sum(len(pending) for pending in self._pending.values())
+
+    def fail_all(self, error: str):
+        """断开连接：所有等待中的句柄失败"""
+        finished = []
+        with self.lock:
+            for pending in self._pending.values():
+                for _, handles, _ in pending:
+                    for handle in handles or ():
+                        handle._outstanding = 0
+                        if handle._set_state(FAILED, error):
+                            finished.append(handle)
+            self._pending = {}
+        for handle in finished:
+            handle._notify()
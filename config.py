@@ -6,12 +6,32 @@ HMI上位机配置文件
 # 串口配置
 SERIAL_PORT = 'COM3'  # Windows: 'COM3', Linux/Mac: '/dev/ttyUSB0'
 SERIAL_BAUDRATE = 115200
+SERIAL_BAUD_RATES = (9600, 19200, 38400, 57600, 115200, 230400,   # 连接对话框/自动检测的候选波特率
+                     460800, 921600, 1000000, 1500000, 2000000)
 SERIAL_TIMEOUT = 1.0
+SERIAL_TX_QUEUE_SIZE = 256  # 发送队列长度，0=在调用线程同步写出
+SERIAL_TX_COALESCE = True   # 频率/幅值/峰值命令排队时只发送最新值
+SERIAL_TX_RATE_LIMIT = 0    # 每秒最多发送的命令帧数，0=不限速（扫频/序列需按链路速率发送，默认不限）
+SERIAL_TX_BURST = 8         # 限速时允许的突发帧数
+SERIAL_RX_MODE = 'event'  # 接收模式: 'event'=阻塞读取（低延迟）, 'poll'=10ms轮询
+SERIAL_LATENCY_TIMEOUT = 1.0  # 命令发出后超过该时间（秒）未收到反馈记为超时
+BOARDS = {}               # 多板测试: {'名称': '串口号'}，由PortManager按名称管理
+LATENCY_REFRESH_MS = 500     # 页面延迟统计刷新间隔（毫秒）
+SERIAL_AUTO_RECONNECT = True  # USB串口拔出后自动重连（按VID/PID/序列号查找同一设备）
+SERIAL_RECONNECT_INITIAL = 0.05  # 首次重连间隔（秒），之后每次翻倍
+SERIAL_RECONNECT_MAX = 0.5    # 最大重连间隔（秒）
+
+# 虚拟下位机（连接对话框"模拟下位机"，仅Linux/Mac）
+SIMULATOR_DELAY = 0.002   # 反馈延迟（秒）
+SIMULATOR_JITTER = 0.001  # 反馈延迟抖动（秒）
+SIMULATOR_FILTER = 'LPF'  # 被测电路类型: LPF/HPF/BPF/BSF
+SIMULATOR_FC = 10000      # 被测电路特征频率（Hz）
 
 # 窗口配置
 WINDOW_WIDTH = 900
-WINDOW_HEIGHT = 700
+WINDOW_HEIGHT = 760
 WINDOW_TITLE = "串口上位机"
+UI_REFRESH_MS = 16  # 串口反馈刷新UI的节拍（毫秒），同一节拍内同一控件只刷新一次
 
 # 颜色配置（基于RGB565转换）
 COLOR_DEFAULT = '#C0C0C0'    # 50712 -> 灰色（默认按钮）
@@ -29,6 +49,26 @@ FONT_LABEL = ('Arial', 12)
 FONT_BUTTON = ('Arial', 11)
 FONT_STATUS = ('Arial', 10)
 
+# 上位机扫频
+SWEEP_WINDOW = 8          # 最大在途（未确认）频率命令数
+SWEEP_ACK_TIMEOUT = 1.0   # 单点确认超时（秒）
+SWEEP_DATA_DIR = 'sweep_data'  # 扫频记录保存目录（.npy）
+# 下位机在频率命令(0x21)的f0.txt之后是否上报vp0输出电平。现有固件只回f0.txt，
+# 此时扫频记录没有输出电平，不能做上位机滤波器分析；虚拟下位机（--echo-response）支持
+SWEEP_LEVEL_ECHO = False
+PLOT_FPS = 30             # 实时曲线最大重绘帧率
+
+# 日志与串口调试
+LOG_LEVEL = 'INFO'        # 'DEBUG'=记录每一帧收发, 'INFO'=连接/状态, 'WARNING'=仅错误
+LOG_FILE = 'logs/hmi.log'  # 日志文件（None=不写文件）
+LOG_MAX_BYTES = 1024 * 1024  # 单个日志文件大小上限，超过后滚动
+LOG_BACKUP_COUNT = 3      # 保留的历史日志文件数
+LOG_CONSOLE = True        # 同时输出到控制台
+FRAME_RING_SIZE = 2000    # 串口调试页面保留的最近收发帧数
+DEBUG_REFRESH_MS = 100    # 串口调试页面刷新间隔（毫秒）
+CAPTURE_DIR = 'captures'  # 串口原始数据录制目录（python capture.py replay 回放）
+STARTUP_REPORT = 'logs/startup.jsonl'  # 启动耗时记录（每次启动追加一行，None=不记录）
+
 # 默认值
 DEFAULT_FREQ = 1000
 DEFAULT_VOLTAGE = 1.0
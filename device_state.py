@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+下位机状态模块
+把反馈显示字符串（"1000 Hz"、"3.50 V"、"Filter Type : LPF"）解析为数值，
+集中保存频率/幅值/峰值/建模结果，并记录各字段的更新时间。
+观察者只在数值真正变化时被调用，重复的相同反馈不产生UI刷新：
+
+    serial_comm.device.observe('freq', callback)    # callback(字段, 新值)
+    serial_comm.device.freq                         # 1000.0（Hz）
+"""
+
+import math
+import time
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional
+
+from logger import get_logger
+from protocol import TOPIC_AMP, TOPIC_FREQ, TOPIC_PEAK, TOPIC_RESULT, parse_quantity
+
+log = get_logger('device')
+
+
+# 反馈主题 -> 字段名
+FIELDS = {
+    TOPIC_FREQ: 'freq',     # 频率（Hz）
+    TOPIC_AMP: 'amp',       # 幅值（V）
+    TOPIC_PEAK: 'peak',     # 峰值（V）
+    TOPIC_RESULT: 'result', # 建模结果（滤波器类型，如 'LPF'）
+}
+
+
+@lru_cache(maxsize=4096)
+def parse_value(text: str) -> float:
+    """解析数值反馈（带缓存，相同字符串只解析一次），无法解析时抛出ValueError"""
+    return parse_quantity(text)[0]
+
+
+def parse_result(text: str) -> str:
+    """解析建模结果，"Filter Type : LPF" → 'LPF'"""
+    return text.rpartition(':')[2].strip()
+
+
+class DeviceState:
+    """
+    下位机数值状态
+    - feed() 作为反馈订阅者在接收线程中调用
+    - 未收到反馈的数值字段为nan，result为None
+    - 观察者callback(字段, 新值)在接收线程中调用（UI需经TkBridge.wrap转到Tk线程），
+      观察者抛出的异常记录日志后忽略
+    """
+
+    __slots__ = ('freq', 'amp', 'peak', 'result', '_text', '_updated', '_observers',
+                 'updates', 'changes', 'errors')
+
+    def __init__(self):
+        self.freq = math.nan
+        self.amp = math.nan
+        self.peak = math.nan
+        self.result: Optional[str] = None
+        self._text: Dict[str, str] = {}             # 字段 -> 最近一次反馈字符串
+        self._updated: Dict[str, float] = {}        # 字段 -> 最近一次反馈时间（monotonic）
+        self._observers: Dict[str, List[Callable]] = {}
+        # 统计
+        self.updates = 0        # 收到的反馈条数
+        self.changes = 0        # 数值发生变化的次数
+        self.errors = 0         # 观察者抛出异常的次数
+
+    def attach(self, serial_comm):
+        """订阅SerialComm的反馈主题"""
+        for topic in FIELDS:
+            serial_comm.subscribe(topic, self.feed)
+
+    def feed(self, obj_attr: str, value: str):
+        """处理一条反馈"""
+        field = FIELDS.get(obj_attr)
+        if field is None:
+            return
+        self._updated[field] = time.monotonic()
+        self.updates += 1
+        if self._text.get(field) == value:
+            return      # 与上一条反馈相同
+        self._text[field] = value
+        try:
+            new = parse_result(value) if field == 'result' else parse_value(value)
+        except ValueError:
+            return
+        old = getattr(self, field)
+        if new == old:
+            return      # 显示格式不同但数值相同
+        setattr(self, field, new)
+        self.changes += 1
+        for callback in self._observers.get(field, []) + self._observers.get('*', []):
+            try:
+                callback(field, new)
+            except Exception as e:
+                # 单个观察者的异常不影响其他观察者和接收线程
+                self.errors += 1
+                log.error("✗ 状态观察者错误 [%s]: %s", field, e)
+
+    def observe(self, field: str, callback: Callable[[str, object], None]) -> Callable:
+        """
+        观察字段变化
+        Args:
+            field: 'freq' / 'amp' / 'peak' / 'result'，'*'=全部
+            callback: callback(字段, 新值)
+        """
+        if field != '*' and field not in FIELDS.values():
+            raise ValueError(f"未知字段: {field}")
+        # 复制后替换，接收线程遍历时不受影响
+        self._observers[field] = self._observers.get(field, []) + [callback]
+        return callback
+
+    def unobserve(self, field: str, callback: Callable) -> bool:
+        callbacks = self._observers.get(field, [])
+        if callback not in callbacks:
+            return False
+        self._observers[field] = [c for c in callbacks if c is not callback]
+        return True
+
+    def text(self, field: str) -> Optional[str]:
+        """最近一次反馈的显示字符串（如 "1.50 kHz"）"""
+        return self._text.get(field)
+
+    def updated_at(self, field: str) -> Optional[float]:
+        """最近一次收到该字段反馈的时间（time.monotonic），未收到过返回None"""
+        return self._updated.get(field)
+
+    def age(self, field: str) -> Optional[float]:
+        """距最近一次反馈的秒数"""
+        updated = self._updated.get(field)
+        return time.monotonic() - updated if updated is not None else None
+
+    def snapshot(self) -> dict:
+        return {'freq': self.freq, 'amp': self.amp, 'peak': self.peak, 'result': self.result}
+
+    def reset(self):
+        """清空状态（不清除观察者）"""
+        self.freq = self.amp = self.peak = math.nan
+        self.result = None
+        self._text = {}
+        self._updated = {}
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+反馈分发模块
+按控件属性（obj_attr，如 f0.txt）将反馈帧路由到所有订阅者
+"""
+
+import threading
+from typing import Callable, Dict, Tuple
+
+from logger import get_logger
+
+log = get_logger('dispatcher')
+
+
+# 订阅者回调签名: callback(obj_attr, value)
+Subscriber = Callable[[str, str], None]
+
+WILDCARD = '*'
+
+
+class FeedbackDispatcher:
+    """
+    主题分发器
+    订阅主题支持三种形式：
+    - 'f0.txt'  精确匹配
+    - 'f0.*'    匹配控件f0的任意属性
+    - '*'       匹配所有反馈
+    每帧最多三次字典查找，与订阅者总数无关
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # 主题 -> 订阅者元组（写时复制，分发时无需加锁）
+        self._subscribers: Dict[str, Tuple[Subscriber, ...]] = {}
+        self.dispatched = 0     # 已分发的帧数
+        self.errors = 0         # 订阅者抛出异常的次数
+
+    def subscribe(self, topic: str, callback: Subscriber) -> Subscriber:
+        """订阅主题，返回callback以便之后取消订阅"""
+        with self._lock:
+            current = self._subscribers.get(topic, ())
+            if callback not in current:
+                self._subscribers[topic] = current + (callback,)
+        return callback
+
+    def unsubscribe(self, topic: str, callback: Subscriber) -> bool:
+        """取消订阅，返回是否找到该订阅"""
+        with self._lock:
+            current = self._subscribers.get(topic, ())
+            if callback not in current:
+                return False
+            remaining = tuple(cb for cb in current if cb != callback)
+            if remaining:
+                self._subscribers[topic] = remaining
+            else:
+                del self._subscribers[topic]
+            return True
+
+    def has_subscribers(self, topic: str) -> bool:
+        """主题是否有订阅者（含通配）"""
+        subs = self._subscribers
+        obj = topic.partition('.')[0]
+        return bool(subs.get(topic) or subs.get(obj + '.*') or subs.get(WILDCARD))
+
+    def dispatch(self, obj_attr: str, value: str):
+        """将一帧反馈分发给所有匹配的订阅者"""
+        subs = self._subscribers
+        self.dispatched += 1
+        targets = subs.get(obj_attr, ())
+        prefixed = subs.get(obj_attr.partition('.')[0] + '.*')
+        if prefixed:
+            targets = targets + prefixed
+        catch_all = subs.get(WILDCARD)
+        if catch_all:
+            targets = targets + catch_all
+        for callback in targets:
+            try:
+                callback(obj_attr, value)
+            except Exception as e:
+                self.errors += 1
+                log.error("✗ 反馈处理错误 [%s]: %s", obj_attr, e)
+
+    def clear(self):
+        """移除所有订阅"""
+        with self._lock:
+            self._subscribers = {}
@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+"""
+滤波器特性分析模块（NumPy向量化）
+由扫频记录的 (频率, 增益) 数组在上位机重新识别滤波器，无需下位机重新扫频：
+通带、-3dB转折频率、中心频率/Q、滚降斜率，以及LPF/HPF/BPF/BSF分类，
+并可与下位机result.txt的判定交叉核对
+
+    result = analyze(*gain_from_record(ResponseStore.load(path)))
+    print(describe(result, board='LPF'))
+"""
+
+from collections import namedtuple
+from typing import Optional, Tuple
+
+import numpy as np
+
+from device_state import parse_result
+
+
+FILTER_TYPES = ('LPF', 'HPF', 'BPF', 'BSF')
+UNKNOWN = 'Unknown'
+
+CORNER_DB = -3.0        # 转折频率对应的相对增益（dB）
+PASS_DB = -6.0          # 端点相对最大增益高于此值视为在通带内（同下位机的0.5×峰值判据）
+FLAT_SLOPE = 10.0       # 端点局部斜率绝对值低于此值（dB/十倍频）也视为在通带内（谐振峰高于6dB时）
+EDGE_POINTS = 5         # 端点电平取两端各多少点
+EDGE_DECADES = 0.3      # 端点局部斜率取两端各多少十倍频内的点
+ROLLOFF_START = 2.0     # 滚降斜率从转折频率的几倍（LPF）/几分之一（HPF）处开始拟合
+FLOOR_DB = -80.0        # 增益为0（显示精度以下）的点按此电平处理
+RESOLUTION_MARGIN = 10.0  # 斜率只拟合高于最小非零读数（≈显示精度）此dB数的点，避开量化台阶
+
+# 分析结果
+# kind: 'LPF'/'HPF'/'BPF'/'BSF'/'Unknown'；reference: 0dB参考增益（通带电平）
+# passband: (下限Hz, 上限Hz)，无界一侧为None；BSF的通带在两个转折频率之外，为(None, None)
+# corners: -3dB转折频率（Hz）元组；center/bandwidth/q: BPF/BSF的几何中心、-3dB带宽、品质因数
+# slope: (低频侧, 高频侧)滚降斜率（dB/十倍频），无法拟合为None
+FilterResult = namedtuple('FilterResult',
+                          'kind reference passband corners center bandwidth q slope points')
+
+
+def gain_from_record(data: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    扫频记录（ResponseStore结构化数组）→ (频率, 增益)
+    增益 = 输出电平(peak) / 输入电平(amp)；未记录输入电平时直接使用输出电平
+    Raises:
+        ValueError: 记录中没有输出电平（下位机不在频率命令后上报vp0，见config.SWEEP_LEVEL_ECHO）
+    """
+    freq = np.asarray(data['freq'], dtype=np.float64)
+    amp = np.asarray(data['amp'], dtype=np.float64)
+    peak = np.asarray(data['peak'], dtype=np.float64)
+    if len(peak) and not np.isfinite(peak).any():
+        raise ValueError("记录中没有输出电平（下位机未在频率命令后上报vp0）")
+    with np.errstate(divide='ignore', invalid='ignore'):
+        gain = np.where(np.isfinite(amp) & (amp > 0), peak / amp, peak)
+    return freq, gain
+
+
+def _prepare(freqs, gains) -> Tuple[np.ndarray, np.ndarray]:
+    """去掉无效点，按频率排序，重复频率取平均增益"""
+    freqs = np.asarray(freqs, dtype=np.float64).ravel()
+    gains = np.asarray(gains, dtype=np.float64).ravel()
+    if freqs.shape != gains.shape:
+        raise ValueError("频率与增益点数不一致")
+    valid = np.isfinite(freqs) & np.isfinite(gains) & (freqs > 0) & (gains >= 0)
+    freqs, inverse = np.unique(freqs[valid], return_inverse=True)
+    gains = np.bincount(inverse, weights=gains[valid]) / np.bincount(inverse)
+    return freqs, gains
+
+
+def _to_db(gains: np.ndarray) -> np.ndarray:
+    """增益 → 相对最大增益的dB（0增益按FLOOR_DB）"""
+    with np.errstate(divide='ignore'):
+        db = 20 * np.log10(gains / gains.max())
+    return np.maximum(db, FLOOR_DB)
+
+
+def _fit_slope(log_f: np.ndarray, db: np.ndarray, floor: float = FLOOR_DB) -> Optional[float]:
+    """最小二乘拟合 dB = a·log10(f) + b，返回a（dB/十倍频）；有效点（高于floor）不足3个或跨度不足0.1十倍频时返回None"""
+    valid = db > floor
+    if np.count_nonzero(valid) < 3:
+        return None
+    x = log_f[valid]
+    if x[-1] - x[0] < 0.1:
+        return None
+    return float(np.polyfit(x, db[valid], 1)[0])
+
+
+def _crossings(log_f: np.ndarray, rel: np.ndarray, level: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    rel穿过level的位置（对数频率线性插值）
+    Returns:
+        (频率Hz数组, 方向数组：+1上穿，-1下穿)
+    """
+    above = rel >= level
+    index = np.flatnonzero(above[1:] != above[:-1])
+    d0 = rel[index]
+    d1 = rel[index + 1]
+    t = (level - d0) / (d1 - d0)
+    freqs = 10 ** (log_f[index] + t * (log_f[index + 1] - log_f[index]))
+    return freqs, np.where(above[index + 1], 1, -1)
+
+
+def _edge_in_pass(level: float, slope: Optional[float], floor: float) -> bool:
+    """端点在通带内：接近最大增益，或高于读数精度且平坦（量化到同一读数的阻带不算平坦）"""
+    return level >= PASS_DB or (level > floor and slope is not None and abs(slope) < FLAT_SLOPE)
+
+
+def analyze(freqs, gains) -> FilterResult:
+    """
+    分析幅频响应
+    Args:
+        freqs: 频率（Hz）
+        gains: 线性增益（或固定输入时的输出电平），任意比例
+    Raises:
+        ValueError: 有效点少于2*EDGE_POINTS或增益全为0
+    """
+    freqs, gains = _prepare(freqs, gains)
+    if freqs.size < 2 * EDGE_POINTS:
+        raise ValueError(f"有效扫频点不足（{freqs.size}点）")
+    if not gains.max() > 0:
+        raise ValueError("增益全为0")
+    log_f = np.log10(freqs)
+    db = _to_db(gains)
+    floor = max(FLOOR_DB, float(db[gains > 0].min()) + RESOLUTION_MARGIN)
+
+    # 两端电平与局部斜率判断端点是否在通带内
+    low_level = float(db[:EDGE_POINTS].mean())
+    high_level = float(db[-EDGE_POINTS:].mean())
+    low_edge = log_f <= log_f[0] + EDGE_DECADES
+    high_edge = log_f >= log_f[-1] - EDGE_DECADES
+    low_pass = _edge_in_pass(low_level, _fit_slope(log_f[low_edge], db[low_edge], floor), floor)
+    high_pass = _edge_in_pass(high_level, _fit_slope(log_f[high_edge], db[high_edge], floor), floor)
+
+    if low_pass and high_pass:
+        reference = (low_level + high_level) / 2
+        kind = 'BSF' if db.min() - reference <= CORNER_DB else UNKNOWN
+    elif low_pass:
+        kind, reference = 'LPF', low_level
+    elif high_pass:
+        kind, reference = 'HPF', high_level
+    else:
+        kind, reference = 'BPF', 0.0
+
+    rel = db - reference
+    cross, direction = _crossings(log_f, rel, CORNER_DB)
+    falling = cross[direction < 0]
+    rising = cross[direction > 0]
+    corners = ()
+    passband = (None, None)
+    center = bandwidth = q = None
+    slope_low = slope_high = None
+
+    if kind == 'LPF' and falling.size:
+        corner = float(falling[0])
+        corners = (corner,)
+        passband = (None, corner)
+        beyond = freqs >= corner * ROLLOFF_START
+        slope_high = _fit_slope(log_f[beyond], db[beyond], floor)
+    elif kind == 'HPF' and rising.size:
+        corner = float(rising[-1])
+        corners = (corner,)
+        passband = (corner, None)
+        below = freqs <= corner / ROLLOFF_START
+        slope_low = _fit_slope(log_f[below], db[below], floor)
+    elif kind in ('BPF', 'BSF'):
+        # BPF: 峰值两侧的-3dB点；BSF: 谷底两侧的-3dB点
+        extreme = freqs[np.argmax(db) if kind == 'BPF' else np.argmin(db)]
+        lower = (rising if kind == 'BPF' else falling)
+        upper = (falling if kind == 'BPF' else rising)
+        lower = lower[lower <= extreme]
+        upper = upper[upper >= extreme]
+        if lower.size and upper.size:
+            f1, f2 = float(lower[-1]), float(upper[0])
+            corners = (f1, f2)
+            center = float(np.sqrt(f1 * f2))
+            bandwidth = f2 - f1
+            q = center / bandwidth if bandwidth > 0 else None
+            if kind == 'BPF':
+                passband = (f1, f2)
+                below = freqs <= f1 / ROLLOFF_START
+                beyond = freqs >= f2 * ROLLOFF_START
+                slope_low = _fit_slope(log_f[below], db[below], floor)
+                slope_high = _fit_slope(log_f[beyond], db[beyond], floor)
+
+    return FilterResult(
+        kind=kind,
+        reference=float(gains.max() * 10 ** (reference / 20)),
+        passband=passband,
+        corners=corners,
+        center=center,
+        bandwidth=bandwidth,
+        q=q,
+        slope=(slope_low, slope_high),
+        points=int(freqs.size),
+    )
+
+
+def board_kind(text: Optional[str]) -> Optional[str]:
+    """下位机判定："Filter Type : LPF" 或 'LPF' → 'LPF'，无结果返回None"""
+    return parse_result(text) or None if text else None
+
+
+def cross_check(result: FilterResult, board: Optional[str]) -> Optional[bool]:
+    """与下位机判定是否一致，下位机无结果时返回None"""
+    kind = board_kind(board)
+    if kind is None:
+        return None
+    return kind.upper() == result.kind.upper()
+
+
+def _hz(value: Optional[float]) -> str:
+    if value is None:
+        return '--'
+    if value >= 1e6:
+        return f"{value / 1e6:.3g} MHz"
+    if value >= 1e3:
+        return f"{value / 1e3:.4g} kHz"
+    return f"{value:.4g} Hz"
+
+
+def describe(result: FilterResult, board: Optional[str] = None) -> str:
+    """多行文字说明（Page 9结果区）"""
+    lines = [f"上位机识别：{result.kind}（{result.points}点）"]
+    if result.corners:
+        lines.append("-3dB转折：" + " / ".join(_hz(f) for f in result.corners))
+    if result.center is not None:
+        q = f"{result.q:.2f}" if result.q is not None else '--'
+        lines.append(f"中心 {_hz(result.center)}  带宽 {_hz(result.bandwidth)}  Q {q}")
+    slopes = [f"{side} {value:+.1f} dB/dec" for side, value in zip(('低频侧', '高频侧'), result.slope)
+              if value is not None]
+    if slopes:
+        lines.append("滚降：" + "  ".join(slopes))
+    agree = cross_check(result, board)
+    if agree is not None:
+        mark = '✓ 与下位机一致' if agree else f'✗ 下位机判定 {board_kind(board)}'
+        lines.append(mark)
+    return "\n".join(lines)
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""
+批量帧编码模块（NumPy向量化）
+一次性把频率/电压数组编码为连续的6字节命令缓冲区，字节布局与protocol.encode_*完全一致
+"""
+
+import numpy as np
+
+from protocol import (
+    CMD_AMP, CMD_FREQ_MODE1, CMD_FREQ_MODE2, CMD_PEAK, FRAME_SIZE
+)
+
+
+def _pack_frames(cmd_code: int, values: np.ndarray) -> np.ndarray:
+    """values(uint32) → (n, 6) uint8帧数组：命令码 + 4字节小端序 + 占位字节"""
+    frames = np.zeros((values.size, FRAME_SIZE), dtype=np.uint8)
+    frames[:, 0] = cmd_code
+    frames[:, 1:5] = values.astype('<u4').view(np.uint8).reshape(-1, 4)
+    return frames
+
+
+def freq_frames(freqs, mode: int = 2) -> np.ndarray:
+    """
+    频率数组 → (n, 6) uint8帧数组
+    Args:
+        freqs: 频率（Hz），整数数组
+        mode: 1=方式1(0xF2), 2=方式2(0x21)
+    """
+    values = np.asarray(freqs)
+    if values.dtype.kind == 'f':
+        values = values.astype(np.int64)    # 与int()一致：向零截断
+    values = values.ravel()
+    if values.size and (values.min() < 0 or values.max() > 0xFFFFFFFF):
+        raise ValueError("频率超出4字节无符号整数范围")
+    cmd_code = CMD_FREQ_MODE1 if mode == 1 else CMD_FREQ_MODE2
+    return _pack_frames(cmd_code, values)
+
+
+def voltage_frames(voltages, cmd_type: str = 'amp') -> np.ndarray:
+    """
+    电压数组 → (n, 6) uint8帧数组
+    Args:
+        voltages: 电压（V），×100后向零取整，取低3字节
+        cmd_type: 'amp'=幅值(0x22), 'peak'=峰值(0x23)
+    """
+    values = np.trunc(np.asarray(voltages, dtype=np.float64).ravel() * 100).astype(np.int64)
+    if values.size and (values.min() < 0 or values.max() > 0xFFFFFFFF):
+        raise ValueError("电压超出范围")
+    cmd_code = CMD_AMP if cmd_type == 'amp' else CMD_PEAK
+    return _pack_frames(cmd_code, values & 0xFFFFFF)
+
+
+def encode_freq_array(freqs, mode: int = 2) -> bytes:
+    """批量编码频率命令，返回连续的字节缓冲区（n×6字节）"""
+    return freq_frames(freqs, mode).tobytes()
+
+
+def encode_voltage_array(voltages, cmd_type: str = 'amp') -> bytes:
+    """批量编码幅值/峰值命令，返回连续的字节缓冲区（n×6字节）"""
+    return voltage_frames(voltages, cmd_type).tobytes()
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+反馈帧增量解析模块
+解析下位机反馈流（格式：控件名.属性="值"\xff\xff\xff），不依赖pyserial
+"""
+
+from typing import Iterator, Tuple
+
+
+TERMINATOR = b'\xff\xff\xff'
+
+
+class FrameParser:
+    """
+    增量式反馈帧解析器
+    - 内部使用bytearray缓冲，追加数据不产生新对象
+    - 记录上次搜索位置，结束符只搜索新到达的数据
+    - 已消费的数据通过读指针跳过，累计过半后才整体前移一次
+    """
+
+    def __init__(self, max_frame: int = 4096):
+        self.max_frame = max_frame     # 单帧最大长度，超出视为垃圾数据丢弃
+        self._buffer = bytearray()
+        self._start = 0                # 当前未消费数据的起始位置
+        self._scan = 0                 # 下次搜索结束符的起始位置
+        self.frames = 0                # 已解析的有效帧数
+        self.bytes = 0                 # 已输入的总字节数
+        self.dropped = 0               # 丢弃的无效帧/垃圾数据段数
+
+    def reset(self):
+        """清空缓冲区（保留统计计数）"""
+        self._buffer.clear()
+        self._start = 0
+        self._scan = 0
+
+    @property
+    def pending(self) -> int:
+        """缓冲区中尚未组成完整帧的字节数"""
+        return len(self._buffer) - self._start
+
+    def feed(self, data) -> Iterator[Tuple[str, str]]:
+        """
+        输入新接收的数据，返回解析出的(obj_attr, value)迭代器
+        数据在调用时立即入缓冲；未遍历完的帧会在下次feed时继续产出
+        """
+        self._buffer += data
+        self.bytes += len(data)
+        return self._drain()
+
+    def _drain(self) -> Iterator[Tuple[str, str]]:
+        """逐帧产出缓冲区中的完整反馈"""
+        buf = self._buffer
+        find = buf.find
+        while True:
+            end = find(TERMINATOR, self._scan)
+            if end < 0:
+                break
+            message = buf[self._start:end].decode('utf-8', errors='ignore')
+            self._start = self._scan = end + 3
+
+            obj_attr, sep, value = message.partition('=')
+            if not sep:
+                self.dropped += 1
+                continue
+            self.frames += 1
+            yield obj_attr.strip(), value.strip().strip('"')
+
+        self._compact()
+
+    def _compact(self):
+        """回收已消费空间，并处理超长的无结束符数据"""
+        buf = self._buffer
+        # 结束符可能跨越两次feed，保留末尾2字节重新搜索
+        self._scan = max(self._start, len(buf) - 2)
+
+        if len(buf) - self._start > self.max_frame:
+            # 超长无结束符：丢弃，仅保留可能是结束符开头的末尾0xFF字节
+            self.dropped += 1
+            keep = len(buf)
+            while keep > self._scan and buf[keep - 1] == 0xFF:
+                keep -= 1
+            self._start = self._scan = keep
+
+        if self._start == len(buf):
+            buf.clear()
+            self._start = self._scan = 0
+        elif self._start > 4096 and self._start * 2 > len(buf):
+            del buf[:self._start]
+            self._scan -= self._start
+            self._start = 0
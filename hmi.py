@@ -0,0 +1,382 @@
+# -*- coding: utf-8 -*-
+"""
+无界面命令行（不导入tkinter/ttkbootstrap）
+用于脚本化控制下位机，每个子命令只导入自己需要的模块
+
+用法:
+    python -m hmi --port /dev/ttyUSB0 set-freq 1000
+    python -m hmi set-amp 3.5
+    python -m hmi sweep --start 1000 --stop 100000 --step 100 -o sweep.npy
+    python -m hmi analyze sweep.npy --board LPF
+    python -m hmi model
+    python -m hmi monitor --duration 10
+    python -m hmi sequence soak.csv --repeat 100
+    cat commands.txt | python -m hmi run      # 从stdin读取命令流
+
+命令流（run）每行一条命令，#开头为注释:
+    freq 1000 | freq1 1000 | amp 3.5 | peak 2.0 | clear | model | start | sleep 0.1 | sync
+"""
+
+import argparse
+import math
+import sys
+import time
+
+from config import (
+    SERIAL_BAUDRATE, SERIAL_PORT, SERIAL_RX_MODE, SERIAL_TIMEOUT, SERIAL_TX_BURST,
+    SERIAL_TX_QUEUE_SIZE, SERIAL_TX_RATE_LIMIT, SWEEP_LEVEL_ECHO
+)
+
+
+def open_serial(args, tx_coalesce: bool = False, tx_rate_limit: float = SERIAL_TX_RATE_LIMIT):
+    """按命令行参数连接串口，失败时退出"""
+    from serial_comm import SerialComm
+    comm = SerialComm(
+        args.port, args.baud, SERIAL_TIMEOUT,
+        rx_mode=SERIAL_RX_MODE, tx_queue_size=SERIAL_TX_QUEUE_SIZE,
+        tx_coalesce=tx_coalesce, tx_rate_limit=tx_rate_limit, tx_burst=SERIAL_TX_BURST,
+        latency_timeout=args.timeout
+    )
+    if not comm.connect():
+        sys.exit(f"✗ 无法连接串口: {args.port}")
+    return comm
+
+
+def print_feedback(obj_attr, value):
+    sys.stdout.write(f'{obj_attr}="{value}"\n')
+    sys.stdout.flush()
+
+
+class FeedbackSync:
+    """
+    等待已写出命令的反馈全部到达
+    以SerialComm.latency中的待确认命令为准，因此被发送队列合并掉的命令不会被等待
+    """
+
+    def __init__(self, comm):
+        self.comm = comm
+        self._timeouts = comm.latency.total_timeouts()
+
+    def wait(self, timeout: float) -> bool:
+        """返回自上次wait()以来发出的命令是否都在timeout内收到反馈"""
+        deadline = time.monotonic() + timeout
+        writer = self.comm.tx_writer
+        if writer and not writer.flush(timeout):
+            return False
+        latency = self.comm.latency
+        while latency.pending_count() and time.monotonic() < deadline:
+            time.sleep(0.0005)
+        ok = not latency.pending_count()
+        timeouts = latency.total_timeouts()
+        ok = ok and timeouts == self._timeouts
+        self._timeouts = timeouts
+        return ok
+
+
+# ==================== 子命令 ====================
+
+def cmd_send(args, send) -> int:
+    """发送单条命令并等待反馈"""
+    comm = open_serial(args)
+    try:
+        comm.subscribe('*', print_feedback)
+        handle = send(comm)
+        if not handle:
+            return 1
+        if not args.no_wait and not handle.wait(args.timeout, args.retries):
+            print(f"✗ {args.timeout}s内未收到反馈（发送{handle.attempts}次）", file=sys.stderr)
+            return 1
+        return 0
+    finally:
+        comm.disconnect()
+
+
+def cmd_model(args) -> int:
+    """发送0xF0建模命令并等待result.txt"""
+    comm = open_serial(args)
+    try:
+        handle = comm.send_modeling_cmd()
+        if not handle:
+            return 1
+        if not handle.wait(args.timeout):
+            print(f"✗ {args.timeout}s内未收到建模结果", file=sys.stderr)
+            return 1
+        print(handle.value)
+        return 0
+    finally:
+        comm.disconnect()
+
+
+def cmd_sweep(args) -> int:
+    """上位机扫频（滑动窗口），可保存为.npy"""
+    from config import SWEEP_ACK_TIMEOUT, SWEEP_WINDOW
+    from protocol import TOPIC_PEAK
+    from response_store import ResponseStore
+    from sweep import SweepEngine, firmware_plan, linear_plan, log_plan
+
+    if args.firmware:
+        freqs = firmware_plan()
+    elif args.points:
+        freqs = log_plan(args.start, args.stop, args.points)
+    else:
+        freqs = linear_plan(args.start, args.stop, args.step)
+
+    comm = open_serial(args, tx_rate_limit=0)
+    store = ResponseStore(args.output)
+
+    if not args.level_echo:
+        print("注意: 现有固件只以f0.txt应答频率命令，峰值列为nan，记录不能用于analyze"
+              "（下位机/虚拟下位机--echo-response在f0后上报vp0时加--level-echo）", file=sys.stderr)
+
+    def on_point(freq, value, latency, levels=None):
+        # 幅值为当前输入电平（最近一次v0反馈），峰值为该频率点之后上报的vp0（不上报时为nan）
+        amp, peak = comm.device.amp, levels[TOPIC_PEAK] if levels else math.nan
+        store.append(freq, amp, peak)
+        if args.verbose_points:
+            print(f"{freq}\t{amp}\t{peak}\t{latency * 1000:.2f}ms")
+
+    engine = SweepEngine(comm, freqs, window=args.window or SWEEP_WINDOW,
+                         ack_timeout=SWEEP_ACK_TIMEOUT, on_point=on_point,
+                         level_topics=(TOPIC_PEAK,) if args.level_echo else ())
+    try:
+        engine.start()
+        while not engine.wait(1.0):
+            p = engine.progress()
+            print(f"\r{p['acked'] + p['timeouts']}/{p['total']}  {p['rate']:.0f}点/秒", end='',
+                  file=sys.stderr, flush=True)
+    except KeyboardInterrupt:
+        engine.stop()
+        engine.wait()
+    finally:
+        store.close()
+        comm.disconnect()
+    p = engine.progress()
+    print(f"\r✓ 扫频结束: 确认 {p['acked']}/{p['total']}点, 超时 {p['timeouts']}, "
+          f"用时 {p['elapsed']:.2f}s ({p['rate']:.0f}点/秒)", file=sys.stderr)
+    if args.output:
+        print(f"✓ 已保存 {len(store)}点 → {args.output}", file=sys.stderr)
+    return 0 if p['error'] is None else 1
+
+
+def cmd_analyze(args) -> int:
+    """分析扫频记录（.npy），识别滤波器类型（不连接串口）"""
+    from filter_analysis import analyze, cross_check, describe, gain_from_record
+    from response_store import ResponseStore
+    try:
+        result = analyze(*gain_from_record(ResponseStore.load(args.file)))
+    except (OSError, ValueError) as e:
+        sys.exit(f"✗ 无法分析: {e}")
+    print(describe(result, board=args.board))
+    return 1 if cross_check(result, args.board) is False else 0
+
+
+def cmd_monitor(args) -> int:
+    """打印收到的全部反馈（Ctrl+C或--duration结束）"""
+    comm = open_serial(args)
+    topic = args.topic or '*'
+    if args.timestamps:
+        start = time.perf_counter()
+        comm.subscribe(topic, lambda obj_attr, value: print_feedback(
+            f"{time.perf_counter() - start:10.6f}  {obj_attr}", value))
+    else:
+        comm.subscribe(topic, print_feedback)
+    try:
+        if args.duration:
+            time.sleep(args.duration)
+        else:
+            while True:
+                time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        comm.disconnect()
+    return 0
+
+
+def cmd_sequence(args) -> int:
+    """按绝对截止时间执行参数序列（CSV/JSON），结束后输出计划/实际时间偏差"""
+    from sequence import SequenceRunner, load_program
+    try:
+        steps, repeat = load_program(args.file)
+    except (OSError, ValueError) as e:
+        sys.exit(f"✗ 无法加载序列: {e}")
+    if args.repeat is not None:
+        repeat = args.repeat
+    comm = open_serial(args, tx_rate_limit=args.rate)
+    runner = SequenceRunner(comm, steps, repeat)
+    try:
+        runner.start()
+        while not runner.wait(1.0):
+            p = runner.progress()
+            print(f"→ 第{p['loop'] + 1}遍 第{p['index'] + 1}/{len(steps)}步, 已执行{p['steps_done']}步",
+                  file=sys.stderr)
+    except KeyboardInterrupt:
+        runner.stop()
+        runner.wait(1.0)
+    finally:
+        comm.disconnect()
+    print(f"✓ {runner.summary()}", file=sys.stderr)
+    r = runner.report()
+    return 1 if runner.error or r['send_failed'] or r['confirm_failed'] else 0
+
+
+def cmd_run(args) -> int:
+    """从stdin（或文件）读取命令流并发送"""
+    from protocol import FRAME_CLEAR_BUFF, FRAME_MODELING, FRAME_START, encode_freq, encode_voltage
+
+    encoders = {
+        'freq': lambda v: encode_freq(int(v), 2),
+        'freq1': lambda v: encode_freq(int(v), 1),
+        'amp': lambda v: encode_voltage(float(v), 'amp'),
+        'peak': lambda v: encode_voltage(float(v), 'peak'),
+    }
+    fixed = {'clear': FRAME_CLEAR_BUFF, 'model': FRAME_MODELING, 'start': FRAME_START}
+
+    try:
+        source = open(args.file, encoding='utf-8') if args.file != '-' else sys.stdin
+    except OSError as e:
+        sys.exit(f"✗ 无法打开命令文件: {e}")
+    comm = open_serial(args, tx_coalesce=args.coalesce, tx_rate_limit=args.rate)
+    if args.echo:
+        comm.subscribe('*', print_feedback)
+    sync = FeedbackSync(comm)
+    writer = comm.tx_writer
+    sent = errors = 0
+    start = time.perf_counter()
+    try:
+        for number, line in enumerate(source, 1):
+            parts = line.split('#', 1)[0].split()
+            if not parts:
+                continue
+            name = parts[0].lower()
+            try:
+                if name in encoders:
+                    frame = encoders[name](parts[1])
+                elif name in fixed:
+                    frame = fixed[name]
+                elif name == 'sleep':
+                    time.sleep(float(parts[1]))
+                    continue
+                elif name == 'sync':
+                    if not sync.wait(args.timeout):
+                        print(f"✗ 第{number}行 sync: {args.timeout}s内未收到全部反馈", file=sys.stderr)
+                        errors += 1
+                    continue
+                else:
+                    raise ValueError(f"未知命令: {name}")
+            except (IndexError, ValueError) as e:
+                print(f"✗ 第{number}行: {e}", file=sys.stderr)
+                errors += 1
+                continue
+            if writer and writer.depth >= writer.maxsize:
+                writer.flush(args.timeout)      # 队列满时等待写出（反压），不丢命令
+            if not comm.send_frame(frame, coalesce=args.coalesce):
+                errors += 1
+                continue
+            sent += 1
+            if args.wait and not sync.wait(args.timeout):
+                print(f"✗ 第{number}行: {args.timeout}s内未收到反馈", file=sys.stderr)
+                errors += 1
+        if writer:
+            writer.flush(args.timeout)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        comm.disconnect()
+        if source is not sys.stdin:
+            source.close()
+    elapsed = time.perf_counter() - start
+    print(f"✓ 已发送 {sent}条命令, 错误 {errors}, 用时 {elapsed:.3f}s", file=sys.stderr)
+    return 1 if errors else 0
+
+
+# ==================== 入口 ====================
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='python -m hmi', description="SA 串口上位机命令行（无界面）")
+    parser.add_argument('-p', '--port', default=SERIAL_PORT, help=f"串口号（默认{SERIAL_PORT}）")
+    parser.add_argument('-b', '--baud', type=int, default=SERIAL_BAUDRATE, help="波特率")
+    parser.add_argument('-t', '--timeout', type=float, help="等待反馈超时（秒，默认2，model默认30）")
+    parser.add_argument('-r', '--retries', type=int, default=0, help="未收到反馈时重发次数")
+    parser.add_argument('-v', '--verbose', action='count', default=0, help="-v=INFO日志, -vv=DEBUG（每帧）")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('set-freq', help="设置频率")
+    p.add_argument('freq', type=int, help="频率（Hz）")
+    p.add_argument('--mode', type=int, choices=(1, 2), default=2, help="1=0xF2, 2=0x21")
+    p.add_argument('--no-wait', action='store_true', help="不等待反馈")
+    p.set_defaults(func=lambda a: cmd_send(a, lambda c: c.send_freq_cmd(a.freq, a.mode)))
+
+    for name, cmd_type, text in (('set-amp', 'amp', "幅值"), ('set-peak', 'peak', "峰值")):
+        p = sub.add_parser(name, help=f"设置{text}")
+        p.add_argument('voltage', type=float, help=f"{text}（V）")
+        p.add_argument('--no-wait', action='store_true', help="不等待反馈")
+        p.set_defaults(func=lambda a, t=cmd_type: cmd_send(a, lambda c: c.send_voltage_cmd(a.voltage, t)))
+
+    p = sub.add_parser('clear', help="Clear Buff（恢复默认值）")
+    p.add_argument('--no-wait', action='store_true', help="不等待反馈")
+    p.set_defaults(func=lambda a: cmd_send(a, lambda c: c.send_clear_buff()))
+
+    p = sub.add_parser('start', help="启动探究装置（0xF1）")
+    p.set_defaults(func=lambda a: cmd_send(a, lambda c: c.send_start_cmd()), no_wait=True)
+
+    p = sub.add_parser('model', help="下位机建模（0xF0），输出识别结果")
+    p.set_defaults(func=cmd_model)
+
+    p = sub.add_parser('sweep', help="上位机扫频")
+    p.add_argument('--start', type=float, default=1000, help="起始频率（Hz）")
+    p.add_argument('--stop', type=float, default=100000, help="终止频率（Hz）")
+    p.add_argument('--step', type=float, default=100, help="线性步进（Hz）")
+    p.add_argument('--points', type=int, help="对数扫频点数（指定后忽略--step）")
+    p.add_argument('--firmware', action='store_true', help="使用下位机内置的分段扫频点")
+    p.add_argument('--window', type=int, help="最大在途命令数")
+    p.add_argument('-o', '--output', help="保存为.npy")
+    p.add_argument('--print', dest='verbose_points', action='store_true', help="打印每个测量点")
+    p.add_argument('--level-echo', action='store_true', default=SWEEP_LEVEL_ECHO,
+                   help="下位机在f0.txt之后上报vp0输出电平（记录峰值列，供analyze使用）")
+    p.set_defaults(func=cmd_sweep)
+
+    p = sub.add_parser('analyze', help="分析扫频记录，识别滤波器类型（不连接串口）")
+    p.add_argument('file', help="扫频记录（.npy）")
+    p.add_argument('--board', help="下位机判定（如LPF），不一致时返回1")
+    p.set_defaults(func=cmd_analyze)
+
+    p = sub.add_parser('monitor', help="打印收到的反馈")
+    p.add_argument('--topic', help="只显示该主题（如 f0.txt, f0.*）")
+    p.add_argument('--duration', type=float, help="监视时长（秒）")
+    p.add_argument('--timestamps', action='store_true', help="显示相对时间戳")
+    p.set_defaults(func=cmd_monitor)
+
+    p = sub.add_parser('sequence', help="执行参数序列（CSV/JSON，按绝对截止时间调度）")
+    p.add_argument('file', help="序列文件（.csv/.json）")
+    p.add_argument('--repeat', type=int, help="重复次数，0=无限循环（默认取JSON中的repeat或1）")
+    p.add_argument('--rate', type=float, default=0, help="每秒最多发送帧数，0=不限")
+    p.set_defaults(func=cmd_sequence)
+
+    p = sub.add_parser('run', help="执行命令流（stdin或文件）")
+    p.add_argument('file', nargs='?', default='-', help="命令文件，-=stdin")
+    p.add_argument('--wait', action='store_true', help="每条命令等待反馈后再发下一条")
+    p.add_argument('--echo', action='store_true', help="打印收到的反馈")
+    p.add_argument('--coalesce', action='store_true', help="排队时同类参数命令只发送最新值")
+    p.add_argument('--rate', type=float, default=SERIAL_TX_RATE_LIMIT, help="每秒最多发送帧数，0=不限")
+    p.set_defaults(func=cmd_run)
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.timeout is None:
+        args.timeout = 30.0 if args.command == 'model' else 2.0
+    if args.verbose:
+        from logger import setup_logging
+        setup_logging('DEBUG' if args.verbose > 1 else 'INFO', console=True)
+    try:
+        return args.func(args)
+    finally:
+        if args.verbose:
+            from logger import shutdown_logging
+            shutdown_logging()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
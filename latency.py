@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+"""
+命令→反馈延迟追踪模块
+每帧写出前记录 perf_counter_ns 时间戳，按命令码对应的反馈主题（0x21→f0.txt,
+0x22→v0.txt, 0x23→vp0.txt）与收到的反馈配对（反馈值与设置值一致，同command_handle），
+每个命令码保留最近window个延迟样本，超过timeout未收到反馈记为超时
+"""
+
+import bisect
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+from protocol import (
+    CMD_AMP, CMD_CLEAR_BUFF, CMD_FREQ_MODE1, CMD_FREQ_MODE2, CMD_PEAK, FRAME_SIZE,
+    RESPONSE_TOPICS, expected_feedback, find_feedback
+)
+
+
+OPCODE_NAMES = {
+    CMD_FREQ_MODE2: '频率',
+    CMD_FREQ_MODE1: '频率(方式1)',
+    CMD_AMP: '幅值',
+    CMD_PEAK: '峰值',
+    CMD_CLEAR_BUFF: 'Clear Buff',
+}
+
+# 直方图桶上界（毫秒），最后一个桶收集更大的值
+HISTOGRAM_EDGES_MS = (0.1, 0.2, 0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+
+def _percentile(sorted_values: List[float], p: float) -> float:
+    index = int(round(p / 100 * (len(sorted_values) - 1)))
+    return sorted_values[index]
+
+
+class LatencyTracer:
+    """
+    延迟追踪器（线程安全）
+    - stamp() 在发送线程中调用，data可以是多帧拼接
+    - observe() 在接收线程中对每条反馈调用，反馈丢失的命令记为超时
+    - stats()/histogram() 可在任意线程读取
+    Clear Buff 依次反馈 f0/v0/vp0，以最后一条（vp0）计延迟
+    """
+
+    def __init__(self, timeout: float = 1.0, window: int = 1000):
+        self.timeout_ns = int(timeout * 1e9)
+        self.window = window
+        self._lock = threading.Lock()
+        # 各反馈主题的待确认命令: (命令码, 发送时间ns, 是否计入延迟, 反馈应显示的数值或None)
+        self._pending: Dict[str, deque] = {}
+        self._samples: Dict[int, deque] = {}
+        self._counts: Dict[int, int] = {}
+        self._timeouts: Dict[int, int] = {}
+
+    def reset(self):
+        """清空待确认命令和统计（重新连接时调用）"""
+        with self._lock:
+            self._pending = {}
+            self._samples = {}
+            self._counts = {}
+            self._timeouts = {}
+
+    def stamp(self, data: bytes, t_ns: Optional[int] = None) -> list:
+        """记录写出的命令帧，返回登记记录（写出失败时交给cancel()）"""
+        if t_ns is None:
+            t_ns = time.perf_counter_ns()
+        stamped = []
+        with self._lock:
+            for i in range(0, len(data) - FRAME_SIZE + 1, FRAME_SIZE):
+                opcode = data[i]
+                topics = RESPONSE_TOPICS.get(opcode)
+                if not topics:
+                    continue
+                last = topics[-1]
+                expected = expected_feedback(data[i:i + FRAME_SIZE])
+                for topic in topics:
+                    pending = self._pending.get(topic)
+                    if pending is None:
+                        pending = self._pending[topic] = deque()
+                    entry = (opcode, t_ns, topic == last, expected)
+                    pending.append(entry)
+                    stamped.append((pending, entry))
+        return stamped
+
+    def cancel(self, stamped: list):
+        """撤销未能写出的帧的登记（不计超时）"""
+        with self._lock:
+            for pending, entry in stamped:
+                for i in range(len(pending) - 1, -1, -1):
+                    if pending[i] is entry:
+                        del pending[i]
+                        break
+
+    def observe(self, topic: str, value: Optional[str] = None, t_ns: Optional[int] = None):
+        """
+        收到反馈：与该主题中数值一致的最早一条待确认命令配对，更早的命令记为超时
+        value为None时不核对数值，与最早的一条配对
+        """
+        pending = self._pending.get(topic)
+        if not pending:
+            return      # 无待确认命令（主动上报或其他来源的反馈）
+        if t_ns is None:
+            t_ns = time.perf_counter_ns()
+        with self._lock:
+            self._expire_topic(pending, t_ns)
+            if not pending:
+                return
+            index = find_feedback((entry[3] for entry in pending), value) if value is not None else 0
+            if index < 0:
+                return      # 数值与待确认命令都不一致
+            for _ in range(index):
+                self._lost(pending.popleft())
+            opcode, sent_ns, record, _ = pending.popleft()
+            if not record:
+                return
+            samples = self._samples.get(opcode)
+            if samples is None:
+                samples = self._samples[opcode] = deque(maxlen=self.window)
+            samples.append((t_ns - sent_ns) / 1e6)
+            self._counts[opcode] = self._counts.get(opcode, 0) + 1
+
+    def _expire_topic(self, pending: deque, now_ns: int):
+        """丢弃超时的待确认命令（须持有锁）"""
+        deadline = now_ns - self.timeout_ns
+        while pending and pending[0][1] < deadline:
+            self._lost(pending.popleft())
+
+    def _lost(self, entry: tuple):
+        """未收到反馈的命令计为超时（须持有锁）"""
+        opcode, _, record, _ = entry
+        if record:
+            self._timeouts[opcode] = self._timeouts.get(opcode, 0) + 1
+
+    def _expire(self):
+        now_ns = time.perf_counter_ns()
+        for pending in self._pending.values():
+            self._expire_topic(pending, now_ns)
+
+    def pending_count(self) -> int:
+        """尚未收到反馈（且未超时）的反馈条数"""
+        with self._lock:
+            self._expire()
+            return sum(len(pending) for pending in self._pending.values())
+
+    def total_timeouts(self) -> int:
+        """累计超时命令数"""
+        with self._lock:
+            self._expire()
+            return sum(self._timeouts.values())
+
+    def stats(self) -> Dict[int, dict]:
+        """
+        各命令码的延迟统计
+        Returns:
+            {命令码: {'name', 'count', 'timeouts', 'pending', 'p50_ms', 'p99_ms', 'max_ms', 'last_ms'}}
+            无样本时各延迟值为None
+        """
+        with self._lock:
+            self._expire()
+            pending_counts: Dict[int, int] = {}
+            for topic, pending in self._pending.items():
+                for opcode, _, record, _ in pending:
+                    if record:
+                        pending_counts[opcode] = pending_counts.get(opcode, 0) + 1
+            opcodes = set(self._counts) | set(self._timeouts) | set(pending_counts)
+            snapshot = {op: list(self._samples.get(op, ())) for op in opcodes}
+            result = {}
+            for opcode in opcodes:
+                samples = snapshot[opcode]
+                ordered = sorted(samples)
+                result[opcode] = {
+                    'name': OPCODE_NAMES.get(opcode, f"0x{opcode:02X}"),
+                    'count': self._counts.get(opcode, 0),
+                    'timeouts': self._timeouts.get(opcode, 0),
+                    'pending': pending_counts.get(opcode, 0),
+                    'p50_ms': _percentile(ordered, 50) if ordered else None,
+                    'p99_ms': _percentile(ordered, 99) if ordered else None,
+                    'max_ms': ordered[-1] if ordered else None,
+                    'last_ms': samples[-1] if samples else None,
+                }
+        return result
+
+    def histogram(self, opcode: int) -> List[Tuple[float, int]]:
+        """
+        最近window个样本的直方图
+        Returns:
+            [(桶上界ms, 个数), ...]，最后一个桶上界为inf
+        """
+        with self._lock:
+            samples = list(self._samples.get(opcode, ()))
+        counts = [0] * (len(HISTOGRAM_EDGES_MS) + 1)
+        for value in samples:
+            counts[bisect.bisect_left(HISTOGRAM_EDGES_MS, value)] += 1
+        return list(zip(HISTOGRAM_EDGES_MS + (float('inf'),), counts))
+
+    def summary(self, opcodes) -> str:
+        """状态栏显示用的单行摘要"""
+        stats = self.stats()
+        parts = []
+        for opcode in opcodes:
+            item = stats.get(opcode)
+            if not item:
+                parts.append(f"{OPCODE_NAMES[opcode]} --")
+            elif item['p50_ms'] is None:
+                parts.append(f"{item['name']} 超时{item['timeouts']}")
+            else:
+                parts.append(f"{item['name']} p50 {item['p50_ms']:.1f}ms p99 {item['p99_ms']:.1f}ms "
+                             f"超时{item['timeouts']}")
+        return "反馈延迟  " + "  |  ".join(parts)
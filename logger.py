@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+"""
+日志模块
+- 各模块通过 get_logger() 获取 'hmi.*' 日志器，按级别过滤，未启用的级别不做任何格式化
+- 日志记录经队列交给后台线程格式化并写出（控制台 + 按大小滚动的日志文件），
+  收发线程只做一次入队
+- FrameRing 保存最近的收发帧原始内容，供"串口调试"页面查看
+"""
+
+import itertools
+import logging
+import os
+import queue
+import time
+from collections import deque
+from typing import List, Optional, Tuple
+
+LOG_NAME = 'hmi'
+
+# 帧方向
+TX = 'TX'
+RX = 'RX'
+
+_listener = None    # logging.handlers.QueueListener（setup_logging()时创建）
+
+
+def get_logger(name: str) -> logging.Logger:
+    """获取模块日志器（'hmi.<name>'）"""
+    return logging.getLogger(f"{LOG_NAME}.{name}")
+
+
+class Hex:
+    """延迟到格式化时才转换的十六进制显示，如 log.debug("HEX: %s", Hex(cmd))"""
+
+    __slots__ = ('data',)
+
+    def __init__(self, data: bytes):
+        self.data = data
+
+    def __str__(self) -> str:
+        return self.data.hex().upper()
+
+
+class _AsyncQueueHandler(logging.Handler):
+    """只把记录入队，不格式化（参数均为不可变值），格式化在后台线程完成"""
+
+    def __init__(self, log_queue):
+        super().__init__()
+        self.queue = log_queue
+
+    def emit(self, record):
+        self.queue.put_nowait(record)
+
+
+def setup_logging(level: str = 'INFO', path: Optional[str] = None, max_bytes: int = 1024 * 1024,
+                  backup_count: int = 3, console: bool = True):
+    """
+    配置日志（程序启动时调用一次，重复调用会先关闭之前的配置）
+    Args:
+        level: 'DEBUG'时记录每一帧收发，'INFO'只记录连接/状态，'WARNING'只记录错误
+        path: 日志文件路径，None=不写文件
+        max_bytes/backup_count: 单个日志文件大小上限和保留的历史文件数
+        console: 是否输出到控制台
+    """
+    import logging.handlers     # 仅在配置日志时需要（无界面命令行不导入）
+    global _listener
+    shutdown_logging()
+    handlers = []
+    if console:
+        stream = logging.StreamHandler()
+        stream.setFormatter(logging.Formatter('%(message)s'))
+        handlers.append(stream)
+    if path:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        rotating = logging.handlers.RotatingFileHandler(
+            path, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8', delay=True
+        )
+        rotating.setFormatter(logging.Formatter('%(asctime)s %(levelname)-7s %(name)s: %(message)s'))
+        handlers.append(rotating)
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger(LOG_NAME)
+    root.handlers = [_AsyncQueueHandler(log_queue)]
+    root.propagate = False
+    set_level(level)
+    _listener = logging.handlers.QueueListener(log_queue, *handlers)
+    _listener.start()
+
+
+def set_level(level: str):
+    """运行时修改日志级别"""
+    logging.getLogger(LOG_NAME).setLevel(level)
+
+
+def get_level() -> str:
+    return logging.getLevelName(logging.getLogger(LOG_NAME).level)
+
+
+def shutdown_logging():
+    """写出队列中剩余的日志并停止后台线程"""
+    global _listener
+    if _listener:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+class FrameRing:
+    """
+    最近收发帧的环形缓冲
+    append() 只做一次deque追加（无锁、不格式化），可在收发线程中调用；
+    since() 取出序号之后的新条目，由界面线程格式化显示
+    """
+
+    def __init__(self, size: int = 2000):
+        self._entries = deque(maxlen=size)
+        self._seq = itertools.count(1)
+
+    def append(self, direction: str, payload):
+        """
+        Args:
+            direction: TX / RX
+            payload: TX为已写出的字节，RX为 (控件属性, 值)
+        """
+        self._entries.append((next(self._seq), time.time(), direction, payload))
+
+    def since(self, seq: int = 0) -> List[Tuple[int, float, str, object]]:
+        """序号大于seq的条目（按时间顺序）"""
+        entries = list(self._entries)
+        if not entries or entries[-1][0] <= seq:
+            return []
+        # 从尾部向前找起点，通常只有少量新条目
+        start = len(entries)
+        while start > 0 and entries[start - 1][0] > seq:
+            start -= 1
+        return entries[start:]
+
+    def clear(self):
+        self._entries.clear()
+
+    @staticmethod
+    def format(entry) -> str:
+        """格式化单条记录: 时间 方向 内容"""
+        _, t, direction, payload = entry
+        stamp = time.strftime('%H:%M:%S', time.localtime(t)) + f".{int(t * 1000) % 1000:03d}"
+        if direction == TX:
+            text = payload.hex(' ').upper()
+        else:
+            text = f'{payload[0]}="{payload[1]}"'
+        return f"{stamp}  {'→' if direction == TX else '←'} {direction}  {text}"
@@ -4,18 +4,60 @@ SA 串口上位机主程序
 基于HMI设计文档的Python实现
 """
 
+import time
+_T0 = time.perf_counter()  # 启动计时起点（其余导入之前）
+
+import importlib
+import json
+import os
+import sys
+import threading
 import tkinter as tk
 from tkinter import messagebox
 import ttkbootstrap as ttk
-from ttkbootstrap.constants import *
-import sys
 
 from config import *
-from serial_comm import SerialComm
-from ui_main_menu import MainMenu
-from ui_dual_param import DualParamControl
-from ui_triple_param import TripleParamControl
-from ui_modeling import SystemModeling
+from tk_bridge import TkBridge
+from logger import get_logger, setup_logging, shutdown_logging
+
+log = get_logger('main')
+
+# 页面号 -> (模块, 类名)，首次导航到该页面时才导入模块并创建页面
+PAGES = {
+    0: ('ui_main_menu', 'MainMenu'),
+    7: ('ui_dual_param', 'DualParamControl'),
+    8: ('ui_triple_param', 'TripleParamControl'),
+    9: ('ui_modeling', 'SystemModeling'),
+    10: ('ui_debug', 'SerialDebugView'),
+}
+
+
+class StartupTimer:
+    """启动耗时记录：各阶段距进程启动（_T0）的毫秒数"""
+    
+    def __init__(self):
+        self.marks = {}
+    
+    def mark(self, name: str):
+        self.marks[name] = round((time.perf_counter() - _T0) * 1000, 1)
+    
+    def report(self):
+        """输出启动报告，并追加到STARTUP_REPORT文件（JSON Lines）"""
+        log.info("✓ 启动耗时(ms): %s", ", ".join(f"{k} {v}" for k, v in self.marks.items()))
+        if not STARTUP_REPORT:
+            return
+        try:
+            directory = os.path.dirname(STARTUP_REPORT)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(STARTUP_REPORT, 'a', encoding='utf-8') as f:
+                f.write(json.dumps({'time': time.strftime('%Y-%m-%dT%H:%M:%S'), **self.marks}) + '\n')
+        except OSError as e:
+            log.warning("✗ 无法写入启动报告: %s", e)
+
+
+startup = StartupTimer()
+startup.mark('imports')
 
 
 class HMIApplication:
@@ -28,7 +70,13 @@ class HMIApplication:
         self.root.resizable(False, False)  # 固定窗口大小
         
         # 串口通信对象
-        self.serial_comm: SerialComm = None
+        self.serial_comm = None  # serial_comm.SerialComm（连接时才导入）
+        self.simulator = None  # 虚拟下位机（模拟模式）
+        self.supervisor = None  # 连接监督（断线自动重连）
+        
+        # 接收线程 → Tk主循环的更新桥（按固定节拍合并刷新）
+        self.bridge = TkBridge(self.root, interval_ms=UI_REFRESH_MS)
+        self.bridge.start()
         
         # 页面容器
         self.pages = {}
@@ -58,6 +106,7 @@ class HMIApplication:
         page_menu.add_command(label="双参数控制 (Page 7)", command=lambda: self.navigate(7))
         page_menu.add_command(label="三参数控制 (Page 8)", command=lambda: self.navigate(8))
         page_menu.add_command(label="系统建模 (Page 9)", command=lambda: self.navigate(9))
+        page_menu.add_command(label="串口调试 (Page 10)", command=lambda: self.navigate(10))
         
         # 帮助菜单
         help_menu = tk.Menu(menubar, tearoff=0)
@@ -70,8 +119,7 @@ class HMIApplication:
         self.container = tk.Frame(self.root)
         self.container.pack(fill=tk.BOTH, expand=True)
         
-        # 创建所有页面（延迟到串口连接后）
-        # 这样可以确保串口对象已经初始化
+        # 页面在串口连接后、首次导航到时才创建（见navigate）
         pass
     
     def show_connection_dialog(self):
@@ -104,28 +152,34 @@ class HMIApplication:
         settings_frame = tk.Frame(frame)
         settings_frame.pack(pady=10)
         
-        # 自动检测可用串口
-        import serial.tools.list_ports
-        available_ports = [port.device for port in serial.tools.list_ports.comports()]
-        
         tk.Label(settings_frame, text="串口号:", font=FONT_LABEL).grid(row=0, column=0, sticky='e', padx=5, pady=5)
-        port_var = tk.StringVar(value=available_ports[0] if available_ports else SERIAL_PORT)
+        port_var = tk.StringVar(value=SERIAL_PORT)
         port_combo = ttk.Combobox(
             settings_frame,
             textvariable=port_var,
-            values=available_ports if available_ports else [SERIAL_PORT],
+            values=[SERIAL_PORT],
             font=FONT_LABEL,
-            width=20,
-            state='readonly' if available_ports else 'normal'
+            width=20
         )
         port_combo.grid(row=0, column=1, padx=5, pady=5)
         
-        # 刷新按钮
-        def refresh_ports():
-            ports = [port.device for port in serial.tools.list_ports.comports()]
-            port_combo['values'] = ports if ports else [SERIAL_PORT]
+        def show_ports(ports):
+            """串口检测结果（Tk线程）"""
+            if not dialog.winfo_exists():
+                return
+            port_combo.config(values=ports if ports else [SERIAL_PORT],
+                              state='readonly' if ports else 'normal')
             if ports:
                 port_var.set(ports[0])
+            tip_label.config(
+                text=f"检测到 {len(ports)} 个串口" if ports else "未检测到串口，请检查设备连接",
+                fg='#4CAF50' if ports else '#F44336'
+            )
+        
+        # 自动检测可用串口（后台线程，结果经更新桥送回Tk线程）
+        def refresh_ports():
+            tip_label.config(text="正在检测串口...", fg=COLOR_TEXT)
+            self.enumerate_ports(lambda ports: self.bridge.post('ports', show_ports, ports))
         
         ttk.Button(
             settings_frame,
@@ -139,23 +193,63 @@ class HMIApplication:
         baud_combo = ttk.Combobox(
             settings_frame,
             textvariable=baud_var,
-            values=[9600, 19200, 38400, 57600, 115200, 230400],
+            values=list(SERIAL_BAUD_RATES),
             font=FONT_LABEL,
             width=20,
             state='readonly'
         )
         baud_combo.grid(row=1, column=1, padx=5, pady=5)
         
+        def show_baud_progress(text, color):
+            """波特率检测进度（Tk线程）"""
+            if dialog.winfo_exists():
+                tip_label.config(text=text, fg=color)
+        
+        def show_baud(baudrate):
+            """波特率检测结果（Tk线程）"""
+            if not dialog.winfo_exists():
+                return
+            detect_btn.config(state='normal')
+            if baudrate:
+                baud_var.set(baudrate)
+                tip_label.config(text=f"✓ 检测到波特率 {baudrate}bps", fg='#4CAF50')
+            else:
+                tip_label.config(text="✗ 未检测到下位机，请检查串口号和设备连接", fg='#F44336')
+        
+        def detect_baud():
+            """后台线程依次以候选波特率发送Clear Buff探测下位机"""
+            port = port_var.get()
+            if not port:
+                messagebox.showerror("错误", "请输入串口号")
+                return
+            detect_btn.config(state='disabled')
+            
+            def progress(baudrate, ok):
+                self.bridge.post('baud_progress', show_baud_progress,
+                                 f"正在检测波特率... {baudrate}bps {'✓' if ok else '✗'}", COLOR_TEXT)
+            
+            def worker():
+                from baud_detect import detect_baud as detect
+                self.bridge.post('baud', show_baud, detect(port, progress=progress))
+            threading.Thread(target=worker, daemon=True).start()
+        
+        detect_btn = ttk.Button(
+            settings_frame,
+            text="自动检测",
+            command=detect_baud,
+            width=8
+        )
+        detect_btn.grid(row=1, column=2, padx=5, pady=5)
+        
         # 提示信息
-        tip_text = f"检测到 {len(available_ports)} 个串口" if available_ports else "未检测到串口，请检查设备连接"
         tip_label = tk.Label(
             frame,
-            text=tip_text,
+            text="",
             font=FONT_STATUS,
-            fg='#4CAF50' if available_ports else '#F44336',
             justify=tk.LEFT
         )
         tip_label.pack(pady=5)
+        refresh_ports()
         
         # 按钮
         btn_frame = tk.Frame(frame)
@@ -170,10 +264,21 @@ class HMIApplication:
                 return
             
             # 创建串口对象并连接
-            self.serial_comm = SerialComm(port, baud, SERIAL_TIMEOUT)
+            from serial_comm import SerialComm
+            self.serial_comm = SerialComm(
+                port, baud, SERIAL_TIMEOUT,
+                rx_mode=SERIAL_RX_MODE, tx_queue_size=SERIAL_TX_QUEUE_SIZE,
+                tx_coalesce=SERIAL_TX_COALESCE, tx_rate_limit=SERIAL_TX_RATE_LIMIT,
+                tx_burst=SERIAL_TX_BURST, latency_timeout=SERIAL_LATENCY_TIMEOUT,
+                frame_ring_size=FRAME_RING_SIZE
+            )
+            # 虚拟下位机以echo_response启动，频率命令后上报vp0
+            self.serial_comm.level_echo = SWEEP_LEVEL_ECHO or bool(
+                self.simulator and self.simulator.port == port)
             if self.serial_comm.connect():
                 messagebox.showinfo("成功", f"串口连接成功\n{port} @ {baud}bps")
                 dialog.destroy()
+                self.start_supervisor()
                 self.create_pages()
                 self.navigate(0)
             else:
@@ -187,49 +292,136 @@ class HMIApplication:
                 self.create_pages()
                 self.navigate(0)
         
+        def on_simulate():
+            """启动虚拟下位机并连接（无硬件调试）"""
+            from simulator import FilterModel, LowerMachineSimulator
+            self.stop_simulator()
+            self.simulator = LowerMachineSimulator(
+                delay=SIMULATOR_DELAY,
+                jitter=SIMULATOR_JITTER,
+                filter_model=FilterModel(SIMULATOR_FILTER, SIMULATOR_FC),
+                echo_response=True
+            )
+            port_var.set(self.simulator.start())
+            on_connect()
+        
         ttk.Button(
             btn_frame,
             text="连接",
             command=on_connect,
             width=12
-        ).pack(side=tk.LEFT, padx=10)
+        ).pack(side=tk.LEFT, padx=6)
+        
+        if os.name == 'posix':
+            ttk.Button(
+                btn_frame,
+                text="模拟下位机",
+                command=on_simulate,
+                width=12
+            ).pack(side=tk.LEFT, padx=6)
         
         ttk.Button(
             btn_frame,
             text="跳过（离线）",
             command=on_skip,
             width=12
-        ).pack(side=tk.LEFT, padx=10)
+        ).pack(side=tk.LEFT, padx=6)
         
+    def enumerate_ports(self, callback):
+        """在后台线程中枚举串口，完成后调用callback(设备列表)（在后台线程中）"""
+        def worker():
+            import serial.tools.list_ports
+            t0 = time.perf_counter()
+            try:
+                ports = [port.device for port in serial.tools.list_ports.comports()]
+            except Exception as e:
+                log.error("✗ 串口检测失败: %s", e)
+                ports = []
+            log.info("✓ 串口检测: %d个 (%.0fms)", len(ports), (time.perf_counter() - t0) * 1000)
+            callback(ports)
+        threading.Thread(target=worker, daemon=True).start()
+    
     def create_pages(self):
-        """创建所有页面"""
-        self.pages[0] = MainMenu(self.container, self.navigate)
-        self.pages[7] = DualParamControl(self.container, self.serial_comm, self.navigate)
-        self.pages[8] = TripleParamControl(self.container, self.serial_comm, self.navigate)
-        self.pages[9] = SystemModeling(self.container, self.serial_comm, self.navigate)
+        """清空页面缓存（页面在首次导航时按新的串口对象创建）"""
+        for page in self.pages.values():
+            page.destroy()
+        self.pages = {}
+        self.current_page = None
+    
+    def build_page(self, page_num: int):
+        """导入页面模块并创建页面"""
+        t0 = time.perf_counter()
+        module_name, class_name = PAGES[page_num]
+        page_class = getattr(importlib.import_module(module_name), class_name)
+        if page_num == 0:
+            page = page_class(self.container, self.navigate)
+        elif page_num == 10:
+            page = page_class(self.container, self.serial_comm, self.navigate)
+        else:
+            page = page_class(self.container, self.serial_comm, self.navigate, self.bridge)
+        log.info("✓ 创建 Page %s (%.0fms)", page_num, (time.perf_counter() - t0) * 1000)
+        return page
     
     def navigate(self, page_num: int):
-        """导航到指定页面"""
-        if page_num not in self.pages:
+        """导航到指定页面（首次访问时创建，之后复用）"""
+        if page_num not in PAGES:
             messagebox.showerror("错误", f"页面 {page_num} 不存在")
             return
+        if not self.container.winfo_exists():
+            return
+        page = self.pages.get(page_num)
+        if page is None:
+            page = self.pages[page_num] = self.build_page(page_num)
         
         # 隐藏当前页面
         if self.current_page is not None:
             self.current_page.pack_forget()
         
         # 显示新页面
-        self.current_page = self.pages[page_num]
+        self.current_page = page
         self.current_page.pack(fill=tk.BOTH, expand=True)
         
-        print(f"✓ 导航到 Page {page_num}")
+        log.info("✓ 导航到 Page %s", page_num)
+    
+    def start_supervisor(self):
+        """监督当前串口：断线后自动重连，连接状态显示在窗口标题"""
+        self.show_link_state('connected', self.serial_comm.port)
+        if not SERIAL_AUTO_RECONNECT:
+            return
+        from supervisor import ConnectionSupervisor
+        self.supervisor = ConnectionSupervisor(
+            self.serial_comm,
+            on_state=lambda state, port: self.bridge.post('link', self.show_link_state, state, port),
+            backoff_initial=SERIAL_RECONNECT_INITIAL,
+            backoff_max=SERIAL_RECONNECT_MAX
+        )
+        self.supervisor.start()
+    
+    def stop_supervisor(self):
+        if self.supervisor:
+            self.supervisor.stop()
+            self.supervisor = None
+    
+    def show_link_state(self, state: str, port: str):
+        """在窗口标题显示连接状态（Tk线程）"""
+        from supervisor import STATE_TEXT
+        self.root.title(f"{WINDOW_TITLE} - {port} {STATE_TEXT.get(state, state)}")
     
     def reconnect_serial(self):
         """重新连接串口"""
+        self.stop_supervisor()
         if self.serial_comm:
             self.serial_comm.disconnect()
+        self.stop_simulator()
+        self.root.title(WINDOW_TITLE)
         self.show_connection_dialog()
     
+    def stop_simulator(self):
+        """停止虚拟下位机"""
+        if self.simulator:
+            self.simulator.stop()
+            self.simulator = None
+    
     def show_about(self):
         """显示关于对话框"""
         about_text = """
@@ -277,19 +469,35 @@ f0.txt="1000 Hz"\\xff\\xff\\xff
     def on_close(self):
         """关闭应用程序"""
         if messagebox.askokcancel("退出", "确定要退出程序吗？"):
+            self.stop_supervisor()
             if self.serial_comm:
                 self.serial_comm.disconnect()
+            self.stop_simulator()
+            self.bridge.stop()
             self.root.destroy()
+            shutdown_logging()
 
 
 def main():
     """主函数"""
+    setup_logging(LOG_LEVEL, LOG_FILE, LOG_MAX_BYTES, LOG_BACKUP_COUNT, LOG_CONSOLE)
+    startup.mark('logging')
+    
     # 使用 ttkbootstrap 创建主题化窗口
     root = ttk.Window(
         themename="flatly",  # 使用 flatly 主题（现代、简洁）
         # 其他可选主题: cosmo, litera, minty, pulse, sandstone, yeti, darkly, superhero
     )
+    startup.mark('window')
     app = HMIApplication(root)
+    startup.mark('app_init')
+    
+    def on_first_paint():
+        """主循环处理完首批绘制事件后输出启动报告"""
+        root.update_idletasks()
+        startup.mark('first_paint')
+        startup.report()
+    root.after_idle(on_first_paint)
     
     # 绑定关闭事件
     root.protocol("WM_DELETE_WINDOW", app.on_close)
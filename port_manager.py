@@ -0,0 +1,253 @@
+# -*- coding: utf-8 -*-
+"""
+多串口管理模块
+一台上位机连接多块下位机时，所有串口的接收由同一个selector I/O线程完成，
+每个串口仍有独立的SerialComm（解析器、分发器、发送队列），按名称访问：
+
+    manager = PortManager()
+    manager.add('board1', '/dev/ttyUSB0')
+    manager.add('board2', '/dev/ttyUSB1')
+    manager.connect_all()
+    manager['board1'].send_freq_cmd(1000)
+    manager.subscribe('board2', 'f0.txt', callback)
+    manager.supervise('board1')     # 可选：断线自动重连
+
+空闲时I/O线程阻塞在select上，不随串口数量增加CPU占用。
+Windows的串口句柄不能用select等待，此时各串口退回各自的事件模式接收线程。
+"""
+
+import os
+import selectors
+import threading
+from typing import Callable, Dict, List, Optional
+
+from logger import get_logger
+from serial_comm import SerialComm
+from supervisor import ConnectionSupervisor
+
+log = get_logger('ports')
+
+# Windows串口不支持select
+SELECTABLE = os.name == 'posix'
+
+
+class PortManager:
+    """按名称管理多个SerialComm，接收由单个selector线程完成"""
+
+    def __init__(self, read_size: int = 4096):
+        self.read_size = read_size
+        self._ports: Dict[str, SerialComm] = {}
+        self._lock = threading.Lock()
+        self._selector: Optional[selectors.BaseSelector] = None
+        self._wake_r: Optional[int] = None
+        self._wake_w: Optional[int] = None
+        self._pending_ops: List[tuple] = []     # 待I/O线程执行的 ('register'|'unregister', 名称, SerialComm)
+        self._thread: Optional[threading.Thread] = None
+        self.running = False
+        # 统计
+        self.wakeups = 0        # select返回次数
+        self.reads = 0          # os.read次数
+
+    # ==================== 串口管理 ====================
+
+    def add(self, name: str, port: str, baudrate: int = 115200, timeout: float = 1.0, **kwargs) -> SerialComm:
+        """
+        添加串口（不连接）
+        Args:
+            name: 板名称，用于后续访问
+            kwargs: 其余SerialComm参数（tx_queue_size等）
+        """
+        with self._lock:
+            if name in self._ports:
+                raise ValueError(f"名称已存在: {name}")
+            comm = SerialComm(port, baudrate, timeout,
+                              rx_mode='external' if SELECTABLE else 'event', **kwargs)
+            self._ports[name] = comm
+        return comm
+
+    def add_boards(self, boards: Dict[str, str], **kwargs):
+        """批量添加 {名称: 串口号}（如config.BOARDS）"""
+        for name, port in boards.items():
+            self.add(name, port, **kwargs)
+
+    def remove(self, name: str):
+        """断开并移除串口"""
+        self.disconnect(name)
+        with self._lock:
+            self._ports.pop(name, None)
+
+    def __getitem__(self, name: str) -> SerialComm:
+        return self._ports[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._ports
+
+    def get(self, name: str) -> Optional[SerialComm]:
+        return self._ports.get(name)
+
+    def names(self) -> List[str]:
+        return list(self._ports)
+
+    def subscribe(self, name: str, topic: str, callback: Callable) -> Callable:
+        """订阅指定板的反馈，callback(obj_attr, value)在I/O线程中调用"""
+        return self._ports[name].subscribe(topic, callback)
+
+    # ==================== 连接 ====================
+
+    def connect(self, name: str) -> bool:
+        """连接指定板，并把串口交给I/O线程"""
+        comm = self._ports[name]
+        if comm.is_connected:
+            return True
+        if not comm.connect():
+            return False
+        if SELECTABLE:
+            self.start()
+            self._request('register', name, comm)
+        return True
+
+    def connect_all(self) -> Dict[str, bool]:
+        """连接全部串口，返回 {名称: 是否成功}"""
+        return {name: self.connect(name) for name in self.names()}
+
+    def supervise(self, name: str, **kwargs) -> ConnectionSupervisor:
+        """
+        为指定板创建连接监督（断线后自动重连，并重新交给I/O线程），返回已启动的ConnectionSupervisor
+        kwargs: 其余ConnectionSupervisor参数（on_state等）
+        """
+        supervisor = ConnectionSupervisor(self._ports[name], connect=lambda: self.connect(name), **kwargs)
+        supervisor.start()
+        return supervisor
+
+    def disconnect(self, name: str):
+        """断开指定板"""
+        comm = self._ports.get(name)
+        if comm is None or not comm.is_connected:
+            return
+        if SELECTABLE and self.running:
+            done = threading.Event()
+            self._request('unregister', name, comm, done)
+            if threading.current_thread() is not self._thread:
+                done.wait(1.0)
+        comm.disconnect()
+
+    def disconnect_all(self):
+        for name in self.names():
+            self.disconnect(name)
+
+    def close(self):
+        """断开全部串口并停止I/O线程"""
+        self.disconnect_all()
+        self.stop()
+
+    def stats(self) -> Dict[str, dict]:
+        """各串口的接收统计"""
+        result = {}
+        for name, comm in list(self._ports.items()):
+            result[name] = {
+                'port': comm.port,
+                'connected': comm.is_connected,
+                'bytes': comm.parser.bytes,
+                'frames': comm.parser.frames,
+                'dropped': comm.parser.dropped,
+            }
+        return result
+
+    # ==================== I/O线程 ====================
+
+    def start(self):
+        """启动I/O线程（connect()时自动启动）"""
+        if self.running or not SELECTABLE:
+            return
+        self._selector = selectors.DefaultSelector()
+        self._wake_r, self._wake_w = os.pipe()
+        os.set_blocking(self._wake_r, False)
+        self._selector.register(self._wake_r, selectors.EVENT_READ, None)
+        self.running = True
+        self._thread = threading.Thread(target=self._io_loop, daemon=True, name='PortManager')
+        self._thread.start()
+
+    def stop(self):
+        """停止I/O线程"""
+        if not self.running:
+            return
+        self.running = False
+        os.write(self._wake_w, b'x')
+        if self._thread is not threading.current_thread():
+            self._thread.join(1.0)
+        self._selector.close()
+        os.close(self._wake_r)
+        os.close(self._wake_w)
+        self._selector = None
+        self._thread = None
+
+    def _request(self, op: str, name: str, comm: SerialComm, done: Optional[threading.Event] = None):
+        """把注册/注销操作交给I/O线程执行（selector不是线程安全的）"""
+        with self._lock:
+            self._pending_ops.append((op, name, comm, done))
+        if threading.current_thread() is self._thread:
+            self._apply_ops()
+        else:
+            os.write(self._wake_w, b'x')
+
+    def _apply_ops(self):
+        with self._lock:
+            ops, self._pending_ops = self._pending_ops, []
+        for op, name, comm, done in ops:
+            try:
+                if op == 'register':
+                    self._register(name, comm)
+                else:
+                    self._unregister(comm)
+            except (OSError, ValueError, KeyError) as e:
+                # 排队后串口已被关闭等：放弃该操作（异常不能让I/O线程退出）
+                log.error("✗ 串口%s失败 [%s]: %s", '注册' if op == 'register' else '注销', name, e)
+            finally:
+                if done:
+                    done.set()
+
+    def _register(self, name: str, comm: SerialComm):
+        serial_port = comm.serial
+        if comm.is_connected and serial_port and serial_port.is_open:
+            self._selector.register(serial_port.fileno(), selectors.EVENT_READ, (name, comm))
+
+    def _unregister(self, comm: SerialComm):
+        """按SerialComm注销（串口可能已关闭，不能再取fileno）"""
+        for key in list(self._selector.get_map().values()):
+            if key.data is not None and key.data[1] is comm:
+                self._selector.unregister(key.fileobj)
+
+    def _io_loop(self):
+        """I/O线程：等待任一串口可读，读出全部可用数据交给对应SerialComm解析分发"""
+        selector = self._selector
+        read_size = self.read_size
+        while self.running:
+            events = selector.select()
+            self.wakeups += 1
+            for key, _ in events:
+                if key.data is None:
+                    # 唤醒管道：处理注册/注销
+                    try:
+                        os.read(self._wake_r, 4096)
+                    except BlockingIOError:
+                        pass
+                    self._apply_ops()
+                    continue
+                name, comm = key.data
+                error = None
+                try:
+                    data = os.read(key.fd, read_size)
+                except BlockingIOError:
+                    continue
+                except OSError as e:
+                    data = b''
+                    error = e
+                    log.error("✗ 串口读取失败 [%s]: %s", name, e)
+                self.reads += 1
+                if not data:
+                    # 设备已断开（如USB串口被拔出）：与自带接收线程时一样经on_link_lost通知监督
+                    log.error("✗ 串口已断开 [%s]", name)
+                    selector.unregister(key.fd)
+                    comm.link_lost(error or OSError(f"串口已断开: {comm.port}"))
+                    continue
+                comm.feed(data)
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""
+下位机协议常量与单帧编码
+命令固定6字节，首字节为命令码，参数为小端序
+"""
+
+import struct
+from typing import Iterable, Optional
+
+# 命令码
+CMD_FREQ_MODE1 = 0xF2   # 频率设置（方式1）
+CMD_FREQ_MODE2 = 0x21   # 频率设置（方式2）
+CMD_AMP = 0x22          # 幅值设置
+CMD_PEAK = 0x23         # 峰值设置
+CMD_CLEAR_BUFF = 0x01   # Clear Buff（恢复默认值）
+CMD_MODELING = 0xF0     # 建模（一键学习）
+CMD_START = 0xF1        # 启动探究装置
+
+FRAME_SIZE = 6
+
+# 参数设置类命令：后发的同类命令完全覆盖先发的，排队时只需发送最新一条
+# Clear Buff / 建模 / 启动 为动作命令，不能合并
+COALESCIBLE_CMDS = frozenset((CMD_FREQ_MODE1, CMD_FREQ_MODE2, CMD_AMP, CMD_PEAK))
+
+# 反馈控件属性（主题）
+TOPIC_FREQ = 'f0.txt'       # 当前频率，如 "1000 Hz" / "1.50 kHz" / "2.50 MHz"
+TOPIC_AMP = 'v0.txt'        # 当前幅值，如 "3.50 V"
+TOPIC_PEAK = 'vp0.txt'      # 当前峰值，如 "5.00 V"
+TOPIC_RESULT = 'result.txt'     # 建模结果，如 "Filter Type : LPF"
+
+# 各命令的下位机反馈主题（按ISR.c），Clear Buff依次反馈三个默认值
+RESPONSE_TOPICS = {
+    CMD_FREQ_MODE1: (TOPIC_FREQ,),
+    CMD_FREQ_MODE2: (TOPIC_FREQ,),
+    CMD_AMP: (TOPIC_AMP,),
+    CMD_PEAK: (TOPIC_PEAK,),
+    CMD_CLEAR_BUFF: (TOPIC_FREQ, TOPIC_AMP, TOPIC_PEAK),
+}
+
+# 固定格式的动作命令
+FRAME_CLEAR_BUFF = b'\x01\x01\x01\x01\x01\x01'
+FRAME_MODELING = b'\xF0\xF0\xF0\xF0\xF0\x24'
+FRAME_START = b'\xF1\xF1\xF1\xF1\xF1\x24'
+
+# 命令码 + 4字节小端序参数 + 1字节占位
+_PARAM_FRAME = struct.Struct('<BIx')
+
+
+def encode_freq(freq: int, mode: int = 2) -> bytes:
+    """
+    编码频率设置命令
+    Args:
+        freq: 频率值（Hz），4字节小端序
+        mode: 1=方式1(0xF2), 2=方式2(0x21)
+    """
+    cmd_code = CMD_FREQ_MODE1 if mode == 1 else CMD_FREQ_MODE2
+    return _PARAM_FRAME.pack(cmd_code, freq)
+
+
+def encode_voltage(voltage: float, cmd_type: str = 'amp') -> bytes:
+    """
+    编码电压设置命令
+    Args:
+        voltage: 电压值（V），×100后取整，取低3字节小端序，其余补0
+        cmd_type: 'amp'=幅值(0x22), 'peak'=峰值(0x23)
+    """
+    cmd_code = CMD_AMP if cmd_type == 'amp' else CMD_PEAK
+    voltage_int = int(voltage * 100)
+    if not 0 <= voltage_int <= 0xFFFFFFFF:
+        raise ValueError(f"电压超出范围: {voltage}")
+    return _PARAM_FRAME.pack(cmd_code, voltage_int & 0xFFFFFF)
+
+
+# 反馈数值的单位前缀
+_UNIT_SCALE = {'': 1.0, 'k': 1e3, 'K': 1e3, 'M': 1e6, 'm': 1e-3}
+
+
+def parse_quantity(text: str):
+    """
+    解析反馈显示字符串为(数值, 基本单位)
+    例: "1.50 kHz" → (1500.0, 'Hz'), "3.50 V" → (3.5, 'V')
+    无法解析时抛出ValueError
+    """
+    number, _, unit = text.strip().partition(' ')
+    unit = unit.strip()
+    scale = 1.0
+    if len(unit) > 1 and unit[0] in _UNIT_SCALE:
+        scale = _UNIT_SCALE[unit[0]]
+        unit = unit[1:]
+    return float(number) * scale, unit
+
+
+# 反馈数值的显示精度（绝对容差下限）：频率整数Hz，电压两位小数
+_FEEDBACK_RESOLUTION = {'Hz': 1.0, 'V': 0.005}
+# 反馈显示最多保留3位有效小数（如 "1.50 kHz"），按0.5%相对容差
+FEEDBACK_TOLERANCE = 0.005
+
+_FREQ_CMDS = (CMD_FREQ_MODE1, CMD_FREQ_MODE2)
+_VOLTAGE_CMDS = (CMD_AMP, CMD_PEAK)
+
+
+def expected_feedback(frame: bytes) -> Optional[float]:
+    """
+    一帧命令的反馈应显示的数值（频率Hz / 电压V）
+    Clear Buff等反馈值由下位机决定的命令返回None（不核对数值）
+    """
+    opcode = frame[0]
+    if opcode in _FREQ_CMDS:
+        return float(_PARAM_FRAME.unpack_from(frame)[1])
+    if opcode in _VOLTAGE_CMDS:
+        return (frame[1] | frame[2] << 8 | frame[3] << 16) / 100
+    return None
+
+
+def find_feedback(expected: Iterable[Optional[float]], text: str) -> int:
+    """
+    在按发送顺序排列的待确认命令中查找与反馈配对的一条
+    Args:
+        expected: 各条命令的expected_feedback()，None的一条与任何反馈配对
+        text: 反馈显示字符串，无法解析时与最早的一条配对
+    Returns:
+        序号（之前的命令的反馈已丢失）；没有数值一致的命令时返回-1（主动上报或其他来源的反馈）
+    """
+    try:
+        value, unit = parse_quantity(text)
+    except ValueError:
+        value = None
+    if value is not None:
+        tolerance = max(_FEEDBACK_RESOLUTION.get(unit, 0.0), abs(value) * FEEDBACK_TOLERANCE)
+    for index, target in enumerate(expected):
+        if target is None or value is None or abs(target - value) <= tolerance:
+            return index
+    return -1
@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+"""
+频率响应（Bode）数据存储模块
+扫频点写入预分配的NumPy块，写满的块追加到内存映射的.npy文件，
+历史记录可用 np.load(mmap_mode='r') 立即打开
+"""
+
+import glob
+import os
+import struct
+import threading
+import time
+from typing import List, Optional
+
+import numpy as np
+
+
+# 每行: 时间戳(秒, time.time), 频率(Hz), 幅值(V), 峰值(V)
+RECORD_DTYPE = np.dtype([('t', '<f8'), ('freq', '<f8'), ('amp', '<f8'), ('peak', '<f8')])
+
+_NPY_MAGIC = b'\x93NUMPY\x01\x00'
+_HEADER_SIZE = 256      # 固定长度的.npy头，行数变化时可原地改写
+
+
+def _npy_header(rows: int) -> bytes:
+    """生成固定长度的.npy v1.0文件头"""
+    descr = np.lib.format.dtype_to_descr(RECORD_DTYPE)
+    header = f"{{'descr': {descr!r}, 'fortran_order': False, 'shape': ({rows},), }}"
+    pad = _HEADER_SIZE - len(_NPY_MAGIC) - 2 - len(header) - 1
+    if pad < 0:
+        raise ValueError("npy文件头超长")
+    header = header + ' ' * pad + '\n'
+    return _NPY_MAGIC + struct.pack('<H', len(header)) + header.encode('latin1')
+
+
+class ResponseStore:
+    """
+    扫频数据存储
+    - append() 写入当前内存块（预分配，不产生新数组）
+    - 无文件时内存块满后按倍数扩容；有文件时写满的块落盘，内存占用恒定
+    - 落盘文件按需稀疏扩容并通过memmap写入，每次落盘后改写文件头行数
+    """
+
+    def __init__(self, path: Optional[str] = None, chunk_size: int = 65536):
+        self.path = path
+        self.chunk_size = chunk_size
+        self._lock = threading.Lock()
+        self._chunk = np.empty(chunk_size, dtype=RECORD_DTYPE)
+        self._count = 0             # 内存块中的行数
+        self._spilled = 0           # 已落盘的行数
+        self._file = None
+        self._mmap: Optional[np.memmap] = None
+        self._capacity = 0          # 文件中已分配的行数
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._file = open(path, 'w+b')
+            self._file.write(_npy_header(0))
+
+    def __len__(self) -> int:
+        return self._spilled + self._count
+
+    def append(self, freq: float, amp: float = np.nan, peak: float = np.nan,
+               t: Optional[float] = None):
+        """追加一个测量点（线程安全）"""
+        with self._lock:
+            if self._count == len(self._chunk):
+                self._make_room()
+            self._chunk[self._count] = (time.time() if t is None else t, freq, amp, peak)
+            self._count += 1
+
+    def _make_room(self):
+        """内存块已满：落盘或扩容（须持有锁）"""
+        if self._file:
+            self._spill()
+        else:
+            self._chunk = np.resize(self._chunk, len(self._chunk) * 2)
+
+    def _spill(self):
+        """将内存块写入memmap文件并清空内存块（须持有锁）"""
+        count = self._count
+        if not count:
+            return
+        needed = self._spilled + count
+        if needed > self._capacity:
+            # 文件容量按倍数增长（稀疏扩展，不复制已有数据）
+            capacity = max(needed, self._capacity * 2, self.chunk_size)
+            self._mmap = None
+            self._file.truncate(_HEADER_SIZE + capacity * RECORD_DTYPE.itemsize)
+            self._mmap = np.memmap(self._file, dtype=RECORD_DTYPE, mode='r+',
+                                   offset=_HEADER_SIZE, shape=(capacity,))
+            self._capacity = capacity
+        self._mmap[self._spilled:needed] = self._chunk[:count]
+        self._spilled = needed
+        self._count = 0
+        self._write_header()
+
+    def _write_header(self):
+        self._mmap.flush()
+        self._file.seek(0)
+        self._file.write(_npy_header(self._spilled))
+        self._file.flush()
+
+    def flush(self):
+        """把内存中的点全部落盘"""
+        with self._lock:
+            if self._file:
+                self._spill()
+
+    def close(self):
+        """落盘并关闭文件，截掉多分配的空间"""
+        with self._lock:
+            if not self._file:
+                return
+            self._spill()
+            self._mmap = None
+            self._file.truncate(_HEADER_SIZE + self._spilled * RECORD_DTYPE.itemsize)
+            self._file.close()
+            self._file = None
+            # 关闭后data()仍可读取（只读映射）
+            if self._spilled:
+                self._mmap = self.load(self.path)
+
+    def data(self) -> np.ndarray:
+        """
+        返回全部数据（结构化数组，字段 t/freq/amp/peak）
+        未落盘时为内存块的视图；有落盘数据时拼接为新数组
+        """
+        with self._lock:
+            tail = self._chunk[:self._count]
+            if not self._spilled:
+                return tail
+            return np.concatenate((self._mmap[:self._spilled], tail))
+
+    def tail(self, rows: int) -> np.ndarray:
+        """最近rows行（副本）"""
+        with self._lock:
+            if rows <= self._count or not self._spilled:
+                return self._chunk[max(0, self._count - rows):self._count].copy()
+            head = self._mmap[max(0, self._spilled - (rows - self._count)):self._spilled]
+            return np.concatenate((head, self._chunk[:self._count]))
+
+    def since(self, start: int) -> np.ndarray:
+        """第start行起新增的行（副本），增量刷新时只读取新数据"""
+        with self._lock:
+            if start >= self._spilled:
+                return self._chunk[start - self._spilled:self._count].copy()
+            return np.concatenate((self._mmap[start:self._spilled], self._chunk[:self._count]))
+
+    @staticmethod
+    def load(path: str) -> np.ndarray:
+        """以只读内存映射方式打开历史记录（不读入内存，立即返回）"""
+        return np.load(path, mmap_mode='r')
+
+    @staticmethod
+    def list_runs(directory: str) -> List[str]:
+        """列出目录中的历史记录文件（按时间从新到旧）"""
+        return sorted(glob.glob(os.path.join(directory, '*.npy')), reverse=True)
@@ -0,0 +1,319 @@
+# -*- coding: utf-8 -*-
+"""
+参数序列执行模块（浸泡测试）
+从CSV/JSON加载 (频率, 幅值, 峰值, 驻留时间) 步骤表，在独立调度线程中按绝对截止时间发送：
+第k步的计划时间 = 开始时间 + 前k步驻留时间之和（暂停时长顺延），
+单步的迟到不会累积到后续步骤。每步记录实际发送时间和下位机确认时间，报告计划/实际偏差。
+
+CSV（表头必须有dwell或dwell_ms，freq/amp/peak可省略或留空=该步不设置）:
+    freq,amp,peak,dwell_ms
+    1000,1.0,2.0,5
+    2000,,,5
+
+JSON:
+    {"repeat": 10, "steps": [{"freq": 1000, "amp": 1.0, "dwell": 0.005}, ...]}
+    或直接是步骤列表
+"""
+
+import csv
+import json
+import threading
+import time
+from collections import deque, namedtuple
+from typing import Callable, List, Optional
+
+from logger import get_logger
+from protocol import encode_freq, encode_voltage
+
+log = get_logger('sequence')
+
+# 一个步骤：freq（Hz）/amp/peak（V）为None时不发送，dwell为本步驻留时间（秒）
+Step = namedtuple('Step', 'freq amp peak dwell')
+
+# 截止时间前最后这段时间忙等（秒）。Condition.wait的唤醒误差通常约0.1ms，
+# 单核或高负载机器上偶尔可达数毫秒，对迟到要求更严时可增大spin_time（代价是CPU占用）
+SPIN_TIME = 0.0005
+
+# 百分位统计保留的最近样本数（长时间运行时内存不增长）
+STATS_WINDOW = 10000
+
+
+def _number(value, cast=float):
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = value.strip()
+        if not value:
+            return None
+    return cast(value)
+
+
+def _make_step(row: dict, line: int) -> Step:
+    try:
+        if row.get('dwell_ms') not in (None, ''):
+            dwell = _number(row['dwell_ms']) / 1000
+        else:
+            dwell = _number(row.get('dwell'))
+        if dwell is None or dwell < 0:
+            raise ValueError("缺少驻留时间（dwell/dwell_ms）")
+        return Step(_number(row.get('freq'), lambda v: int(float(v))),
+                    _number(row.get('amp')), _number(row.get('peak')), dwell)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"第{line}步格式错误: {e}") from None
+
+
+def load_program(path: str):
+    """
+    加载序列文件（.json按JSON解析，其余按CSV）
+    Returns:
+        (步骤列表, 重复次数)；CSV的重复次数为1
+    """
+    if path.lower().endswith('.json'):
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        repeat = 1
+        if isinstance(data, dict):
+            repeat = int(data.get('repeat', 1))
+            data = data.get('steps', [])
+        steps = [_make_step(row, i + 1) for i, row in enumerate(data)]
+    else:
+        with open(path, encoding='utf-8', newline='') as f:
+            rows = [row for row in csv.DictReader(f) if any((v or '').strip() for v in row.values())]
+        repeat = 1
+        steps = [_make_step(row, i + 1) for i, row in enumerate(rows)]
+    if not steps:
+        raise ValueError("序列为空")
+    return steps, repeat
+
+
+class _TimingStats:
+    """偏差统计：全程的次数/平均/最大值 + 最近window个样本的百分位"""
+
+    def __init__(self, window: int = STATS_WINDOW):
+        self.recent = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+        self.max = None
+
+    def add(self, value: float):
+        self.recent.append(value)
+        self.count += 1
+        self.total += value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.total / self.count if self.count else None
+
+    def percentile(self, p: float) -> Optional[float]:
+        values = sorted(self.recent)
+        if not values:
+            return None
+        return values[int(round(p / 100 * (len(values) - 1)))]
+
+
+class SequenceRunner:
+    """
+    序列执行器
+    - repeat: 重复次数，0=无限循环（直到stop()）
+    - on_step(序号, 第几遍, 步骤): 每步发送后在调度线程中调用
+    - 时间统计（毫秒）：late = 本步最后一帧实际写出串口 - 计划时间（含发送队列排队和限速等待）；
+      confirm = 下位机确认（本步最后一条反馈）- 计划时间
+    - 各帧不参与发送队列合并；本步任一命令未确认或被合并取代均计为确认失败
+    """
+
+    def __init__(self, serial_comm, steps: List[Step], repeat: int = 1,
+                 on_step: Optional[Callable[[int, int, Step], None]] = None,
+                 spin_time: float = SPIN_TIME):
+        if not steps:
+            raise ValueError("序列为空")
+        self.serial = serial_comm
+        self.steps = list(steps)
+        self.repeat = repeat
+        self.on_step = on_step
+        self.spin_time = spin_time
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self.running = False
+        self.paused = False
+        self.done = threading.Event()
+        self.error: Optional[str] = None
+        # 进度
+        self.loop = 0               # 当前第几遍（从0开始）
+        self.index = 0              # 当前步骤序号
+        self.steps_done = 0
+        self.started_at = None      # perf_counter
+        self.finished_at = None
+        self._base = 0.0            # 计划时间零点（暂停后顺延）
+        self._paused_at = None
+        self.paused_total = 0.0
+        # 时间统计
+        self._late = _TimingStats()
+        self._confirm = _TimingStats()
+        self.confirm_failed = 0
+        self.send_failed = 0
+        self.end_drift = None       # 全部结束时：实际结束 - 计划结束（ms）
+
+    @property
+    def duration(self) -> float:
+        """一遍的计划时长（秒）"""
+        return sum(step.dwell for step in self.steps)
+
+    # ==================== 控制 ====================
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.paused = False
+        self.done.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True, name='Sequence')
+        self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self.running = False
+            self._cond.notify_all()
+
+    def pause(self):
+        with self._cond:
+            if self.running and not self.paused:
+                self.paused = True
+                self._paused_at = time.perf_counter()
+                self._cond.notify_all()
+
+    def resume(self):
+        with self._cond:
+            if self.paused:
+                self.paused = False
+                paused = time.perf_counter() - self._paused_at
+                self._base += paused     # 计划时间整体顺延
+                self.paused_total += paused
+                self._paused_at = None
+                self._cond.notify_all()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self.done.wait(timeout)
+
+    # ==================== 调度线程 ====================
+
+    def _sleep_until(self, deadline: float) -> bool:
+        """等待到计划时间（暂停期间deadline随_base顺延），返回是否应继续运行"""
+        with self._cond:
+            while True:
+                if not self.running:
+                    return False
+                if self.paused:
+                    self._cond.wait()
+                    continue
+                remaining = self._base + deadline - time.perf_counter()
+                if remaining <= self.spin_time:
+                    break
+                self._cond.wait(remaining - self.spin_time)
+            target = self._base + deadline
+        while time.perf_counter() < target:
+            pass
+        return True
+
+    def _send_step(self, step: Step, target: float):
+        frames = []
+        if step.freq is not None:
+            frames.append(encode_freq(step.freq))
+        if step.amp is not None:
+            frames.append(encode_voltage(step.amp, 'amp'))
+        if step.peak is not None:
+            frames.append(encode_voltage(step.peak, 'peak'))
+        # 不参与合并：每步的每条命令都必须单独发出并得到自己的反馈
+        handles = [self.serial.send_frame(frame, coalesce=False) for frame in frames]
+        if not all(handles):
+            self.send_failed += 1
+        if handles and handles[-1]:
+            handles[-1].add_done_callback(lambda h: self._on_done(handles, target))
+
+    def _on_done(self, handles: list, target: float):
+        """本步最后一条命令完成（接收线程），target为本步的计划时间（perf_counter）"""
+        now = time.perf_counter()
+        written_at = handles[-1].written_at
+        if written_at is not None:
+            self._late.add((written_at - target) * 1000)
+        if all(h.confirmed() and not h.superseded for h in handles):
+            self._confirm.add((now - target) * 1000)
+        else:
+            self.confirm_failed += 1
+
+    def _run(self):
+        self.started_at = time.perf_counter()
+        self._base = self.started_at
+        offset = 0.0    # 当前步骤相对零点的计划时间
+        log.info("✓ 序列开始: %d步 × %s遍, 每遍%.3fs", len(self.steps), self.repeat or '∞', self.duration)
+        try:
+            while self.running and (self.repeat == 0 or self.loop < self.repeat):
+                for index, step in enumerate(self.steps):
+                    self.index = index
+                    if not self._sleep_until(offset):
+                        return
+                    target = self._base + offset
+                    self._send_step(step, target)
+                    self.steps_done += 1
+                    if self.on_step:
+                        self.on_step(index, self.loop, step)
+                    offset += step.dwell
+                self.loop += 1
+            # 最后一步的驻留结束
+            if self._sleep_until(offset):
+                self.end_drift = (time.perf_counter() - self._base - offset) * 1000
+        except Exception as e:
+            self.error = str(e)
+            log.error("✗ 序列执行失败: %s", e)
+        finally:
+            self.running = False
+            self.finished_at = time.perf_counter()
+            self.done.set()
+            log.info("✓ 序列结束: %s", self.summary())
+
+    # ==================== 统计 ====================
+
+    def progress(self) -> dict:
+        """进度：当前遍数/步骤、已执行步数、已用时间（不含暂停）"""
+        end = self.finished_at or time.perf_counter()
+        paused = self.paused_total + (end - self._paused_at if self._paused_at else 0.0)
+        elapsed = end - self.started_at - paused if self.started_at else 0.0
+        total = len(self.steps) * self.repeat if self.repeat else None
+        return {
+            'loop': self.loop,
+            'index': self.index,
+            'steps_done': self.steps_done,
+            'total_steps': total,
+            'fraction': self.steps_done / total if total else None,
+            'elapsed': elapsed,
+            'paused': self.paused,
+            'done': self.done.is_set(),
+            'error': self.error,
+        }
+
+    def report(self) -> dict:
+        """计划/实际时间偏差统计（毫秒，平均/最大为全程，百分位为最近STATS_WINDOW步）"""
+        late = self._late
+        confirm = self._confirm
+        return {
+            'steps': self.steps_done,
+            'late_mean_ms': late.mean,
+            'late_p99_ms': late.percentile(99),
+            'late_max_ms': late.max,
+            'confirm_p50_ms': confirm.percentile(50),
+            'confirm_p99_ms': confirm.percentile(99),
+            'confirm_max_ms': confirm.max,
+            'confirm_failed': self.confirm_failed,
+            'send_failed': self.send_failed,
+            'end_drift_ms': self.end_drift,
+        }
+
+    def summary(self) -> str:
+        r = self.report()
+
+        def ms(value):
+            return f"{value:.3f}ms" if value is not None else "--"
+        return (f"{r['steps']}步, 发送迟到 平均{ms(r['late_mean_ms'])} p99 {ms(r['late_p99_ms'])} "
+                f"最大{ms(r['late_max_ms'])}, 确认 p50 {ms(r['confirm_p50_ms'])} p99 {ms(r['confirm_p99_ms'])}, "
+                f"确认失败{r['confirm_failed']}, 发送失败{r['send_failed']}, 结束偏差{ms(r['end_drift_ms'])}")
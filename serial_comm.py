@@ -2,27 +2,79 @@
 """
 串口通信模块
 实现协议编码/解码和串口收发
+send_*返回CommandHandle（发送成功时为真），可等待下位机的对应反馈，见command_handle.py
 """
 
 import serial
-import struct
 import threading
 import time
 from typing import Optional, Callable
 
+from command_handle import FAILED, CommandHandle, ResponseMatcher
+from device_state import DeviceState
+from dispatcher import FeedbackDispatcher
+from frame_parser import FrameParser
+from latency import LatencyTracer
+from logger import RX, TX, FrameRing, Hex, get_logger
+from protocol import (
+    COALESCIBLE_CMDS, FRAME_CLEAR_BUFF, FRAME_MODELING, FRAME_START,
+    encode_freq, encode_voltage
+)
+from tx_queue import TxWriter
+
+log = get_logger('serial')
+
 
 class SerialComm:
     """串口通信类"""
     
-    def __init__(self, port: str, baudrate: int = 115200, timeout: float = 1.0):
+    # 接收模式：event=阻塞读取（有数据立即唤醒），poll=轮询in_waiting（旧方式），
+    # external=不启动接收线程，由外部I/O线程（如PortManager）调用feed()送入数据
+    RX_MODES = ('event', 'poll', 'external')
+    
+    def __init__(self, port: str, baudrate: int = 115200, timeout: float = 1.0,
+                 rx_mode: str = 'event', tx_queue_size: int = 0,
+                 tx_coalesce: bool = True, tx_rate_limit: float = 0, tx_burst: int = 8,
+                 latency_timeout: float = 1.0, frame_ring_size: int = 2000):
+        if rx_mode not in self.RX_MODES:
+            raise ValueError(f"未知接收模式: {rx_mode}")
         self.port = port
         self.baudrate = baudrate
         self.timeout = timeout
+        self.rx_mode = rx_mode
+        self.parser = FrameParser()
+        self.dispatcher = FeedbackDispatcher()
+        # 下位机数值状态（频率/幅值/峰值/建模结果，见device_state.py）
+        self.device = DeviceState()
+        self.device.attach(self)
+        # 命令→反馈延迟统计（latency_stats()读取）
+        self.latency = LatencyTracer(latency_timeout)
+        # send_*返回句柄的反馈配对
+        self.responses = ResponseMatcher(latency_timeout)
+        # 最近收发帧（串口调试页面显示）
+        self.frames = FrameRing(frame_ring_size)
+        # 原始收发数据录制（start_capture()开启）
+        self.capture = None     # capture.CaptureWriter
+        # 发送队列：tx_queue_size>0时send_*只入队，由写线程写出；0=同步写出
+        # tx_coalesce: 参数命令排队时只发送最新值；tx_rate_limit: 每秒最多发送帧数（0=不限）
+        self.tx_writer: Optional[TxWriter] = None
+        if tx_queue_size > 0:
+            self.tx_writer = TxWriter(
+                self._write_raw, tx_queue_size,
+                coalesce_opcodes=COALESCIBLE_CMDS if tx_coalesce else (),
+                rate_limit=tx_rate_limit, burst=tx_burst,
+                on_write=self._before_write, on_written=self._after_write
+            )
         self.serial: Optional[serial.Serial] = None
         self.is_connected = False
-        self.receive_callback: Optional[Callable] = None
+        self.receive_callback: Optional[Callable] = None  # set_receive_callback设置的全局回调
         self.receive_thread: Optional[threading.Thread] = None
         self.running = False
+        # 串口读取失败（如USB转串口被拔出）时在接收线程中调用on_link_lost(异常)，
+        # 此时串口已关闭（见supervisor.ConnectionSupervisor）
+        self.on_link_lost: Optional[Callable[[Exception], None]] = None
+        # 下位机在频率命令后上报vp0输出电平（扫频据此记录峰值列，见config.SWEEP_LEVEL_ECHO）
+        self.level_echo = False
         
     def connect(self) -> bool:
         """连接串口"""
@@ -37,139 +89,304 @@ class SerialComm:
             )
             self.is_connected = True
             self.running = True
+            self.parser.reset()
+            self.latency.reset()
+            if self.tx_writer:
+                self.tx_writer.start()
             # 启动接收线程
-            self.receive_thread = threading.Thread(target=self._receive_loop, daemon=True)
-            self.receive_thread.start()
-            print(f"✓ 串口连接成功: {self.port} @ {self.baudrate}bps")
+            if self.rx_mode != 'external':
+                target = self._receive_loop if self.rx_mode == 'event' else self._receive_loop_poll
+                self.receive_thread = threading.Thread(target=target, daemon=True)
+                self.receive_thread.start()
+            log.info("✓ 串口连接成功: %s @ %sbps (%s)", self.port, self.baudrate, self.rx_mode)
             return True
         except Exception as e:
-            print(f"✗ 串口连接失败: {e}")
+            log.error("✗ 串口连接失败: %s", e)
             self.is_connected = False
             return False
     
     def disconnect(self):
         """断开串口"""
         self.running = False
+        if self.tx_writer:
+            self.tx_writer.stop()
+        self.stop_capture()
         if self.serial and self.serial.is_open:
+            # 唤醒阻塞在read()上的接收线程
+            if hasattr(self.serial, 'cancel_read'):
+                self.serial.cancel_read()
+            if self.receive_thread and self.receive_thread is not threading.current_thread():
+                self.receive_thread.join(timeout=self.timeout + 0.5)
             self.serial.close()
         self.is_connected = False
-        print("✓ 串口已断开")
+        self.responses.fail_all("串口已断开")
+        log.info("✓ 串口已断开")
+    
+    def subscribe(self, topic: str, callback: Callable) -> Callable:
+        """
+        订阅反馈主题
+        Args:
+            topic: 'f0.txt'精确匹配, 'f0.*'匹配控件任意属性, '*'匹配全部
+            callback: callback(obj_attr, value)，在接收线程中调用
+        """
+        return self.dispatcher.subscribe(topic, callback)
+    
+    def unsubscribe(self, topic: str, callback: Callable) -> bool:
+        """取消订阅反馈主题"""
+        return self.dispatcher.unsubscribe(topic, callback)
     
     def set_receive_callback(self, callback: Callable):
-        """设置接收回调函数"""
+        """设置接收回调函数（兼容接口，接收全部反馈并替换上一次设置的回调）"""
+        if self.receive_callback:
+            self.dispatcher.unsubscribe('*', self.receive_callback)
         self.receive_callback = callback
+        if callback:
+            self.dispatcher.subscribe('*', callback)
     
     def _receive_loop(self):
-        """接收循环（在独立线程中运行）"""
-        buffer = b''
+        """
+        接收循环（事件模式，在独立线程中运行）
+        read()阻塞在串口句柄上，有数据到达立即返回；
+        空闲时只在超时（self.timeout）到期时醒来检查running标志
+        """
+        while self.running and self.serial and self.serial.is_open:
+            try:
+                # 阻塞等待至少1字节，再一次性取走已到达的其余数据
+                data = self.serial.read(1)
+                if not data:
+                    continue
+                waiting = self.serial.in_waiting
+                if waiting:
+                    data += self.serial.read(waiting)
+            except (serial.SerialException, OSError) as e:
+                self._link_lost(e)
+                break
+            try:
+                self._handle_data(data)
+            except Exception as e:
+                log.error("接收数据错误: %s", e)
+    
+    def _receive_loop_poll(self):
+        """接收循环（轮询模式，每10ms检查一次in_waiting）"""
         while self.running and self.serial and self.serial.is_open:
             try:
-                if self.serial.in_waiting > 0:
-                    data = self.serial.read(self.serial.in_waiting)
-                    buffer += data
-                    
-                    # 解析反馈命令（格式：控件名.属性="值"\xff\xff\xff）
-                    while b'\xff\xff\xff' in buffer:
-                        end_idx = buffer.find(b'\xff\xff\xff')
-                        message = buffer[:end_idx].decode('utf-8', errors='ignore')
-                        buffer = buffer[end_idx + 3:]  # 跳过结束符
-                        
-                        # 解析命令
-                        if '=' in message:
-                            parts = message.split('=', 1)
-                            if len(parts) == 2:
-                                obj_attr = parts[0].strip()
-                                value = parts[1].strip().strip('"')
-                                
-                                if self.receive_callback:
-                                    self.receive_callback(obj_attr, value)
-                
-                time.sleep(0.01)  # 避免CPU占用过高
+                data = self.serial.read(self.serial.in_waiting) if self.serial.in_waiting > 0 else b''
+            except (serial.SerialException, OSError) as e:
+                self._link_lost(e)
+                break
+            try:
+                if data:
+                    self._handle_data(data)
             except Exception as e:
-                print(f"接收数据错误: {e}")
-                time.sleep(0.1)
+                log.error("接收数据错误: %s", e)
+            time.sleep(0.01)  # 避免CPU占用过高
+    
+    def _link_lost(self, error: Exception):
+        """串口读取失败：关闭串口（不再重试读取），通知on_link_lost"""
+        if not self.running:
+            return      # disconnect()关闭串口导致的读取异常
+        log.error("✗ 串口连接中断: %s (%s)", self.port, error)
+        self.disconnect()
+        if self.on_link_lost:
+            self.on_link_lost(error)
+    
+    def link_lost(self, error: Exception):
+        """外部读取失败或读到EOF（rx_mode='external'时由I/O线程调用）：关闭串口并通知on_link_lost"""
+        self._link_lost(error)
+    
+    def feed(self, data: bytes):
+        """送入外部读取到的接收数据（rx_mode='external'时由I/O线程调用）"""
+        self._handle_data(data)
+    
+    def _handle_data(self, data: bytes):
+        """解析接收到的数据块并分发完整的反馈帧"""
+        capture = self.capture
+        if capture:
+            capture.write(RX, data)
+        # 解析反馈命令（格式：控件名.属性="值"\xff\xff\xff）
+        dispatch = self.dispatcher.dispatch
+        observe = self.latency.observe
+        confirm = self.responses.observe
+        record = self.frames.append
+        for obj_attr, value in self.parser.feed(data):
+            observe(obj_attr, value)
+            confirm(obj_attr, value)
+            record(RX, (obj_attr, value))
+            dispatch(obj_attr, value)
     
     # ==================== 协议编码函数 ====================
     
-    def send_freq_cmd(self, freq: int, mode: int = 2) -> bool:
+    def send_freq_cmd(self, freq: int, mode: int = 2) -> CommandHandle:
         """
-        发送频率设置命令
+        发送频率设置命令（确认反馈: f0.txt）
         Args:
             freq: 频率值（Hz）
             mode: 1=方式1(0xF2), 2=方式2(0x21)
         """
         try:
-            cmd_code = 0xF2 if mode == 1 else 0x21
-            # 构造6字节命令：命令码 + 4字节小端序频率 + 占位字节
-            cmd = struct.pack('<BI', cmd_code, freq)  # 1字节+4字节=5字节
-            cmd += b'\x00'  # 补齐到6字节
-            self._send_raw(cmd)
-            print(f"→ 发送频率命令: {freq}Hz (模式{mode}), HEX: {cmd.hex().upper()}")
-            return True
+            # 6字节命令：命令码 + 4字节小端序频率 + 占位字节
+            cmd = encode_freq(freq, mode)
+            handle = self._send(cmd)
+            log.debug("→ 发送频率命令: %sHz (模式%s), HEX: %s", freq, mode, Hex(cmd))
+            return handle
         except Exception as e:
-            print(f"✗ 发送频率命令失败: {e}")
-            return False
+            log.error("✗ 发送频率命令失败: %s", e)
+            return self._failed(e)
     
-    def send_voltage_cmd(self, voltage: float, cmd_type: str = 'amp') -> bool:
+    def send_voltage_cmd(self, voltage: float, cmd_type: str = 'amp') -> CommandHandle:
         """
-        发送电压设置命令
+        发送电压设置命令（确认反馈: v0.txt / vp0.txt）
         Args:
             voltage: 电压值（V）
             cmd_type: 'amp'=幅值(0x22), 'peak'=峰值(0x23)
         """
         try:
-            cmd_code = 0x22 if cmd_type == 'amp' else 0x23
-            # 电压×100转换为整数
-            voltage_int = int(voltage * 100)
-            # 构造6字节命令：命令码 + 3字节小端序 + 3个占位字节
-            cmd = struct.pack('<B', cmd_code)  # 命令码
-            cmd += struct.pack('<I', voltage_int)[:3]  # 取低3字节
-            cmd += b'\x00\x00\x00'  # 补齐到6字节
-            self._send_raw(cmd)
-            print(f"→ 发送{'幅值' if cmd_type == 'amp' else '峰值'}命令: {voltage}V, HEX: {cmd.hex().upper()}")
-            return True
+            # 6字节命令：命令码 + 电压×100的低3字节小端序 + 3个占位字节
+            cmd = encode_voltage(voltage, cmd_type)
+            handle = self._send(cmd)
+            log.debug("→ 发送%s命令: %sV, HEX: %s", '幅值' if cmd_type == 'amp' else '峰值', voltage, Hex(cmd))
+            return handle
         except Exception as e:
-            print(f"✗ 发送电压命令失败: {e}")
-            return False
+            log.error("✗ 发送电压命令失败: %s", e)
+            return self._failed(e)
     
-    def send_clear_buff(self) -> bool:
-        """发送清空缓冲命令"""
+    def send_clear_buff(self) -> CommandHandle:
+        """发送清空缓冲命令（确认反馈: f0/v0/vp0三条默认值）"""
         try:
-            cmd = b'\x01\x01\x01\x01\x01\x01'
-            self._send_raw(cmd)
-            print(f"→ 发送Clear Buff命令, HEX: {cmd.hex().upper()}")
-            return True
+            cmd = FRAME_CLEAR_BUFF
+            handle = self._send(cmd)
+            log.debug("→ 发送Clear Buff命令, HEX: %s", Hex(cmd))
+            return handle
         except Exception as e:
-            print(f"✗ 发送Clear Buff命令失败: {e}")
-            return False
+            log.error("✗ 发送Clear Buff命令失败: %s", e)
+            return self._failed(e)
     
-    def send_modeling_cmd(self) -> bool:
-        """发送建模命令"""
+    def send_modeling_cmd(self) -> CommandHandle:
+        """发送建模命令（确认反馈: result.txt）"""
         try:
-            cmd = b'\xF0\xF0\xF0\xF0\xF0\x24'
-            self._send_raw(cmd)
-            print(f"→ 发送建模命令, HEX: {cmd.hex().upper()}")
-            return True
+            cmd = FRAME_MODELING
+            handle = self._send(cmd)
+            log.debug("→ 发送建模命令, HEX: %s", Hex(cmd))
+            return handle
         except Exception as e:
-            print(f"✗ 发送建模命令失败: {e}")
-            return False
+            log.error("✗ 发送建模命令失败: %s", e)
+            return self._failed(e)
     
-    def send_start_cmd(self) -> bool:
-        """发送启动命令"""
+    def send_start_cmd(self) -> CommandHandle:
+        """发送启动命令（无反馈，写出即完成）"""
         try:
-            cmd = b'\xF1\xF1\xF1\xF1\xF1\x24'
-            self._send_raw(cmd)
-            print(f"→ 发送启动命令, HEX: {cmd.hex().upper()}")
-            return True
+            cmd = FRAME_START
+            handle = self._send(cmd)
+            log.debug("→ 发送启动命令, HEX: %s", Hex(cmd))
+            return handle
         except Exception as e:
-            print(f"✗ 发送启动命令失败: {e}")
-            return False
+            log.error("✗ 发送启动命令失败: %s", e)
+            return self._failed(e)
     
-    def _send_raw(self, data: bytes):
-        """发送原始数据"""
-        if self.serial and self.serial.is_open:
-            self.serial.write(data)
-            self.serial.flush()
-        else:
+    def send_frame(self, cmd: bytes, coalesce: bool = False) -> CommandHandle:
+        """
+        发送已编码的命令帧（如frame_encoder批量生成的帧）
+        Args:
+            cmd: 6字节命令（或多帧拼接，句柄等待最后一帧的反馈）
+            coalesce: 是否允许被发送队列中更新的同类命令合并
+        """
+        try:
+            return self._send(cmd, coalesce)
+        except Exception as e:
+            log.error("✗ 发送命令失败: %s", e)
+            return self._failed(e, cmd)
+    
+    def _send(self, cmd: bytes, coalesce: bool = True) -> CommandHandle:
+        """发送并返回句柄，失败时抛出异常"""
+        handle = CommandHandle(cmd, self.responses, self._resend)
+        handle.attempts = 1
+        self._send_raw(cmd, coalesce, handle)
+        handle.sent = True
+        return handle
+    
+    def _failed(self, error: Exception, cmd: bytes = b'') -> CommandHandle:
+        """发送失败的句柄（为假）"""
+        handle = CommandHandle(cmd, self.responses)
+        handle._settle(FAILED, str(error))
+        return handle
+    
+    def _resend(self, handle: CommandHandle):
+        """超时重发（CommandHandle.wait(retries=...)调用），重发帧不参与合并"""
+        handle._restart()
+        try:
+            self._send_raw(handle.frame, False, handle)
+            log.debug("→ 重发命令(第%d次), HEX: %s", handle.attempts, Hex(handle.frame))
+        except Exception as e:
+            log.error("✗ 重发命令失败: %s", e)
+            handle._settle(FAILED, str(e))
+    
+    def _send_raw(self, data: bytes, coalesce: bool = True, handle: Optional[CommandHandle] = None):
+        """发送原始数据（启用发送队列时只入队，立即返回）"""
+        if not (self.serial and self.serial.is_open):
             raise Exception("串口未连接")
-
+        if self.tx_writer:
+            if not self.tx_writer.put(data, coalesce, handle):
+                raise Exception(f"发送队列已满（{self.tx_writer.maxsize}帧）")
+        else:
+            self._write_now(data, handle)
+    
+    def _before_write(self, frames: list, handles: list) -> list:
+        """写出前登记延迟时间戳和待确认句柄（发送队列的写线程中调用），返回登记记录"""
+        t_ns = time.perf_counter_ns()
+        stamp = self.latency.stamp
+        expect = self.responses.expect
+        return [(stamp(frame, t_ns), expect(frame, frame_handles))
+                for frame, frame_handles in zip(frames, handles)]
+    
+    def _after_write(self, registered: list, error: Optional[Exception] = None):
+        """写出完成；写出失败时撤销登记，等待这些帧的句柄立即失败（不再与其他命令的反馈配对）"""
+        if error is None:
+            for _, expected in registered or ():
+                self.responses.written(expected)
+            return
+        for stamped, expected in registered or ():
+            self.latency.cancel(stamped)
+            self.responses.cancel(expected, f"写入失败: {error}")
+    
+    def _write_now(self, data: bytes, handle: Optional[CommandHandle] = None):
+        """同步写出并等待发送完成"""
+        registered = self._before_write((data,), ([handle] if handle is not None else None,))
+        try:
+            self._write_raw(data)
+        except Exception as e:
+            self._after_write(registered, e)
+            raise
+        self._after_write(registered)
+    
+    def _write_raw(self, data: bytes):
+        """写出已登记的数据"""
+        self.frames.append(TX, data)
+        capture = self.capture
+        if capture:
+            capture.write(TX, data)
+        self.serial.write(data)
+        self.serial.flush()
+    
+    def tx_stats(self) -> Optional[dict]:
+        """发送队列统计（未启用发送队列时返回None）"""
+        return self.tx_writer.stats() if self.tx_writer else None
+    
+    def start_capture(self, path: str):
+        """开始把原始收发数据录制到文件（见capture.py，可用于回放）"""
+        from capture import CaptureWriter
+        self.stop_capture()
+        self.capture = CaptureWriter(path)
+        log.info("✓ 开始录制串口数据: %s", path)
+    
+    def stop_capture(self):
+        """停止录制"""
+        capture, self.capture = self.capture, None
+        if capture:
+            capture.close()
+            log.info("✓ 停止录制: %s (%d条记录, %d字节)", capture.path, capture.records, capture.bytes)
+    
+    def latency_stats(self) -> dict:
+        """各命令码的反馈延迟统计（p50/p99/超时数等，见LatencyTracer.stats）"""
+        # 顺带让超时未确认的句柄及时回调
+        self.responses.expire()
+        return self.latency.stats()
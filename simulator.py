@@ -0,0 +1,308 @@
+# -*- coding: utf-8 -*-
+"""
+虚拟下位机（仅Linux/Mac）
+在pty伪终端上按固件ISR的方式解码6字节命令，并返回 控件名.属性="值"\xff\xff\xff 反馈。
+SerialComm可以像连接 /dev/ttyUSB0 一样连接 simulator.port
+
+单独运行: python simulator.py --filter LPF --fc 10000 --delay 0.002
+"""
+
+import math
+import os
+import random
+import select
+import struct
+import threading
+import time
+from typing import Optional
+
+from logger import get_logger, setup_logging, shutdown_logging
+from protocol import (
+    CMD_AMP, CMD_CLEAR_BUFF, CMD_FREQ_MODE1, CMD_FREQ_MODE2, CMD_MODELING, CMD_PEAK,
+    CMD_START, FRAME_SIZE
+)
+from sweep import firmware_plan
+
+log = get_logger('simulator')
+
+
+class FilterModel:
+    """二阶滤波器模型，用于模拟建模扫频的被测电路"""
+
+    KINDS = ('LPF', 'HPF', 'BPF', 'BSF')
+
+    def __init__(self, kind: str = 'LPF', fc: float = 10000.0, q: float = 0.707, gain: float = 1.0):
+        if kind not in self.KINDS:
+            raise ValueError(f"未知滤波器类型: {kind}")
+        self.kind = kind
+        self.fc = fc
+        self.q = q
+        self.gain = gain
+
+    def response(self, freq: float) -> float:
+        """幅频响应 |H(f)|"""
+        x = freq / self.fc
+        denominator = math.hypot(1 - x * x, x / self.q)
+        if self.kind == 'LPF':
+            numerator = 1.0
+        elif self.kind == 'HPF':
+            numerator = x * x
+        elif self.kind == 'BPF':
+            numerator = x / self.q
+        else:
+            numerator = abs(1 - x * x)
+        return self.gain * numerator / denominator
+
+
+class LowerMachineSimulator:
+    """
+    虚拟下位机
+    - delay/jitter: 每条命令处理后到发出反馈的延迟（秒）及随机抖动
+    - burst_rate: >0时额外以该速率（帧/秒）连续上报当前频率，用于压力测试
+    - scan_time: 0xF0建模扫频的模拟耗时（秒）
+    - echo_response: 为True时频率命令后额外上报vp0（输入幅值×|H(f)|），供上位机扫频测量
+    - baudrate: 模拟下位机串口波特率（None=不模拟）。上位机打开pty时设置的波特率不同时，
+      收到的命令变成随机字节、反馈变成乱码；相同时反馈按该波特率的字节时间发出
+    """
+
+    # 固件复位默认值（case 0x01）
+    DEFAULT_FREQ = 1000
+    DEFAULT_VOLTAGE = 1.0
+
+    def __init__(self, delay: float = 0.0, jitter: float = 0.0, burst_rate: float = 0.0,
+                 filter_model: Optional[FilterModel] = None, scan_time: float = 1.0,
+                 echo_response: bool = False, baudrate: Optional[int] = None):
+        if os.name != 'posix':
+            raise RuntimeError("虚拟下位机需要pty（仅支持Linux/Mac）")
+        self.delay = delay
+        self.jitter = jitter
+        self.burst_rate = burst_rate
+        self.filter = filter_model or FilterModel()
+        self.scan_time = scan_time
+        self.echo_response = echo_response
+        self.baudrate = baudrate
+        self._speed = None      # baudrate对应的termios速率常量
+        if baudrate:
+            import termios
+            self._speed = getattr(termios, f'B{baudrate}', None)
+            if self._speed is None:
+                raise ValueError(f"不支持的波特率: {baudrate}")
+
+        # 下位机状态（对应固件全局变量）
+        self.recv_freq = self.DEFAULT_FREQ
+        self.recv_in_voltage = self.DEFAULT_VOLTAGE
+        self.recv_out_voltage = self.DEFAULT_VOLTAGE
+        self.flag = 0           # 1=FFT循环运行中（0xF1）
+
+        self._master: Optional[int] = None
+        self._slave: Optional[int] = None
+        self._wake_r: Optional[int] = None
+        self._wake_w: Optional[int] = None
+        self._write_lock = threading.Lock()
+        self._threads = []
+        self.running = False
+        # 统计
+        self.frames_received = 0
+        self.frames_unknown = 0
+        self.feedback_sent = 0
+        self.garbled = 0        # 波特率不一致收到/发出的乱码次数
+
+    @property
+    def port(self) -> str:
+        """供SerialComm连接的设备路径"""
+        return os.ttyname(self._slave)
+
+    def start(self) -> str:
+        """创建pty并启动处理线程，返回设备路径"""
+        import tty
+        self._master, self._slave = os.openpty()
+        tty.setraw(self._master)
+        tty.setraw(self._slave)
+        self._wake_r, self._wake_w = os.pipe()
+        self.running = True
+        self._threads = [threading.Thread(target=self._command_loop, daemon=True)]
+        if self.burst_rate > 0:
+            self._threads.append(threading.Thread(target=self._burst_loop, daemon=True))
+        for thread in self._threads:
+            thread.start()
+        log.info("✓ 虚拟下位机已启动: %s", self.port)
+        return self.port
+
+    def stop(self):
+        """停止并关闭pty"""
+        if not self.running:
+            return
+        self.running = False
+        os.write(self._wake_w, b'x')
+        for thread in self._threads:
+            thread.join(1.0)
+        for fd in (self._master, self._slave, self._wake_r, self._wake_w):
+            os.close(fd)
+        self._master = self._slave = self._wake_r = self._wake_w = None
+        log.info("✓ 虚拟下位机已停止")
+
+    # ==================== 反馈 ====================
+
+    def _send_feedback(self, obj_attr: str, value: str):
+        """发送 控件名.属性="值"\\xff\\xff\\xff"""
+        data = f'{obj_attr}="{value}"'.encode('utf-8') + b'\xff\xff\xff'
+        if self.baudrate:
+            if not self._line_ok():
+                self.garbled += 1
+                data = os.urandom(random.randint(1, len(data)))
+            else:
+                time.sleep(len(data) * 10 / self.baudrate)     # 8N1每字节10位
+        with self._write_lock:
+            os.write(self._master, data)
+            self.feedback_sent += 1
+
+    def _line_ok(self) -> bool:
+        """上位机设置的波特率是否与下位机一致"""
+        import termios
+        return termios.tcgetattr(self._slave)[4] == self._speed
+
+    def _reply_delay(self):
+        """模拟处理延迟"""
+        wait = self.delay + (random.uniform(-self.jitter, self.jitter) if self.jitter else 0.0)
+        if wait > 0:
+            time.sleep(wait)
+
+    # ==================== 命令解码（对应ISR.c） ====================
+
+    def handle_frame(self, buf: bytes):
+        """按固件switch(Receive_Buffer[0])处理一条6字节命令"""
+        self.frames_received += 1
+        cmd = buf[0]
+        if cmd in (CMD_FREQ_MODE2, CMD_FREQ_MODE1):
+            self.flag = 0
+            self.recv_freq = struct.unpack_from('<I', buf, 1)[0]
+            self._reply_delay()
+            self._send_feedback('f0.txt', f"{self.recv_freq} Hz")
+            if self.echo_response:
+                level = self.recv_in_voltage * self.filter.response(self.recv_freq)
+                self._send_feedback('vp0.txt', f"{level:.2f} V")
+        elif cmd == CMD_AMP:
+            self.flag = 0
+            self.recv_in_voltage = (buf[1] + (buf[2] << 8) + (buf[3] << 16)) / 100.0
+            self._reply_delay()
+            self._send_feedback('v0.txt', f"{self.recv_in_voltage:.2f} V")
+        elif cmd == CMD_PEAK:
+            self.flag = 0
+            self.recv_out_voltage = (buf[1] + (buf[2] << 8) + (buf[3] << 16)) / 100.0
+            self._reply_delay()
+            self._send_feedback('vp0.txt', f"{self.recv_out_voltage:.2f} V")
+        elif cmd == CMD_CLEAR_BUFF:
+            self.flag = 0
+            self.recv_out_voltage = self.DEFAULT_VOLTAGE
+            self.recv_in_voltage = self.DEFAULT_VOLTAGE
+            self.recv_freq = self.DEFAULT_FREQ
+            self._reply_delay()
+            self._send_feedback('f0.txt', f"{self.recv_freq} Hz")
+            self._send_feedback('v0.txt', f"{self.recv_in_voltage:.2f} V")
+            self._send_feedback('vp0.txt', f"{self.recv_out_voltage:.2f} V")
+        elif cmd == CMD_MODELING and buf[5] == 0x24:
+            self.flag = 0
+            self._process_scan()
+            self._send_feedback('result.txt', f"Filter Type : {self.classify()}")
+        elif cmd == CMD_START and buf[5] == 0x24:
+            self.flag = 1
+        else:
+            self.frames_unknown += 1
+
+    def _process_scan(self):
+        """模拟process_scan()：扫频耗时scan_time"""
+        if self.scan_time > 0:
+            time.sleep(self.scan_time)
+
+    def classify(self) -> str:
+        """在固件扫频点上计算响应并判断滤波器类型（模拟Check_Filter_Type）"""
+        freqs = firmware_plan()
+        gains = [self.filter.response(f) for f in freqs]
+        low, high, peak = gains[0], gains[-1], max(gains)
+        trough = min(gains)
+        if low > 0.5 * peak and high < 0.5 * peak:
+            return 'LPF'
+        if low < 0.5 * peak and high > 0.5 * peak:
+            return 'HPF'
+        if low < 0.5 * peak and high < 0.5 * peak:
+            return 'BPF'
+        if trough < 0.5 * min(low, high):
+            return 'BSF'
+        return 'Unknown'
+
+    # ==================== 线程 ====================
+
+    def _command_loop(self):
+        """接收命令：固件每次收满6字节处理一条"""
+        buffer = b''
+        while self.running:
+            readable, _, _ = select.select([self._master, self._wake_r], [], [])
+            if self._wake_r in readable:
+                break
+            try:
+                data = os.read(self._master, 4096)
+            except OSError:
+                break
+            if self.baudrate and not self._line_ok():
+                # 波特率不一致：下位机收到长度不定的错误字节，会打乱6字节命令边界
+                self.garbled += 1
+                data = os.urandom(random.randint(1, 2 * len(data)))
+            buffer += data
+            while len(buffer) >= FRAME_SIZE:
+                frame, buffer = buffer[:FRAME_SIZE], buffer[FRAME_SIZE:]
+                try:
+                    self.handle_frame(frame)
+                except OSError:
+                    return
+
+    def _burst_loop(self):
+        """以burst_rate连续上报当前频率"""
+        interval = 1.0 / self.burst_rate
+        next_time = time.perf_counter()
+        while self.running:
+            try:
+                self._send_feedback('f0.txt', f"{self.recv_freq} Hz")
+            except OSError:
+                break
+            next_time += interval
+            wait = next_time - time.perf_counter()
+            if wait > 0:
+                time.sleep(wait)
+            else:
+                next_time = time.perf_counter()
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="虚拟下位机（pty）")
+    parser.add_argument('--delay', type=float, default=0.0, help="反馈延迟（秒）")
+    parser.add_argument('--jitter', type=float, default=0.0, help="反馈延迟抖动（秒）")
+    parser.add_argument('--burst-rate', type=float, default=0.0, help="连续上报频率（帧/秒）")
+    parser.add_argument('--filter', choices=FilterModel.KINDS, default='LPF', help="被测滤波器类型")
+    parser.add_argument('--fc', type=float, default=10000.0, help="特征频率（Hz）")
+    parser.add_argument('--q', type=float, default=0.707, help="品质因数")
+    parser.add_argument('--scan-time', type=float, default=1.0, help="建模扫频耗时（秒）")
+    parser.add_argument('--echo-response', action='store_true', help="频率命令后上报vp0响应")
+    parser.add_argument('--baud', type=int, help="模拟下位机波特率（上位机波特率不同时收发乱码）")
+    args = parser.parse_args()
+    setup_logging('INFO', console=True)
+
+    sim = LowerMachineSimulator(
+        delay=args.delay, jitter=args.jitter, burst_rate=args.burst_rate,
+        filter_model=FilterModel(args.filter, args.fc, args.q),
+        scan_time=args.scan_time, echo_response=args.echo_response, baudrate=args.baud
+    )
+    sim.start()
+    print("在上位机中连接上面的设备路径，Ctrl+C退出")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sim.stop()
+        shutdown_logging()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+"""
+串口连接监督模块
+USB转串口被拔出时SerialComm关闭串口并通知本模块；监督线程按指数退避
+查找同一设备（按list_ports的VID/PID/序列号匹配，设备号可能变化，如ttyUSB0→ttyUSB1），
+重新插入后用原SerialComm重新连接——订阅、页面引用都保留，无需重新订阅
+
+    supervisor = ConnectionSupervisor(comm, on_state=callback)
+    supervisor.start()      # comm已连接后调用
+"""
+
+import os
+import threading
+import time
+from collections import namedtuple
+from typing import Callable, Optional
+
+from logger import get_logger
+
+log = get_logger('supervisor')
+
+# 连接状态
+CONNECTED = 'connected'
+RECONNECTING = 'reconnecting'
+STOPPED = 'stopped'
+
+STATE_TEXT = {
+    CONNECTED: '已连接',
+    RECONNECTING: '连接中断，正在重连',
+    STOPPED: '未连接',
+}
+
+# USB串口设备标识（非USB串口/pty各字段为None）
+DeviceId = namedtuple('DeviceId', 'vid pid serial_number')
+
+
+def identify(port: str) -> Optional[DeviceId]:
+    """查询串口设备的USB标识，非USB设备或查询失败返回None"""
+    import serial.tools.list_ports
+    try:
+        for info in serial.tools.list_ports.comports():
+            if info.device == port:
+                if info.vid is None:
+                    return None
+                return DeviceId(info.vid, info.pid, info.serial_number)
+    except Exception as e:
+        log.error("✗ 串口检测失败: %s", e)
+    return None
+
+
+def find_device(device: DeviceId) -> Optional[str]:
+    """按USB标识查找当前设备号，未插入时返回None"""
+    import serial.tools.list_ports
+    try:
+        for info in serial.tools.list_ports.comports():
+            if (info.vid == device.vid and info.pid == device.pid
+                    and (device.serial_number is None or info.serial_number == device.serial_number)):
+                return info.device
+    except Exception as e:
+        log.error("✗ 串口检测失败: %s", e)
+    return None
+
+
+class ConnectionSupervisor:
+    """
+    连接监督
+    - 连接中断时on_state(RECONNECTING, 端口)，重连成功时on_state(CONNECTED, 端口)，
+      均在后台线程中调用（UI需经TkBridge转到Tk线程）
+    - 重连间隔从backoff_initial开始每次翻倍，最大backoff_max；等待期间线程阻塞，不轮询
+    - locate: 自定义查找函数，返回可连接的端口或None；
+      默认按USB标识查找，无标识（板载串口、pty）时等待原设备路径重新出现
+    - connect: 自定义重连函数，返回是否成功；默认comm.connect()
+      （PortManager管理的串口需经PortManager.connect()重新交给I/O线程）
+    """
+
+    def __init__(self, comm, on_state: Optional[Callable[[str, str], None]] = None,
+                 backoff_initial: float = 0.05, backoff_max: float = 0.5,
+                 locate: Optional[Callable[[], Optional[str]]] = None,
+                 connect: Optional[Callable[[], bool]] = None):
+        self.comm = comm
+        self.on_state = on_state
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.locate = locate
+        self.connect = connect or comm.connect
+        self.device: Optional[DeviceId] = None
+        self.state = STOPPED
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.running = False
+        # 统计
+        self.reconnects = 0         # 重连成功次数
+        self.attempts = 0           # 重连尝试次数
+        self.last_downtime = 0.0    # 最近一次中断到重连成功的秒数
+        self._lost_at = 0.0
+
+    def start(self):
+        """开始监督（comm已连接后调用）"""
+        if self.running:
+            return
+        if self.locate is None:
+            self.device = identify(self.comm.port)
+            if self.device:
+                log.info("✓ 监督串口 %s (VID:PID %04X:%04X, SN %s)", self.comm.port,
+                         self.device.vid, self.device.pid, self.device.serial_number)
+        self.running = True
+        self.comm.on_link_lost = self._on_link_lost
+        self._set_state(CONNECTED if self.comm.is_connected else RECONNECTING)
+        if not self.comm.is_connected:
+            self._start_thread()
+
+    def stop(self):
+        """停止监督（不断开串口）"""
+        if not self.running:
+            return
+        self.running = False
+        if self.comm.on_link_lost == self._on_link_lost:
+            self.comm.on_link_lost = None
+        self._wake.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(1.0)
+        self._thread = None
+        self.state = STOPPED
+
+    def _set_state(self, state: str):
+        self.state = state
+        if self.on_state:
+            try:
+                self.on_state(state, self.comm.port)
+            except Exception as e:
+                log.error("✗ 连接状态回调异常: %s", e)
+
+    def _on_link_lost(self, error: Exception):
+        """SerialComm接收线程中调用：串口已关闭"""
+        if not self.running:
+            return
+        self._lost_at = time.monotonic()
+        self._set_state(RECONNECTING)
+        self._start_thread()
+
+    def _start_thread(self):
+        if self._thread and self._thread.is_alive():
+            self._wake.set()
+            return
+        self._wake.clear()
+        self._thread = threading.Thread(target=self._reconnect_loop, daemon=True, name='Supervisor')
+        self._thread.start()
+
+    def _find_port(self) -> Optional[str]:
+        if self.locate:
+            return self.locate()
+        if self.device:
+            return find_device(self.device)
+        port = self.comm.port
+        if os.name == 'posix' and not os.path.exists(port):
+            return None
+        return port
+
+    def _reconnect_loop(self):
+        """重连线程：指数退避查找设备并重新连接"""
+        delay = self.backoff_initial
+        while self.running and not self.comm.is_connected:
+            port = self._find_port()
+            if port:
+                self.attempts += 1
+                self.comm.port = port
+                if self.connect():
+                    self.reconnects += 1
+                    if self._lost_at:
+                        self.last_downtime = time.monotonic() - self._lost_at
+                    log.info("✓ 串口已重新连接: %s (中断%.2fs)", port, self.last_downtime)
+                    self._set_state(CONNECTED)
+                    return
+            if self._wake.wait(delay):
+                self._wake.clear()
+            delay = min(delay * 2, self.backoff_max)
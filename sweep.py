@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+"""
+上位机扫频模块
+由上位机生成扫频计划并逐点发送0x21命令，以f0.txt反馈作为确认，
+保持N条命令在途（滑动窗口），吞吐量只受链路速率限制而不受往返时间限制
+"""
+
+import math
+import threading
+import time
+from collections import deque
+from typing import Callable, Optional, Sequence, Tuple
+
+import numpy as np
+
+from frame_encoder import freq_frames
+from protocol import TOPIC_FREQ, parse_quantity
+
+
+# 下位机0xF0建模命令内置的扫频分段: (起始Hz, 终止Hz, 步进Hz)
+FIRMWARE_SEGMENTS = ((200, 50000, 25), (50000, 500000, 300))
+
+
+# ==================== 扫频计划 ====================
+
+def linear_plan(start: float, stop: float, step: float) -> np.ndarray:
+    """线性扫频：start到stop（含），步进step"""
+    count = int(np.floor((stop - start) / step + 1e-9)) + 1
+    return np.rint(start + np.arange(count) * step).astype(np.int64)
+
+
+def log_plan(start: float, stop: float, points: int) -> np.ndarray:
+    """对数扫频：start到stop共points点（整数Hz，去重）"""
+    freqs = np.rint(np.geomspace(start, stop, points)).astype(np.int64)
+    return np.unique(freqs)
+
+
+def piecewise_plan(segments: Sequence[Tuple[float, float, float]]) -> np.ndarray:
+    """分段线性扫频，相邻段的重复端点只保留一次"""
+    parts = [linear_plan(*seg) for seg in segments]
+    freqs = np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+    keep = np.ones(freqs.size, dtype=bool)
+    keep[1:] = freqs[1:] != freqs[:-1]
+    return freqs[keep]
+
+
+def firmware_plan() -> np.ndarray:
+    """与下位机process_scan()相同的扫频点（200Hz-50kHz步进25Hz，50kHz-500kHz步进300Hz）"""
+    return piecewise_plan(FIRMWARE_SEGMENTS)
+
+
+# ==================== 扫频引擎 ====================
+
+class SweepEngine:
+    """
+    滑动窗口扫频引擎
+    - 在独立线程中按计划发送频率命令，最多window条未确认
+    - 每收到一条f0.txt反馈，按频率值确认对应的在途命令；
+      串口按序传输，排在它之前仍未确认的命令视为丢失
+    - 在途命令超过ack_timeout未确认则记为超时并让出窗口
+    - level_topics: 每点的测量反馈主题（如vp0.txt）。下位机在f0.txt之后上报该点的电平，
+      此时该点在收到电平（或下一点的f0.txt、扫频结束）后才算完成，
+      保证电平属于本点而不是上一点
+    """
+
+    def __init__(self, serial_comm, freqs, window: int = 8, ack_timeout: float = 1.0,
+                 mode: int = 2, on_point: Optional[Callable] = None,
+                 level_topics: Sequence[str] = ()):
+        """
+        Args:
+            serial_comm: 已连接的SerialComm
+            freqs: 扫频点（Hz）
+            window: 最大在途命令数
+            ack_timeout: 单条命令确认超时（秒）
+            mode: 频率命令方式，1=0xF2, 2=0x21
+            on_point: 每确认一点时回调 on_point(freq, value, latency_s)，在接收线程中调用；
+                设置了level_topics时为 on_point(freq, value, latency_s, levels)，
+                levels为 {主题: 电平}，未收到的为nan
+            level_topics: 每点的测量反馈主题
+        """
+        self.serial = serial_comm
+        self.freqs = np.asarray(freqs, dtype=np.int64).ravel()
+        self.window = max(1, window)
+        self.ack_timeout = ack_timeout
+        self.mode = mode
+        self.on_point = on_point
+        self.level_topics = tuple(level_topics)
+
+        self._cond = threading.Condition()
+        self._outstanding = deque()     # 在途命令: (频率, 发送时间perf_counter)
+        self._measuring = None          # 已确认、等待电平反馈的点: (频率, 反馈值, 延迟, {主题: 电平})
+        self._thread: Optional[threading.Thread] = None
+        self._subscriber = None
+        self.running = False
+        self.done = threading.Event()
+        self.error: Optional[str] = None
+        # 进度
+        self.sent = 0
+        self.acked = 0
+        self.timeouts = 0
+        self.started_at = 0.0
+        self.finished_at = 0.0
+
+    @property
+    def total(self) -> int:
+        return int(self.freqs.size)
+
+    def start(self):
+        """开始扫频（后台线程）"""
+        if self.running:
+            return
+        self.running = True
+        self.done.clear()
+        self._measuring = None
+        self._subscriber = self.serial.subscribe(TOPIC_FREQ, self._on_feedback)
+        for topic in self.level_topics:
+            self.serial.subscribe(topic, self._on_level)
+        self.started_at = time.monotonic()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """中止扫频"""
+        with self._cond:
+            self.running = False
+            self._cond.notify_all()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """等待扫频结束，返回是否已结束"""
+        return self.done.wait(timeout)
+
+    def progress(self) -> dict:
+        """进度信息：已发送/已确认/超时点数，速率（点/秒）和预计剩余时间（秒）"""
+        end = self.finished_at if self.done.is_set() else time.monotonic()
+        elapsed = end - self.started_at if self.started_at else 0.0
+        completed = self.acked + self.timeouts
+        rate = completed / elapsed if elapsed > 0 else 0.0
+        remaining = self.total - completed
+        return {
+            'total': self.total,
+            'sent': self.sent,
+            'acked': self.acked,
+            'timeouts': self.timeouts,
+            'outstanding': len(self._outstanding),
+            'fraction': completed / self.total if self.total else 1.0,
+            'elapsed': elapsed,
+            'rate': rate,
+            'eta': remaining / rate if rate > 0 else None,
+            'done': self.done.is_set(),
+            'error': self.error,
+        }
+
+    def _on_feedback(self, obj_attr, value):
+        """f0.txt反馈：按频率值确认在途命令"""
+        try:
+            freq_fb = parse_quantity(value)[0]
+        except ValueError:
+            return
+        # 反馈显示最多保留3位有效小数（如 "1.50 kHz"），按0.5%容差匹配
+        tolerance = max(1.0, freq_fb * 0.005)
+        with self._cond:
+            outstanding = self._outstanding
+            index, best = -1, tolerance + 1e-6
+            for i, (freq, _) in enumerate(outstanding):
+                diff = abs(freq - freq_fb)
+                if diff < best:
+                    index, best = i, diff
+            if index < 0:
+                return      # 非本次扫频的反馈（如其他页面的操作）
+            freq, sent_at = outstanding[index]
+            for _ in range(index):
+                outstanding.popleft()
+                self.timeouts += 1
+            outstanding.popleft()
+            self.acked += 1
+            latency = time.perf_counter() - sent_at
+            previous = None
+            if self.level_topics:
+                # 上一点的电平未到齐：下位机已开始回复本点，不会再上报
+                previous, self._measuring = self._measuring, (freq, value, latency, {})
+            self._cond.notify_all()
+        if previous:
+            self._emit(previous)
+        if not self.level_topics:
+            self._emit((freq, value, latency, None))
+
+    def _on_level(self, obj_attr, value):
+        """测量反馈：属于最近确认的点"""
+        with self._cond:
+            point = self._measuring
+            if point is None or obj_attr in point[3]:
+                return      # 不属于等待中的点（如其他页面的操作）
+            try:
+                point[3][obj_attr] = parse_quantity(value)[0]
+            except ValueError:
+                return
+            if len(point[3]) < len(self.level_topics):
+                return
+            self._measuring = None
+            self._cond.notify_all()
+        self._emit(point)
+
+    def _emit(self, point):
+        if not self.on_point:
+            return
+        freq, value, latency, levels = point
+        if levels is None:
+            self.on_point(freq, value, latency)
+        else:
+            self.on_point(freq, value, latency,
+                          {topic: levels.get(topic, math.nan) for topic in self.level_topics})
+
+    def _expire(self):
+        """让出超时的在途命令（须持有锁），返回距最早在途命令超时的秒数"""
+        now = time.perf_counter()
+        outstanding = self._outstanding
+        while outstanding and now - outstanding[0][1] >= self.ack_timeout:
+            outstanding.popleft()
+            self.timeouts += 1
+        if outstanding:
+            return self.ack_timeout - (now - outstanding[0][1])
+        return self.ack_timeout
+
+    def _run(self):
+        """发送线程"""
+        frames = freq_frames(self.freqs, self.mode)
+        try:
+            for i in range(self.total):
+                with self._cond:
+                    while self.running and len(self._outstanding) >= self.window:
+                        self._cond.wait(self._expire())
+                    if not self.running:
+                        break
+                    self._outstanding.append((int(self.freqs[i]), time.perf_counter()))
+                if not self.serial.send_frame(frames[i].tobytes()):
+                    self.error = "发送失败"
+                    break
+                self.sent += 1
+            # 等待最后一批确认及最后一点的电平
+            with self._cond:
+                while self.running and self._outstanding and not self.error:
+                    self._cond.wait(self._expire())
+                deadline = time.perf_counter() + self.ack_timeout
+                while self.running and self._measuring is not None:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                point, self._measuring = self._measuring, None
+            if point:
+                self._emit(point)
+        finally:
+            self.serial.unsubscribe(TOPIC_FREQ, self._subscriber)
+            for topic in self.level_topics:
+                self.serial.unsubscribe(topic, self._on_level)
+            self.running = False
+            self.finished_at = time.monotonic()
+            self.done.set()
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+命令确认配对测试
+运行: python -m pytest tests
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from command_handle import CONFIRMED, FAILED, CommandHandle, ResponseMatcher
+from protocol import FRAME_CLEAR_BUFF, TOPIC_AMP, TOPIC_FREQ, TOPIC_PEAK, encode_freq, encode_voltage
+
+
+def send(matcher: ResponseMatcher, handle: CommandHandle):
+    """模拟写线程：登记并写出"""
+    matcher.written(matcher.expect(handle.frame, [handle]))
+
+
+def test_retry_then_second_send_pairs_in_order():
+    """h1的帧丢失、超时重发后，h2与重发的h1各自拿到自己的反馈，之后的发送仍按序配对"""
+    matcher = ResponseMatcher(timeout=1.0)
+    replies = []
+
+    def resend(handle):
+        handle._restart()
+        send(matcher, handle)
+        # 下位机只收到了h2和重发的h1
+        for value in replies:
+            matcher.observe(TOPIC_FREQ, value)
+
+    h1 = CommandHandle(encode_freq(1000), matcher, resend)
+    h2 = CommandHandle(encode_freq(2000), matcher, resend)
+    send(matcher, h1)
+    send(matcher, h2)
+    replies[:] = ["2000 Hz", "1000 Hz"]
+
+    assert h1.wait(0.05, retries=1)
+    assert h1.value == "1000 Hz"
+    assert h2.confirmed() and h2.value == "2000 Hz"
+    assert matcher.pending_count() == 0
+
+    h3 = CommandHandle(encode_freq(3000), matcher)
+    send(matcher, h3)
+    matcher.observe(TOPIC_FREQ, "3000 Hz")
+    assert h3.value == "3000 Hz"
+
+
+def test_withdraw_keeps_shared_entry():
+    """发送队列合并后共用的登记：重发只去掉该句柄，另一句柄仍等待原登记的反馈"""
+    matcher = ResponseMatcher(timeout=1.0)
+    old = CommandHandle(encode_freq(1000), matcher)
+    new = CommandHandle(encode_freq(2000), matcher)
+    matcher.written(matcher.expect(new.frame, [old, new]))
+
+    matcher.withdraw(old)
+    assert matcher.pending_count() == 1
+    matcher.observe(TOPIC_FREQ, "2000 Hz")
+    assert new.value == "2000 Hz"
+    assert not old.done()
+
+
+def test_lost_reply_fails_only_its_own_handle():
+    """1000Hz的反馈丢失：该句柄失败，后续句柄各自拿到自己的反馈而不整体错位"""
+    matcher = ResponseMatcher(timeout=1.0)
+    handles = [CommandHandle(encode_freq(freq), matcher) for freq in (1000, 2000, 3000)]
+    for handle in handles:
+        send(matcher, handle)
+    matcher.observe(TOPIC_FREQ, "2000 Hz")
+    matcher.observe(TOPIC_FREQ, "3000 Hz")
+    assert [(h.state, h.value) for h in handles] == [
+        (FAILED, None), (CONFIRMED, "2000 Hz"), (CONFIRMED, "3000 Hz")]
+    assert matcher.pending_count() == 0
+
+
+def test_unrelated_feedback_is_ignored():
+    """数值不一致的反馈（主动上报、其他来源）不确认任何句柄；数值按显示精度比较"""
+    matcher = ResponseMatcher(timeout=1.0)
+    freq = CommandHandle(encode_freq(1503), matcher)
+    peak = CommandHandle(encode_voltage(1.5, 'peak'), matcher)
+    send(matcher, freq)
+    send(matcher, peak)
+    matcher.observe(TOPIC_FREQ, "7000 Hz")
+    matcher.observe(TOPIC_PEAK, "0.71 V")
+    assert not freq.done() and not peak.done()
+    matcher.observe(TOPIC_FREQ, "1.50 kHz")
+    matcher.observe(TOPIC_PEAK, "1.50 V")
+    assert freq.value == "1.50 kHz" and peak.value == "1.50 V"
+
+
+def test_clear_buff_accepts_device_defaults():
+    """Clear Buff的反馈值由下位机决定，不核对数值"""
+    matcher = ResponseMatcher(timeout=1.0)
+    handle = CommandHandle(FRAME_CLEAR_BUFF, matcher)
+    send(matcher, handle)
+    for topic, value in ((TOPIC_FREQ, "1000 Hz"), (TOPIC_AMP, "1.00 V"), (TOPIC_PEAK, "1.00 V")):
+        matcher.observe(topic, value)
+    assert handle.value == {TOPIC_FREQ: "1000 Hz", TOPIC_AMP: "1.00 V", TOPIC_PEAK: "1.00 V"}
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""
+批量帧编码测试：输出与protocol.encode_*逐帧编码逐字节一致
+运行: python -m pytest tests
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from frame_encoder import encode_freq_array, encode_voltage_array
+from protocol import encode_freq, encode_voltage
+
+FREQS = [0, 1, 255, 256, 65535, 65536, 1000, 999_999, 2 ** 24 - 1, 2 ** 24, 2 ** 31, 0xFFFFFFFF]
+
+# 含×100后落在整数边界附近、按向零截断的小数（如0.29*100=28.999999999999996→28）
+VOLTAGES = [0, 0.01, 0.07, 0.29, 0.57, 1.005, 1.15, 2.675, 3.5, 4.35, 9.99, 10.0,
+            167772.15, 167772.16, 1e6]
+
+
+@pytest.mark.parametrize('mode', (1, 2))
+def test_freq_matches_protocol(mode):
+    expected = b''.join(encode_freq(f, mode) for f in FREQS)
+    assert encode_freq_array(FREQS, mode) == expected
+    assert encode_freq_array(np.array(FREQS, dtype=np.uint32), mode) == expected
+
+
+def test_float_freq_truncates_like_int():
+    freqs = [0.9, 1000.5, 1999.999]
+    assert encode_freq_array(freqs) == b''.join(encode_freq(int(f)) for f in freqs)
+
+
+@pytest.mark.parametrize('cmd_type', ('amp', 'peak'))
+def test_voltage_matches_protocol(cmd_type):
+    expected = b''.join(encode_voltage(v, cmd_type) for v in VOLTAGES)
+    assert encode_voltage_array(VOLTAGES, cmd_type) == expected
+
+
+def test_voltage_fine_grid_matches_protocol():
+    """0~100V每0.001V：逐帧与批量的截断结果处处一致"""
+    volts = [i / 1000 for i in range(100_001)]
+    assert encode_voltage_array(volts) == b''.join(encode_voltage(v) for v in volts)
+
+
+def test_out_of_range_rejected():
+    with pytest.raises(ValueError):
+        encode_freq_array([0x1_0000_0000])
+    with pytest.raises(ValueError):
+        encode_freq_array([-1])
+    with pytest.raises(ValueError):
+        encode_voltage_array([-0.01])
+
+
+def test_empty():
+    assert encode_freq_array([]) == b''
+    assert encode_voltage_array([]) == b''
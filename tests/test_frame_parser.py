@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+反馈帧解析测试（不依赖pyserial）
+运行: python -m pytest tests
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from frame_parser import TERMINATOR, FrameParser
+
+
+def frame(obj_attr: str, value: str) -> bytes:
+    return f'{obj_attr}="{value}"'.encode() + TERMINATOR
+
+
+def feed_all(parser: FrameParser, *chunks) -> list:
+    result = []
+    for chunk in chunks:
+        result.extend(parser.feed(chunk))
+    return result
+
+
+def test_terminator_split_across_chunks():
+    """结束符在任意位置被拆开都能拼出完整帧"""
+    data = frame('f0.txt', '1000 Hz') + frame('v0.txt', '3.50 V')
+    for cut in range(1, len(data)):
+        parser = FrameParser()
+        assert feed_all(parser, data[:cut], data[cut:]) == [('f0.txt', '1000 Hz'), ('v0.txt', '3.50 V')]
+        assert parser.pending == 0
+
+
+def test_byte_by_byte():
+    parser = FrameParser()
+    data = frame('vp0.txt', '5.00 V') * 3
+    assert feed_all(parser, *(data[i:i + 1] for i in range(len(data)))) == [('vp0.txt', '5.00 V')] * 3
+    assert parser.frames == 3 and parser.bytes == len(data)
+
+
+def test_garbage_overflow_is_capped():
+    """超过max_frame仍无结束符的数据被丢弃，缓冲区不随垃圾数据增长，之后的帧正常解析"""
+    parser = FrameParser(max_frame=64)
+    assert feed_all(parser, b'\x00' * 1000) == []
+    assert parser.dropped == 1
+    assert parser.pending == 0
+    assert feed_all(parser, frame('f0.txt', '2000 Hz')) == [('f0.txt', '2000 Hz')]
+
+
+def test_garbage_overflow_keeps_terminator_prefix():
+    """丢弃垃圾数据时保留末尾可能是结束符开头的字节"""
+    parser = FrameParser(max_frame=16)
+    assert feed_all(parser, b'x' * 32 + b'\xff\xff') == []
+    assert feed_all(parser, b'\xff' + frame('f0.txt', '1 Hz')) == [('f0.txt', '1 Hz')]
+    assert parser.dropped == 2      # 垃圾段 + 没有'='的残段
+
+
+def test_frame_exactly_at_max_frame():
+    """恰好max_frame字节的帧（结束符在下一块）保留；多1字节则视为垃圾"""
+    body = b'f0.txt="' + b'9' * 20 + b'"'
+    parser = FrameParser(max_frame=len(body))
+    assert feed_all(parser, body) == []
+    assert feed_all(parser, TERMINATOR) == [('f0.txt', '9' * 20)]
+    assert parser.dropped == 0
+
+    parser = FrameParser(max_frame=len(body) - 1)
+    assert feed_all(parser, body, TERMINATOR) == []
+    assert parser.dropped == 2      # 超长段 + 结束符前没有'='的残段
+    assert feed_all(parser, frame('f0.txt', '1 Hz')) == [('f0.txt', '1 Hz')]
+
+
+def test_frame_ending_at_chunk_boundary():
+    """帧恰好在块末尾结束时缓冲区清空"""
+    parser = FrameParser()
+    assert feed_all(parser, frame('f0.txt', '1000 Hz')) == [('f0.txt', '1000 Hz')]
+    assert parser.pending == 0 and len(parser._buffer) == 0
+
+
+def test_buffer_compaction():
+    """大量已消费数据之后跟着半帧：已消费部分前移回收，半帧在下一块补全"""
+    parser = FrameParser()
+    data = frame('f0.txt', '1000 Hz') * 1000
+    tail = frame('v0.txt', '1.00 V')
+    assert len(feed_all(parser, data + tail[:5])) == 1000
+    assert len(parser._buffer) == 5 and parser.pending == 5
+    assert feed_all(parser, tail[5:]) == [('v0.txt', '1.00 V')]
+    assert parser.pending == 0
+
+
+def test_unconsumed_frames_continue_on_next_feed():
+    """未遍历完的帧在下次feed时继续产出"""
+    parser = FrameParser()
+    frames = parser.feed(frame('f0.txt', '1 Hz') + frame('f0.txt', '2 Hz'))
+    assert next(frames) == ('f0.txt', '1 Hz')
+    assert list(parser.feed(frame('f0.txt', '3 Hz'))) == [('f0.txt', '2 Hz'), ('f0.txt', '3 Hz')]
+
+
+def test_frame_without_separator_is_dropped():
+    parser = FrameParser()
+    assert feed_all(parser, b'garbage' + TERMINATOR + frame('f0.txt', '1 Hz')) == [('f0.txt', '1 Hz')]
+    assert parser.dropped == 1
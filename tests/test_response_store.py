@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""
+扫频数据存储测试：内存块扩容、落盘到memmap、load()读回
+运行: python -m pytest tests
+"""
+
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from response_store import RECORD_DTYPE, ResponseStore
+
+
+def fill(store: ResponseStore, count: int, start: int = 0):
+    for i in range(start, start + count):
+        store.append(1000.0 + i, amp=i / 100, peak=i / 200, t=float(i))
+
+
+def check_rows(data: np.ndarray, count: int):
+    assert data.dtype == RECORD_DTYPE
+    assert len(data) == count
+    index = np.arange(count)
+    assert np.array_equal(data['t'], index)
+    assert np.array_equal(data['freq'], 1000.0 + index)
+    assert np.array_equal(data['amp'], index / 100)
+    assert np.array_equal(data['peak'], index / 200)
+
+
+def test_memory_store_grows_beyond_chunk():
+    """无文件时内存块写满后扩容，数据不丢"""
+    store = ResponseStore(chunk_size=8)
+    fill(store, 100)
+    assert len(store) == 100
+    check_rows(store.data(), 100)
+    check_rows(store.tail(1000), 100)
+    assert np.array_equal(store.tail(3)['t'], [97, 98, 99])
+
+
+def test_default_amp_peak_are_nan():
+    store = ResponseStore(chunk_size=4)
+    store.append(1000.0)
+    assert np.isnan(store.data()['amp'][0]) and np.isnan(store.data()['peak'][0])
+
+
+def test_spill_to_memmap(tmp_path):
+    """有文件时写满的块落盘，内存块大小不变；文件容量按倍数增长"""
+    path = str(tmp_path / 'run.npy')
+    store = ResponseStore(path, chunk_size=16)
+    fill(store, 16 * 5 + 3)
+    assert len(store._chunk) == 16
+    assert store._spilled == 16 * 5 and store._count == 3
+    assert store._capacity >= store._spilled
+    check_rows(store.data(), 83)
+    # 落盘后的行数已写入文件头，未关闭也能读出已落盘部分
+    check_rows(ResponseStore.load(path), 80)
+    store.close()
+
+
+def test_since_spans_spilled_and_memory(tmp_path):
+    store = ResponseStore(str(tmp_path / 'run.npy'), chunk_size=16)
+    fill(store, 50)
+    for start in (0, 10, 47, 48, 50):
+        assert np.array_equal(store.since(start)['t'], np.arange(start, 50))
+    store.close()
+
+
+def test_close_and_load_round_trip(tmp_path):
+    """关闭时截掉多分配的空间；load()得到只读memmap，内容与写入一致"""
+    path = str(tmp_path / 'sub' / 'run.npy')
+    store = ResponseStore(path, chunk_size=32)
+    fill(store, 1000)
+    store.close()
+    assert os.path.getsize(path) == 256 + 1000 * RECORD_DTYPE.itemsize
+    loaded = ResponseStore.load(path)
+    assert isinstance(loaded, np.memmap) and not loaded.flags.writeable
+    check_rows(loaded, 1000)
+    # 关闭后data()仍可读取
+    check_rows(store.data(), 1000)
+    # 标准np.load也能读
+    check_rows(np.load(path), 1000)
+
+
+def test_empty_file_round_trip(tmp_path):
+    path = str(tmp_path / 'empty.npy')
+    store = ResponseStore(path, chunk_size=8)
+    store.close()
+    assert len(ResponseStore.load(path)) == 0
+
+
+def test_list_runs_newest_first(tmp_path):
+    for name in ('20260101_000000.npy', '20260102_000000.npy', 'notes.txt'):
+        (tmp_path / name).write_bytes(b'')
+    runs = ResponseStore.list_runs(str(tmp_path))
+    assert [os.path.basename(p) for p in runs] == ['20260102_000000.npy', '20260101_000000.npy']
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+接收线程 → Tk主循环 的线程安全桥接
+接收线程只把更新放入待处理表，由Tk主循环按固定after()节拍统一取出执行
+"""
+
+import threading
+from typing import Callable, Dict, Hashable, Tuple
+
+from logger import get_logger
+
+log = get_logger('ui')
+
+
+class TkBridge:
+    """
+    合并式UI更新桥
+    - post() 可在任意线程调用，只做加锁入表
+    - 同一节拍内同一key只保留最新一次更新（如1kHz的f0.txt反馈每帧最多刷新一次标签）
+    - 待处理表超过max_pending时，新key的更新被丢弃并计数
+    """
+
+    def __init__(self, root, interval_ms: int = 16, max_pending: int = 1024):
+        self.root = root
+        self.interval_ms = interval_ms
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._pending: Dict[Hashable, Tuple[Callable, tuple]] = {}
+        self._after_id = None
+        self.running = False
+        # 统计计数
+        self.queued = 0        # post() 总次数
+        self.coalesced = 0     # 被同key新值覆盖的更新数
+        self.dropped = 0       # 因队列满或桥已停止而丢弃的更新数
+        self.delivered = 0     # 在Tk线程中实际执行的更新数
+        self.ticks = 0         # 有更新需要执行的节拍数
+
+    def start(self):
+        """开始按节拍处理（须在Tk线程调用）"""
+        if not self.running:
+            self.running = True
+            self._after_id = self.root.after(self.interval_ms, self._tick)
+
+    def stop(self):
+        """停止处理并丢弃未执行的更新（须在Tk线程调用）"""
+        self.running = False
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+        with self._lock:
+            self.dropped += len(self._pending)
+            self._pending = {}
+
+    def post(self, key: Hashable, callback: Callable, *args):
+        """提交一次UI更新（线程安全），同key未执行的旧更新会被覆盖"""
+        with self._lock:
+            self.queued += 1
+            if not self.running:
+                self.dropped += 1
+            elif key in self._pending:
+                self.coalesced += 1
+                self._pending[key] = (callback, args)
+            elif len(self._pending) >= self.max_pending:
+                self.dropped += 1
+            else:
+                self._pending[key] = (callback, args)
+
+    def wrap(self, callback: Callable) -> Callable:
+        """
+        包装反馈回调，返回可直接交给SerialComm.subscribe的订阅者
+        以(callback, obj_attr)为合并key，callback将在Tk线程中执行
+        """
+        def subscriber(obj_attr, value):
+            self.post((callback, obj_attr), callback, obj_attr, value)
+        return subscriber
+
+    def stats(self) -> dict:
+        """返回统计计数"""
+        with self._lock:
+            return {
+                'queued': self.queued,
+                'coalesced': self.coalesced,
+                'dropped': self.dropped,
+                'delivered': self.delivered,
+                'pending': len(self._pending),
+                'ticks': self.ticks,
+            }
+
+    def _tick(self):
+        """Tk节拍：取出本节拍全部待处理更新并执行"""
+        with self._lock:
+            batch, self._pending = self._pending, {}
+        if batch:
+            self.ticks += 1
+            for callback, args in batch.values():
+                try:
+                    callback(*args)
+                except Exception as e:
+                    log.error("✗ UI更新错误: %s", e)
+            self.delivered += len(batch)
+        if self.running:
+            self._after_id = self.root.after(self.interval_ms, self._tick)
@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+"""
+发送队列模块
+send_*命令只把帧放入有界队列，由独立写线程批量写出串口
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Callable, Iterable, Optional
+
+from logger import get_logger
+
+log = get_logger('tx')
+
+
+class TokenBucket:
+    """令牌桶限速：平均每秒rate帧，允许最多burst帧的突发"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._last = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def take(self, count: int) -> int:
+        """尽量取出count个令牌，返回实际取得的数量"""
+        self._refill()
+        granted = min(count, int(self._tokens))
+        self._tokens -= granted
+        return granted
+
+    def wait_time(self) -> float:
+        """距下一个令牌可用的秒数"""
+        self._refill()
+        return max(0.0, (1 - self._tokens) / self.rate)
+
+
+class TxWriter:
+    """
+    非阻塞发送队列 + 写线程
+    - put() 只做入队，立即返回；队列满时拒绝并计数
+    - 写线程一次取走所有已排队的帧，合并为一次write()
+    - coalesce_opcodes中的命令按命令码"后者覆盖前者"：
+      同类命令尚在排队时，新帧直接替换旧帧内容，不再占用新位置
+    - 可选令牌桶限速，防止下位机串口中断被连续命令淹没
+    - put()可附带句柄（如CommandHandle），写出前通过on_write(帧列表, 句柄列表)交给调用方；
+      被合并的帧的句柄转挂到替换它的新帧上
+    - on_write的返回值在写出后交给on_written(返回值, 异常)，写出成功时异常为None，
+      写出失败（该批帧被丢弃）时调用方据此撤销登记、让句柄失败
+    """
+
+    def __init__(self, write_func: Callable[[bytes], None], maxsize: int = 256,
+                 max_batch: int = 4096, coalesce_opcodes: Iterable[int] = (),
+                 rate_limit: float = 0, burst: int = 1,
+                 on_write: Optional[Callable[[list, list], object]] = None,
+                 on_written: Optional[Callable[[object, Optional[Exception]], None]] = None):
+        self.write_func = write_func    # 实际写出函数（如 serial.write + flush）
+        self.on_write = on_write        # 写出前回调（写线程中调用）
+        self.on_written = on_written    # 写出完成/失败回调（写线程中调用）
+        self.maxsize = maxsize          # 队列最大帧数
+        self.max_batch = max_batch      # 单次write()最大字节数
+        self.coalesce_opcodes = frozenset(coalesce_opcodes)
+        self.bucket: Optional[TokenBucket] = TokenBucket(rate_limit, burst) if rate_limit > 0 else None
+        self._queue = deque()           # 元素: [帧, 入队时间perf_counter, 句柄列表或None]
+        self._latest = {}               # 命令码 -> 队列中尚未发出的同类帧条目
+        lock = threading.Lock()
+        self._cond = threading.Condition(lock)      # 通知写线程：有新帧/停止
+        self._idle = threading.Condition(lock)      # 通知flush()：队列已写空
+        self._in_flight = 0             # 已取出、正在写出的帧数
+        self._thread = None
+        self.running = False
+        # 统计
+        self.enqueued = 0       # 入队帧数
+        self.rejected = 0       # 队列满被拒绝的帧数
+        self.coalesced = 0      # 被新值覆盖而未发送的帧数
+        self.throttled = 0      # 因限速而等待的次数
+        self.sent = 0           # 已写出帧数
+        self.batches = 0        # write()调用次数
+        self.errors = 0         # 写出失败次数
+        self.max_depth = 0      # 历史最大队列深度
+        self.last_latency = 0.0     # 最近一批首帧的入队→写完延迟（秒）
+        self.max_latency = 0.0
+        self._latency_sum = 0.0
+
+    @property
+    def depth(self) -> int:
+        """当前队列深度"""
+        return len(self._queue)
+
+    def start(self):
+        """启动写线程"""
+        if self.running:
+            return
+        self.running = True
+        self._thread = threading.Thread(target=self._writer_loop, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 1.0):
+        """停止写线程（先尽量写完已排队的帧）"""
+        with self._cond:
+            self.running = False
+            self._cond.notify()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+        self._thread = None
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """等待已排队的帧全部写出，返回是否在timeout内写完"""
+        with self._cond:
+            return self._idle.wait_for(lambda: not self._queue and not self._in_flight, timeout)
+
+    def put(self, frame: bytes, coalesce: bool = True, handle=None) -> bool:
+        """
+        入队一帧，队列满或已停止时返回False
+        coalesce=False时该帧一定会单独发出（如扫频中的逐点命令）
+        handle: 随该帧一起交给on_write的句柄
+        """
+        with self._cond:
+            if not self.running:
+                self.rejected += 1
+                return False
+            self.enqueued += 1
+            opcode = frame[0]
+            coalescible = opcode in self.coalesce_opcodes
+            coalesce = coalesce and coalescible
+            if coalesce:
+                entry = self._latest.get(opcode)
+                if entry is not None:
+                    # 同类命令尚未发出：直接替换为最新值
+                    entry[0] = frame
+                    if handle is not None:
+                        if entry[2] is None:
+                            entry[2] = []
+                        entry[2].append(handle)
+                    self.coalesced += 1
+                    return True
+            elif not coalescible:
+                # 动作命令是合并屏障：其后的参数命令不能并入其前的旧帧
+                # （例如 频率A, Clear Buff, 频率B 不能变成 频率B, Clear Buff）
+                self._latest.clear()
+            else:
+                # 不可合并的参数帧只对同类命令是屏障（旧帧不能越过本帧），其他命令的合并不受影响
+                self._latest.pop(opcode, None)
+            if len(self._queue) >= self.maxsize:
+                self.enqueued -= 1
+                self.rejected += 1
+                return False
+            entry = [frame, time.perf_counter(), [handle] if handle is not None else None]
+            self._queue.append(entry)
+            if coalesce:
+                self._latest[opcode] = entry
+            depth = len(self._queue)
+            if depth > self.max_depth:
+                self.max_depth = depth
+            self._cond.notify()
+        return True
+
+    def stats(self) -> dict:
+        """返回队列和写出延迟统计"""
+        with self._cond:
+            return {
+                'depth': len(self._queue),
+                'max_depth': self.max_depth,
+                'enqueued': self.enqueued,
+                'rejected': self.rejected,
+                'coalesced': self.coalesced,
+                'throttled': self.throttled,
+                'sent': self.sent,
+                'batches': self.batches,
+                'errors': self.errors,
+                'last_latency_ms': self.last_latency * 1000,
+                'avg_latency_ms': self._latency_sum / self.batches * 1000 if self.batches else 0.0,
+                'max_latency_ms': self.max_latency * 1000,
+            }
+
+    def _take_batch(self, limit: int):
+        """取出至多limit帧（须持有锁），返回(帧列表, 句柄列表, 首帧入队时间)"""
+        queue = self._queue
+        latest = self._latest
+        first_time = queue[0][1]
+        frames = []
+        handles = []
+        size = 0
+        while queue and len(frames) < limit and (not frames or size + len(queue[0][0]) <= self.max_batch):
+            entry = queue.popleft()
+            frame = entry[0]
+            if latest.get(frame[0]) is entry:
+                del latest[frame[0]]
+            frames.append(frame)
+            handles.append(entry[2])
+            size += len(frame)
+        return frames, handles, first_time
+
+    def _written(self, registered, error: Optional[Exception]):
+        if self.on_written is None:
+            return
+        try:
+            self.on_written(registered, error)
+        except Exception as e:
+            log.error("✗ 写出回调异常: %s", e)
+
+    def _writer_loop(self):
+        """写线程：等待入队，按令牌桶限额批量写出"""
+        while True:
+            with self._cond:
+                while self.running and not self._queue:
+                    self._cond.wait()
+                if not self._queue:
+                    break
+                limit = len(self._queue)
+                if self.bucket and self.running:
+                    limit = self.bucket.take(limit)
+                    if limit == 0:
+                        # 等待令牌期间新到的同类命令仍可合并
+                        self.throttled += 1
+                        self._cond.wait(self.bucket.wait_time())
+                        continue
+                frames, handles, first_time = self._take_batch(limit)
+                count = len(frames)
+                self._in_flight = count
+            registered = None
+            try:
+                if self.on_write:
+                    registered = self.on_write(frames, handles)
+                self.write_func(b''.join(frames))
+            except Exception as e:
+                self.errors += 1
+                log.error("✗ 串口写入失败: %s", e)
+                self._written(registered, e)
+                continue
+            finally:
+                with self._cond:
+                    self._in_flight = 0
+                    if not self._queue:
+                        self._idle.notify_all()
+            self._written(registered, None)
+            latency = time.perf_counter() - first_time
+            self.sent += count
+            self.batches += 1
+            self.last_latency = latency
+            self._latency_sum += latency
+            if latency > self.max_latency:
+                self.max_latency = latency
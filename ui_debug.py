@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+"""
+串口调试页面
+定时从SerialComm的收发帧环形缓冲中取出新条目显示，收发线程不等待界面
+"""
+
+import os
+import time
+import tkinter as tk
+from tkinter import messagebox
+import ttkbootstrap as ttk
+from ttkbootstrap.constants import *
+from config import *
+from logger import FrameRing, get_level, set_level
+
+
+class SerialDebugView(tk.Frame):
+    """串口调试页面"""
+
+    LOG_LEVELS = ('DEBUG', 'INFO', 'WARNING')
+
+    def __init__(self, parent, serial_comm, navigate_callback):
+        super().__init__(parent, bg=COLOR_BG)
+        self.serial = serial_comm
+        self.navigate = navigate_callback
+
+        self.last_seq = 0       # 已显示的最后一条帧序号
+        self.paused = False
+        self.level_var = tk.StringVar(value=get_level())
+
+        self.setup_ui()
+        self.refresh()
+
+    def setup_ui(self):
+        """初始化UI"""
+        # 顶部状态栏
+        status_frame = tk.Frame(self, bg='#2196F3', height=50)
+        status_frame.pack(fill=tk.X)
+        status_frame.pack_propagate(False)
+
+        tk.Label(
+            status_frame,
+            text="串口调试",
+            font=FONT_TITLE,
+            bg='#2196F3',
+            fg='white'
+        ).pack(pady=10)
+
+        # 工具栏
+        tool_frame = tk.Frame(self, bg=COLOR_BG)
+        tool_frame.pack(fill=tk.X, padx=20, pady=(10, 0))
+
+        tk.Label(tool_frame, text="日志级别:", font=FONT_LABEL, bg=COLOR_BG).pack(side=tk.LEFT)
+        level_combo = ttk.Combobox(
+            tool_frame,
+            textvariable=self.level_var,
+            values=self.LOG_LEVELS,
+            font=FONT_LABEL,
+            width=10,
+            state='readonly'
+        )
+        level_combo.pack(side=tk.LEFT, padx=5)
+        level_combo.bind('<<ComboboxSelected>>', lambda e: set_level(self.level_var.get()))
+
+        self.pause_btn = ttk.Button(
+            tool_frame,
+            text="暂停",
+            command=self.toggle_pause,
+            bootstyle="warning-outline",
+            width=10
+        )
+        self.pause_btn.pack(side=tk.LEFT, padx=10)
+
+        ttk.Button(
+            tool_frame,
+            text="清空",
+            command=self.clear,
+            bootstyle="secondary-outline",
+            width=10
+        ).pack(side=tk.LEFT)
+
+        self.capture_btn = ttk.Button(
+            tool_frame,
+            text="开始录制",
+            command=self.toggle_capture,
+            bootstyle="danger-outline",
+            width=10
+        )
+        self.capture_btn.pack(side=tk.LEFT, padx=10)
+
+        self.stats_label = tk.Label(tool_frame, text="", font=FONT_STATUS, bg=COLOR_BG, fg='#606060')
+        self.stats_label.pack(side=tk.RIGHT)
+
+        # 收发帧列表
+        text_frame = tk.Frame(self, bg=COLOR_BG)
+        text_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=10)
+
+        scrollbar = ttk.Scrollbar(text_frame)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.text = tk.Text(
+            text_frame,
+            font=('Consolas', 10),
+            bg='#000000',
+            fg='#00FF00',
+            state=tk.DISABLED,
+            wrap=tk.NONE,
+            yscrollcommand=scrollbar.set
+        )
+        self.text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.config(command=self.text.yview)
+
+        # 底部按钮
+        bottom_frame = tk.Frame(self, bg=COLOR_BG)
+        bottom_frame.pack(fill=tk.X, padx=20, pady=10)
+
+        ttk.Button(
+            bottom_frame,
+            text="返回",
+            command=lambda: self.navigate(0),
+            bootstyle="secondary",
+            width=15
+        ).pack(side=tk.RIGHT, padx=10)
+
+    def refresh(self):
+        """定时取出新的收发帧（一次插入，超过FRAME_RING_SIZE行时删除最早的行）"""
+        if not self.winfo_exists():
+            return      # 页面已销毁（重新连接串口）
+        if self.serial and not self.paused and self.winfo_ismapped():
+            entries = self.serial.frames.since(self.last_seq)
+            if entries:
+                self.last_seq = entries[-1][0]
+                text = '\n'.join(FrameRing.format(entry) for entry in entries) + '\n'
+                self.text.config(state=tk.NORMAL)
+                self.text.insert(tk.END, text)
+                lines = int(self.text.index('end-1c').split('.')[0]) - 1
+                if lines > FRAME_RING_SIZE:
+                    self.text.delete('1.0', f"{lines - FRAME_RING_SIZE + 1}.0")
+                self.text.config(state=tk.DISABLED)
+                self.text.see(tk.END)
+            self.update_stats()
+        self.after(DEBUG_REFRESH_MS, self.refresh)
+
+    def update_stats(self):
+        """收发统计"""
+        parser = self.serial.parser
+        text = f"接收 {parser.frames}帧  丢弃 {parser.dropped}段"
+        tx = self.serial.tx_stats()
+        if tx:
+            text += f"  发送 {tx['sent']}帧  队列 {tx['depth']}"
+        capture = self.serial.capture
+        if capture:
+            text += f"  录制 {capture.bytes}字节"
+        self.stats_label.config(text=text)
+
+    def toggle_pause(self):
+        """暂停/继续刷新（暂停期间的帧仍保留在环形缓冲中）"""
+        self.paused = not self.paused
+        self.pause_btn.config(text="继续" if self.paused else "暂停")
+
+    def toggle_capture(self):
+        """开始/停止录制原始收发数据"""
+        if not (self.serial and self.serial.is_connected):
+            messagebox.showwarning("警告", "串口未连接")
+            return
+        if self.serial.capture:
+            self.serial.stop_capture()
+            self.capture_btn.config(text="开始录制", bootstyle="danger-outline")
+            return
+        os.makedirs(CAPTURE_DIR, exist_ok=True)
+        path = os.path.join(CAPTURE_DIR, time.strftime('capture_%Y%m%d_%H%M%S.bin'))
+        try:
+            self.serial.start_capture(path)
+        except OSError as e:
+            messagebox.showerror("错误", f"无法创建录制文件:\n{e}")
+            return
+        self.capture_btn.config(text="停止录制", bootstyle="danger")
+
+    def clear(self):
+        """清空显示"""
+        self.text.config(state=tk.NORMAL)
+        self.text.delete('1.0', tk.END)
+        self.text.config(state=tk.DISABLED)
+        if self.serial:
+            entries = self.serial.frames.since(self.last_seq)
+            if entries:
+                self.last_seq = entries[-1][0]
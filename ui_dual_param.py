@@ -8,15 +8,20 @@ from tkinter import messagebox
 import ttkbootstrap as ttk
 from ttkbootstrap.constants import *
 from config import *
+from protocol import CMD_AMP, CMD_FREQ_MODE2
+from logger import get_logger
+
+log = get_logger('ui')
 
 
 class DualParamControl(tk.Frame):
     """双参数控制页面"""
     
-    def __init__(self, parent, serial_comm, navigate_callback):
+    def __init__(self, parent, serial_comm, navigate_callback, bridge):
         super().__init__(parent, bg=COLOR_BG)
         self.serial = serial_comm
         self.navigate = navigate_callback
+        self.bridge = bridge  # 接收线程 → Tk主循环的更新桥
         
         # 状态变量
         self.state1 = tk.IntVar(value=1)  # 0=停止, 1=运行
@@ -27,6 +32,7 @@ class DualParamControl(tk.Frame):
         
         self.setup_ui()
         self.setup_serial_callback()
+        self.update_latency()
     
     def setup_ui(self):
         """初始化UI"""
@@ -162,6 +168,16 @@ class DualParamControl(tk.Frame):
         main_frame.grid_columnconfigure(0, weight=1)
         main_frame.grid_columnconfigure(1, weight=1)
         
+        # 反馈延迟统计
+        self.latency_label = tk.Label(
+            self,
+            text="反馈延迟  --",
+            font=FONT_STATUS,
+            bg=COLOR_BG,
+            fg='#606060'
+        )
+        self.latency_label.pack(fill=tk.X, padx=20)
+        
         # 底部控制按钮
         bottom_frame = tk.Frame(self, bg=COLOR_BG)
         bottom_frame.pack(fill=tk.X, padx=20, pady=10)
@@ -192,19 +208,32 @@ class DualParamControl(tk.Frame):
         ).pack(side=tk.RIGHT, padx=10)
     
     def setup_serial_callback(self):
-        """设置串口接收回调"""
+        """观察下位机状态变化（经更新桥在Tk线程中执行，数值不变的反馈不刷新）"""
         if self.serial:
-            self.serial.set_receive_callback(self.on_serial_receive)
+            device = self.serial.device
+            device.observe('freq', self.bridge.wrap(self.on_freq_feedback))
+            device.observe('amp', self.bridge.wrap(self.on_amp_feedback))
+            # 页面创建前已收到的状态
+            self.f0_text.set(device.text('freq') or self.f0_text.get())
+            self.v0_text.set(device.text('amp') or self.v0_text.get())
+    
+    def on_freq_feedback(self, field, value):
+        """频率变化"""
+        self.f0_text.set(self.serial.device.text(field))
+        log.debug("← 频率: %sHz", value)
+    
+    def on_amp_feedback(self, field, value):
+        """幅值变化"""
+        self.v0_text.set(self.serial.device.text(field))
+        log.debug("← 幅值: %sV", value)
     
-    def on_serial_receive(self, obj_attr, value):
-        """串口接收回调"""
-        # 更新显示值
-        if obj_attr == 'f0.txt':
-            self.f0_text.set(value)
-            print(f"← 接收频率反馈: {value}")
-        elif obj_attr == 'v0.txt':
-            self.v0_text.set(value)
-            print(f"← 接收幅值反馈: {value}")
+    def update_latency(self):
+        """定时刷新命令→反馈延迟（p50/p99/超时数）"""
+        if not self.winfo_exists():
+            return      # 页面已销毁（重新连接串口）
+        if self.serial and self.winfo_ismapped():
+            self.latency_label.config(text=self.serial.latency.summary((CMD_FREQ_MODE2, CMD_AMP)))
+        self.after(LATENCY_REFRESH_MS, self.update_latency)
     
     def increment_value(self, var, increment):
         """增加变量值"""
@@ -32,7 +32,7 @@ class MainMenu(tk.Frame):
             ("基础任务(2) - 双参数控制", lambda: self.navigate(7)),
             ("基础任务(3、4) - 三参数控制", lambda: self.navigate(8)),
             ("发挥部分 - 系统建模", lambda: self.navigate(9)),
-            ("串口调试", lambda: self.navigate(7)),
+            ("串口调试", lambda: self.navigate(10)),
             ("RESET", self.on_reset),
             ("退出程序", self.on_exit),
         ]
@@ -3,24 +3,48 @@
 系统建模控制页面
 """
 
+import math
+import os
+import time
 import tkinter as tk
-from tkinter import messagebox
+from tkinter import filedialog, messagebox
 import ttkbootstrap as ttk
 from ttkbootstrap.constants import *
 from config import *
+from filter_analysis import analyze, describe, gain_from_record
+from logger import get_logger
+from protocol import TOPIC_PEAK
+from response_store import ResponseStore
+from sweep import SweepEngine, firmware_plan, linear_plan, log_plan
+from ui_plot import LivePlot
+
+log = get_logger('ui')
+
+
+# 上位机扫频计划
+SWEEP_PLANS = {
+    "固件分段 200Hz-500kHz": firmware_plan,
+    "对数 10Hz-1MHz (1000点)": lambda: log_plan(10, 1000000, 1000),
+    "线性 1kHz-100kHz (步进100Hz)": lambda: linear_plan(1000, 100000, 100),
+}
 
 
 class SystemModeling(tk.Frame):
     """系统建模页面"""
     
-    def __init__(self, parent, serial_comm, navigate_callback):
+    def __init__(self, parent, serial_comm, navigate_callback, bridge):
         super().__init__(parent, bg=COLOR_BG)
         self.serial = serial_comm
         self.navigate = navigate_callback
+        self.bridge = bridge  # 接收线程 → Tk主循环的更新桥
         
         # 按钮状态（通过颜色值判断）
         self.b9_active = False  # 建模按钮状态
         self.b0_active = False  # 启动按钮状态
+        self.sweep_engine = None  # 上位机扫频引擎
+        self.sweep_store = None   # 本次扫频的数据存储
+        self.plotted = 0          # 本次扫频已送入曲线控件的点数
+        self.analysis = None      # 最近一次扫频数据的上位机分析结果（filter_analysis.FilterResult）
         
         self.setup_ui()
         self.setup_serial_callback()
@@ -43,11 +67,11 @@ class SystemModeling(tk.Frame):
         
         # 主控制区域
         main_frame = tk.Frame(self, bg=COLOR_BG)
-        main_frame.pack(fill=tk.BOTH, expand=True, padx=40, pady=30)
+        main_frame.pack(fill=tk.BOTH, expand=True, padx=40, pady=10)
         
         # === 第一部分：一键学习 ===
         section1_frame = tk.Frame(main_frame, bg=COLOR_BG)
-        section1_frame.pack(fill=tk.X, pady=20)
+        section1_frame.pack(fill=tk.X, pady=5)
         
         tk.Label(
             section1_frame,
@@ -82,16 +106,17 @@ class SystemModeling(tk.Frame):
             font=('Arial', 12),
             bg='#000000',
             fg='#00FF00',
+            justify=tk.LEFT,
             pady=15
         )
         self.result_label.pack()
         
         # 分隔线
-        tk.Frame(main_frame, bg='#BDBDBD', height=2).pack(fill=tk.X, pady=30)
+        tk.Frame(main_frame, bg='#BDBDBD', height=2).pack(fill=tk.X, pady=10)
         
         # === 第二部分：启动探究装置 ===
         section2_frame = tk.Frame(main_frame, bg=COLOR_BG)
-        section2_frame.pack(fill=tk.X, pady=20)
+        section2_frame.pack(fill=tk.X, pady=5)
         
         tk.Label(
             section2_frame,
@@ -119,9 +144,79 @@ class SystemModeling(tk.Frame):
         )
         self.b0_start_btn.pack(pady=10, ipady=12)
         
+        # 分隔线
+        tk.Frame(main_frame, bg='#BDBDBD', height=2).pack(fill=tk.X, pady=10)
+        
+        # === 第三部分：上位机扫频 ===
+        section3_frame = tk.Frame(main_frame, bg=COLOR_BG)
+        section3_frame.pack(fill=tk.X, pady=5)
+        
+        tk.Label(
+            section3_frame,
+            text="第三部分：上位机扫频",
+            font=('Arial', 14, 'bold'),
+            bg=COLOR_BG,
+            fg='#3F51B5'
+        ).pack(pady=5)
+        
+        sweep_ctrl_frame = tk.Frame(section3_frame, bg=COLOR_BG)
+        sweep_ctrl_frame.pack(pady=5)
+        
+        self.sweep_plan = tk.StringVar(value=next(iter(SWEEP_PLANS)))
+        ttk.Combobox(
+            sweep_ctrl_frame,
+            textvariable=self.sweep_plan,
+            values=list(SWEEP_PLANS),
+            state='readonly',
+            width=28
+        ).pack(side=tk.LEFT, padx=5)
+        
+        self.sweep_btn = ttk.Button(
+            sweep_ctrl_frame,
+            text="开始扫频",
+            command=self.toggle_sweep,
+            bootstyle="primary-outline",
+            width=16
+        )
+        self.sweep_btn.pack(side=tk.LEFT, padx=5)
+        
+        ttk.Button(
+            sweep_ctrl_frame,
+            text="载入记录",
+            command=self.load_sweep_record,
+            bootstyle="secondary-outline",
+            width=10
+        ).pack(side=tk.LEFT, padx=5)
+        
+        self.sweep_progress = ttk.Progressbar(
+            section3_frame,
+            maximum=1.0,
+            bootstyle="striped"
+        )
+        self.sweep_progress.pack(fill=tk.X, pady=5)
+        
+        self.sweep_status_label = tk.Label(
+            section3_frame,
+            text="扫频进度：未开始",
+            font=FONT_STATUS,
+            bg=COLOR_BG,
+            fg='#757575'
+        )
+        self.sweep_status_label.pack()
+        
+        # 实时Bode曲线（幅值/峰值 vs 频率，对数频率轴）
+        self.plot = LivePlot(
+            section3_frame,
+            fps=PLOT_FPS,
+            log_x=True,
+            y_label='V',
+            height=160
+        )
+        self.plot.pack(fill=tk.X, pady=5)
+        
         # 底部返回按钮
         bottom_frame = tk.Frame(self, bg=COLOR_BG)
-        bottom_frame.pack(fill=tk.X, padx=40, pady=20)
+        bottom_frame.pack(fill=tk.X, padx=40, pady=10)
         
         ttk.Button(
             bottom_frame,
@@ -132,16 +227,41 @@ class SystemModeling(tk.Frame):
         ).pack(side=tk.RIGHT)
     
     def setup_serial_callback(self):
-        """设置串口接收回调"""
+        """订阅串口反馈（经更新桥在Tk线程中执行）"""
         if self.serial:
-            self.serial.set_receive_callback(self.on_serial_receive)
+            self.serial.subscribe('result.txt', self.bridge.wrap(self.on_result_feedback))
+    
+    def on_result_feedback(self, obj_attr, value):
+        """建模结果反馈"""
+        # 显示滤波器类型识别结果（已有上位机分析时一并核对）
+        text = value
+        if self.analysis:
+            text = f"{value}\n{describe(self.analysis, board=value)}"
+        self.result_label.config(text=text, fg='#00FF00')
+        log.info("← 接收建模结果: %s", value)
+    
+    def analyze_sweep(self, data):
+        """由扫频数据在上位机识别滤波器，结果显示在建模结果区"""
+        try:
+            self.analysis = analyze(*gain_from_record(data))
+        except ValueError as e:
+            self.analysis = None
+            log.warning("✗ 扫频数据分析失败: %s", e)
+            return
+        board = self.serial.device.result if self.serial else None
+        text = describe(self.analysis, board=board)
+        if board:
+            text = f"Filter Type : {board}\n{text}"
+        self.result_frame.pack(fill=tk.X, pady=10)
+        self.result_label.config(text=text, fg='#00FF00')
+        log.info("✓ 上位机识别: %s %s", self.analysis.kind,
+                 " / ".join(f"{f:.0f}Hz" for f in self.analysis.corners))
     
-    def on_serial_receive(self, obj_attr, value):
-        """串口接收回调"""
-        if obj_attr == 'result.txt':
-            # 显示滤波器类型识别结果
-            self.result_label.config(text=value, fg='#00FF00')
-            print(f"← 接收建模结果: {value}")
+    def on_sweep_point(self, freq, value, latency, levels=None):
+        """扫频点完成：写入数据存储（接收线程）"""
+        # 幅值为当前输入电平设置，峰值为该频率点之后上报的vp0（V，未收到或下位机不上报时为nan）
+        peak = levels[TOPIC_PEAK] if levels else math.nan
+        self.sweep_store.append(freq, self.serial.device.amp, peak)
     
     def toggle_modeling(self):
         """切换建模状态"""
@@ -202,9 +322,106 @@ class SystemModeling(tk.Frame):
             if self.serial and self.serial.is_connected:
                 self.serial.send_start_cmd()
     
+    def toggle_sweep(self):
+        """开始/停止上位机扫频"""
+        if self.sweep_engine and self.sweep_engine.running:
+            self.sweep_engine.stop()
+            return
+        if not (self.serial and self.serial.is_connected):
+            messagebox.showwarning("警告", "串口未连接")
+            return
+        freqs = SWEEP_PLANS[self.sweep_plan.get()]()
+        path = os.path.join(SWEEP_DATA_DIR, time.strftime('sweep_%Y%m%d_%H%M%S.npy'))
+        self.sweep_store = ResponseStore(path)
+        # 下位机不上报输出电平时只记录频率和输入电平，不能做上位机分析
+        level_echo = self.serial.level_echo
+        if not level_echo:
+            log.warning("✗ 下位机不在频率命令后上报vp0，扫频记录没有输出电平，不做上位机分析")
+        self.sweep_engine = SweepEngine(
+            self.serial, freqs,
+            window=SWEEP_WINDOW, ack_timeout=SWEEP_ACK_TIMEOUT,
+            on_point=self.on_sweep_point, level_topics=(TOPIC_PEAK,) if level_echo else ()
+        )
+        self.sweep_engine.start()
+        self.plot.clear()
+        self.plotted = 0
+        self.sweep_btn.config(text="停止扫频", bootstyle="danger")
+        log.info("→ 开始上位机扫频: %d点 (%sHz - %sHz)", len(freqs), freqs[0], freqs[-1])
+        self.update_sweep_progress()
+    
+    def update_sweep_progress(self):
+        """刷新扫频进度和预计剩余时间（Tk定时器）"""
+        engine = self.sweep_engine
+        if not self.winfo_exists():
+            # 页面已销毁（重新连接串口）：中止扫频并保存已有数据
+            engine.stop()
+            engine.wait(1.0)
+            self.sweep_store.close()
+            return
+        progress = engine.progress()
+        self.sweep_progress['value'] = progress['fraction']
+        eta = f"{progress['eta']:.1f}s" if progress['eta'] is not None else "--"
+        text = (f"扫频进度：{progress['acked'] + progress['timeouts']}/{progress['total']}  "
+                f"{progress['rate']:.0f}点/秒  剩余 {eta}  超时 {progress['timeouts']}")
+        self.append_sweep_data()
+        if progress['done']:
+            status = progress['error'] or ("已完成" if engine.sent == engine.total else "已停止")
+            if not self.serial.level_echo:
+                status += "，下位机未上报输出电平，无法分析"
+            self.sweep_status_label.config(text=f"{text}  [{status}]", fg=COLOR_SUCCESS)
+            self.sweep_btn.config(text="开始扫频", bootstyle="primary-outline")
+            self.sweep_store.close()
+            log.info("✓ 上位机扫频结束: %s, 用时 %.1fs, 已保存 %d点 → %s",
+                     status, progress['elapsed'], len(self.sweep_store), self.sweep_store.path)
+            if self.serial.level_echo:
+                self.analyze_sweep(self.sweep_store.data())
+        else:
+            self.sweep_status_label.config(text=text, fg=COLOR_TEXT)
+            self.after(1000 // PLOT_FPS, self.update_sweep_progress)
+    
+    def append_sweep_data(self):
+        """只把上次刷新后新增的扫频点送入曲线控件（已落盘的数据不再整体读取）"""
+        data = self.sweep_store.since(self.plotted)
+        if not len(data):
+            return
+        self.plotted += len(data)
+        self.plot.append_trace('amp', data['freq'], data['amp'], color='#00FF00')
+        self.plot.append_trace('peak', data['freq'], data['peak'], color='#FFC107')
+    
+    def show_sweep_data(self, data):
+        """把扫频数据送入曲线控件（重绘由控件按帧率限制）"""
+        self.plot.set_trace('amp', data['freq'], data['amp'], color='#00FF00')
+        self.plot.set_trace('peak', data['freq'], data['peak'], color='#FFC107')
+    
+    def load_sweep_record(self):
+        """载入历史扫频记录（内存映射，立即打开）"""
+        path = filedialog.askopenfilename(
+            title="载入扫频记录",
+            initialdir=SWEEP_DATA_DIR if os.path.isdir(SWEEP_DATA_DIR) else None,
+            filetypes=[("扫频记录", "*.npy")]
+        )
+        if not path:
+            return
+        try:
+            data = ResponseStore.load(path)
+        except Exception as e:
+            messagebox.showerror("错误", f"无法载入记录:\n{e}")
+            return
+        if len(data):
+            text = (f"记录 {os.path.basename(path)}：{len(data)}点  "
+                    f"{data['freq'].min():.0f}Hz - {data['freq'].max():.0f}Hz")
+        else:
+            text = f"记录 {os.path.basename(path)}：无数据"
+        self.sweep_status_label.config(text=text, fg=COLOR_TEXT)
+        self.show_sweep_data(data)
+        log.info("✓ 载入扫频记录: %s (%d点)", path, len(data))
+        self.analyze_sweep(data)
+    
     def on_return(self):
         """返回主菜单"""
         # 停止所有运行中的任务
+        if self.sweep_engine and self.sweep_engine.running:
+            self.sweep_engine.stop()
         if self.b9_active:
             self.toggle_modeling()
         if self.b0_active:
@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+"""
+实时曲线控件
+每条曲线只用一个 tk.Canvas 折线对象；任意点数先做最小/最大值抽取，
+压缩到每个像素列约2个点，并按目标帧率限制重绘频率
+"""
+
+import time
+import tkinter as tk
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+
+def minmax_decimate(x, y, x_min: float, x_max: float, width: int,
+                    log_x: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    最小/最大值抽取
+    把[x_min, x_max]映射到width个像素列，每列保留y的最小值和最大值
+    Returns:
+        (列号数组, y数组)，每列两个点（先min后max），全为NaN的列被去掉
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    if log_x:
+        valid = x > 0
+        x, y = np.log10(x[valid]), y[valid]
+        x_min, x_max = np.log10(x_min), np.log10(x_max)
+    span = (x_max - x_min) or 1.0
+    cols = ((x - x_min) * ((width - 1) / span)).astype(np.int64)
+    inside = (cols >= 0) & (cols < width)
+    cols, y = cols[inside], y[inside]
+    if cols.size == 0:
+        return cols, y
+    if cols.size > 1 and np.any(cols[1:] < cols[:-1]):
+        order = np.argsort(cols, kind='stable')
+        cols, y = cols[order], y[order]
+    # 每列的起始下标
+    starts = np.flatnonzero(np.r_[True, cols[1:] != cols[:-1]])
+    # fmin/fmax 忽略NaN
+    y_min = np.fmin.reduceat(y, starts)
+    y_max = np.fmax.reduceat(y, starts)
+    col = cols[starts]
+    keep = ~np.isnan(y_min)
+    col, y_min, y_max = col[keep], y_min[keep], y_max[keep]
+    out_cols = np.repeat(col, 2)
+    out_y = np.empty(out_cols.size)
+    out_y[0::2] = y_min
+    out_y[1::2] = y_max
+    return out_cols, out_y
+
+
+class LivePlot(tk.Canvas):
+    """
+    实时曲线画布
+    - set_trace() 只更新数据并请求重绘
+    - append_trace() 向曲线追加新点（按倍数扩容的缓冲区，不复制已有数据）
+    - 重绘间隔不小于 1/fps 秒，多次请求合并为一次
+    """
+
+    MARGIN_LEFT = 50
+    MARGIN_RIGHT = 10
+    MARGIN_TOP = 10
+    MARGIN_BOTTOM = 20
+
+    def __init__(self, parent, fps: int = 30, log_x: bool = False, y_label: str = '', **kwargs):
+        kwargs.setdefault('bg', '#000000')
+        kwargs.setdefault('highlightthickness', 0)
+        super().__init__(parent, **kwargs)
+        self.min_interval = 1.0 / fps
+        self.log_x = log_x
+        self.y_label = y_label
+        self._traces: Dict[str, dict] = {}
+        self._last_draw = 0.0
+        self._after_id = None
+        self.redraws = 0            # 实际重绘次数
+        self.last_draw_ms = 0.0     # 最近一次重绘耗时
+
+        self._frame = self.create_rectangle(0, 0, 0, 0, outline='#606060')
+        self._labels = [self.create_text(0, 0, fill='#A0A0A0', font=('Arial', 8)) for _ in range(5)]
+        self.bind('<Configure>', lambda e: self.request_redraw())
+
+    def set_trace(self, name: str, x, y, color: str = '#00FF00'):
+        """设置曲线数据（须在Tk线程调用）"""
+        trace = self._traces.get(name)
+        if trace is None:
+            item = self.create_line(0, 0, 0, 0, fill=color, width=1)
+            trace = self._traces[name] = {'item': item}
+        trace.pop('size', None)     # 整体替换后append_trace重新建立缓冲区
+        trace['x'] = x
+        trace['y'] = y
+        self.request_redraw()
+
+    def append_trace(self, name: str, x, y, color: str = '#00FF00'):
+        """向曲线追加数据点（须在Tk线程调用）"""
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        trace = self._traces.get(name)
+        if trace is None or 'size' not in trace:
+            item = trace['item'] if trace else self.create_line(0, 0, 0, 0, fill=color, width=1)
+            trace = self._traces[name] = {'item': item, 'size': 0,
+                                          'x_buf': np.empty(max(1024, x.size)),
+                                          'y_buf': np.empty(max(1024, x.size))}
+        size = trace['size']
+        needed = size + x.size
+        if needed > trace['x_buf'].size:
+            capacity = max(needed, trace['x_buf'].size * 2)
+            for key in ('x_buf', 'y_buf'):
+                buf = np.empty(capacity)
+                buf[:size] = trace[key][:size]
+                trace[key] = buf
+        trace['x_buf'][size:needed] = x
+        trace['y_buf'][size:needed] = y
+        trace['size'] = needed
+        trace['x'] = trace['x_buf'][:needed]
+        trace['y'] = trace['y_buf'][:needed]
+        self.request_redraw()
+
+    def clear(self):
+        """移除所有曲线"""
+        for trace in self._traces.values():
+            self.delete(trace['item'])
+        self._traces = {}
+        self.request_redraw()
+
+    def request_redraw(self):
+        """请求重绘（按帧率合并）"""
+        if self._after_id is not None:
+            return
+        delay = self._last_draw + self.min_interval - time.perf_counter()
+        self._after_id = self.after(max(0, int(delay * 1000)), self._redraw)
+
+    def _plot_area(self) -> Tuple[int, int, int, int]:
+        width = max(self.winfo_width(), 2)
+        height = max(self.winfo_height(), 2)
+        return (self.MARGIN_LEFT, self.MARGIN_TOP,
+                width - self.MARGIN_RIGHT, height - self.MARGIN_BOTTOM)
+
+    def _x_range(self) -> Optional[Tuple[float, float]]:
+        lows, highs = [], []
+        for trace in self._traces.values():
+            x = np.asarray(trace['x'])
+            if self.log_x:
+                x = x[x > 0]
+            if x.size:
+                lows.append(x.min())
+                highs.append(x.max())
+        if not lows:
+            return None
+        return float(min(lows)), float(max(highs))
+
+    def _redraw(self):
+        self._after_id = None
+        t0 = time.perf_counter()
+        left, top, right, bottom = self._plot_area()
+        self.coords(self._frame, left, top, right, bottom)
+        plot_w = max(right - left, 2)
+        plot_h = max(bottom - top, 2)
+
+        x_range = self._x_range()
+        decimated = {}
+        if x_range:
+            for name, trace in self._traces.items():
+                decimated[name] = minmax_decimate(trace['x'], trace['y'], x_range[0], x_range[1],
+                                                  plot_w, self.log_x)
+        ys = [y for _, y in decimated.values() if y.size]
+        if ys:
+            y_lo = min(float(y.min()) for y in ys)
+            y_hi = max(float(y.max()) for y in ys)
+        else:
+            y_lo, y_hi = 0.0, 1.0
+        if y_hi - y_lo < 1e-12:
+            y_lo, y_hi = y_lo - 0.5, y_hi + 0.5
+        y_scale = (plot_h - 1) / (y_hi - y_lo)
+
+        for name, trace in self._traces.items():
+            cols, y = decimated.get(name, (np.empty(0), np.empty(0)))
+            if cols.size < 2:
+                self.coords(trace['item'], 0, 0, 0, 0)
+                self.itemconfigure(trace['item'], state='hidden')
+                continue
+            coords = np.empty(cols.size * 2)
+            coords[0::2] = left + cols
+            coords[1::2] = bottom - (y - y_lo) * y_scale
+            self.coords(trace['item'], *coords.tolist())
+            self.itemconfigure(trace['item'], state='normal')
+
+        self._draw_labels(x_range, y_lo, y_hi, left, top, right, bottom)
+        self._last_draw = time.perf_counter()
+        self.last_draw_ms = (self._last_draw - t0) * 1000
+        self.redraws += 1
+
+    def _draw_labels(self, x_range, y_lo, y_hi, left, top, right, bottom):
+        """坐标轴范围标注"""
+        def fmt(v):
+            return f"{v / 1000:.4g}k" if abs(v) >= 1000 else f"{v:.4g}"
+        x_lo, x_hi = x_range if x_range else ('', '')
+        texts = [
+            (left, bottom + 10, fmt(x_lo) if x_range else '', 'w'),
+            (right, bottom + 10, (fmt(x_hi) + 'Hz') if x_range else '', 'e'),
+            (left - 4, top, fmt(y_hi), 'ne'),
+            (left - 4, bottom, fmt(y_lo), 'se'),
+            (left - 4, (top + bottom) / 2, self.y_label, 'e'),
+        ]
+        for item, (x, y, text, anchor) in zip(self._labels, texts):
+            self.coords(item, x, y)
+            self.itemconfigure(item, text=text, anchor=anchor)
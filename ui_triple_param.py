@@ -4,19 +4,21 @@
 """
 
 import tkinter as tk
-from tkinter import messagebox
+from tkinter import filedialog, messagebox
 import ttkbootstrap as ttk
 from ttkbootstrap.constants import *
 from config import *
+from protocol import CMD_AMP, CMD_FREQ_MODE2, CMD_PEAK
 
 
 class TripleParamControl(tk.Frame):
     """三参数控制页面"""
     
-    def __init__(self, parent, serial_comm, navigate_callback):
+    def __init__(self, parent, serial_comm, navigate_callback, bridge):
         super().__init__(parent, bg=COLOR_BG)
         self.serial = serial_comm
         self.navigate = navigate_callback
+        self.bridge = bridge  # 接收线程 → Tk主循环的更新桥
         
         # 状态变量
         self.state1 = tk.IntVar(value=1)
@@ -26,9 +28,11 @@ class TripleParamControl(tk.Frame):
         self.f0_text = tk.StringVar(value="1000 Hz")
         self.v0_text = tk.StringVar(value="1.00 V")
         self.vp0_text = tk.StringVar(value="1.00 V")  # 峰值显示
+        self.runner = None  # 参数序列执行器（SequenceRunner）
         
         self.setup_ui()
         self.setup_serial_callback()
+        self.update_latency()
     
     def setup_ui(self):
         """初始化UI"""
@@ -195,6 +199,46 @@ class TripleParamControl(tk.Frame):
         for i in range(3):
             main_frame.grid_columnconfigure(i, weight=1)
         
+        # 反馈延迟统计
+        self.latency_label = tk.Label(
+            self,
+            text="反馈延迟  --",
+            font=FONT_STATUS,
+            bg=COLOR_BG,
+            fg='#606060'
+        )
+        self.latency_label.pack(fill=tk.X, padx=20)
+        
+        # 参数序列（浸泡测试）
+        sequence_frame = tk.Frame(self, bg=COLOR_BG)
+        sequence_frame.pack(fill=tk.X, padx=20, pady=(10, 0))
+        
+        self.sequence_btn = ttk.Button(
+            sequence_frame,
+            text="运行序列...",
+            command=self.toggle_sequence,
+            bootstyle="info",
+            width=15
+        )
+        self.sequence_btn.pack(side=tk.LEFT, padx=10)
+        
+        ttk.Button(
+            sequence_frame,
+            text="停止序列",
+            command=self.stop_sequence,
+            bootstyle="secondary",
+            width=15
+        ).pack(side=tk.LEFT, padx=10)
+        
+        self.sequence_label = tk.Label(
+            sequence_frame,
+            text="序列  --",
+            font=FONT_STATUS,
+            bg=COLOR_BG,
+            fg='#606060'
+        )
+        self.sequence_label.pack(side=tk.LEFT, padx=20)
+        
         # 底部控制按钮
         bottom_frame = tk.Frame(self, bg=COLOR_BG)
         bottom_frame.pack(fill=tk.X, padx=20, pady=10)
@@ -232,19 +276,40 @@ class TripleParamControl(tk.Frame):
         ).pack(side=tk.RIGHT, padx=10)
     
     def setup_serial_callback(self):
-        """设置串口接收回调"""
+        """观察下位机状态变化（经更新桥在Tk线程中执行，数值不变的反馈不刷新）"""
         if self.serial:
-            self.serial.set_receive_callback(self.on_serial_receive)
+            device = self.serial.device
+            for field, var in (('freq', self.f0_text), ('amp', self.v0_text), ('peak', self.vp0_text)):
+                device.observe(field, self.bridge.wrap(self.on_state_change))
+                # 页面创建前已收到的状态
+                var.set(device.text(field) or var.get())
     
-    def on_serial_receive(self, obj_attr, value):
-        """串口接收回调"""
-        if obj_attr == 'f0.txt':
-            self.f0_text.set(value)
-        elif obj_attr == 'v0.txt':
-            self.v0_text.set(value)
-        elif obj_attr == 'vp0.txt':
-            self.vp0_text.set(value)
+    def on_state_change(self, field, value):
+        """频率/幅值/峰值变化"""
+        var = {'freq': self.f0_text, 'amp': self.v0_text, 'peak': self.vp0_text}[field]
+        var.set(self.serial.device.text(field))
+    
+    def on_clear_done(self, handle):
+        """Clear Buff的三条默认值反馈收齐或超时"""
+        if not self.winfo_exists():
+            return
+        if handle.confirmed():
             self.receive_status.config(text="清空缓冲接收完成", fg=COLOR_SUCCESS)
+        else:
+            self.receive_status.config(text="清空缓冲未收到反馈", fg=COLOR_STOP)
+    
+    def update_latency(self):
+        """定时刷新命令→反馈延迟（p50/p99/超时数）"""
+        if not self.winfo_exists():
+            if self.runner:
+                self.runner.stop()      # 页面已销毁（重新连接串口），旧连接上的序列不再继续
+            return
+        if self.serial and self.winfo_ismapped():
+            self.serial.responses.expire()      # 让超时的Clear Buff及时回调
+            self.latency_label.config(text=self.serial.latency.summary((CMD_FREQ_MODE2, CMD_AMP, CMD_PEAK)))
+        if self.runner:
+            self.update_sequence()
+        self.after(LATENCY_REFRESH_MS, self.update_latency)
     
     def increment_value(self, var, increment):
         """增加变量值"""
@@ -281,7 +346,8 @@ class TripleParamControl(tk.Frame):
         if self.state1.get() == 1:
             if self.serial and self.serial.is_connected:
                 self.receive_status.config(text="清空缓冲接收等待中...", fg=COLOR_WARNING)
-                self.serial.send_clear_buff()
+                handle = self.serial.send_clear_buff()
+                handle.add_done_callback(lambda h: self.bridge.post('clear_buff', self.on_clear_done, h))
             else:
                 messagebox.showwarning("警告", "串口未连接")
     
@@ -297,4 +363,54 @@ class TripleParamControl(tk.Frame):
             self.state1.set(1)
             self.start_stop_btn.config(text="停止", bootstyle="danger")
             self.status_label.config(text="串口通讯：运行中.. (三参数模式)")
-
+    
+    def toggle_sequence(self):
+        """未运行时加载并开始序列，运行中暂停/继续"""
+        if self.runner and self.runner.running:
+            if self.runner.paused:
+                self.runner.resume()
+                self.sequence_btn.config(text="暂停序列")
+            else:
+                self.runner.pause()
+                self.sequence_btn.config(text="继续序列")
+            self.update_sequence()
+            return
+        if not (self.serial and self.serial.is_connected):
+            messagebox.showwarning("警告", "串口未连接")
+            return
+        path = filedialog.askopenfilename(
+            title="选择参数序列",
+            filetypes=[("序列文件", "*.csv *.json"), ("所有文件", "*.*")]
+        )
+        if not path:
+            return
+        from sequence import SequenceRunner, load_program
+        try:
+            steps, repeat = load_program(path)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("错误", f"序列加载失败: {e}")
+            return
+        self.runner = SequenceRunner(self.serial, steps, repeat)
+        self.runner.start()
+        self.sequence_btn.config(text="暂停序列")
+        self.update_sequence()
+    
+    def stop_sequence(self):
+        """停止序列"""
+        if self.runner:
+            self.runner.stop()
+    
+    def update_sequence(self):
+        """刷新序列进度与计划/实际时间偏差"""
+        progress = self.runner.progress()
+        if progress['done']:
+            self.sequence_btn.config(text="运行序列...")
+            text = f"序列{'失败: ' + progress['error'] if progress['error'] else '结束'}  {self.runner.summary()}"
+        else:
+            total = progress['total_steps'] or '∞'
+            report = self.runner.report()
+            late = report['late_p99_ms']
+            text = (f"序列{'暂停' if progress['paused'] else '运行'}  第{progress['loop'] + 1}遍 "
+                    f"第{progress['index'] + 1}步  {progress['steps_done']}/{total}  "
+                    f"{progress['elapsed']:.1f}s  迟到p99 {f'{late:.2f}ms' if late is not None else '--'}")
+        self.sequence_label.config(text=text)